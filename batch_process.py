@@ -5,6 +5,7 @@
 """
 
 import sys
+import argparse
 from pathlib import Path
 from modules.calculator import Calculator
 from modules.storage import Storage
@@ -12,20 +13,26 @@ from modules.batch_processor import BatchProcessor
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("用法: python batch_process.py <输入文件>")
-        print("支持的文件格式: .txt, .json, .csv")
-        sys.exit(1)
-    
-    input_file = sys.argv[1]
+    parser = argparse.ArgumentParser(description='批量处理入口（支持的文件格式: .txt, .json, .jsonl, .csv）')
+    parser.add_argument('input_file', help='输入文件')
+    parser.add_argument('--output-format', choices=['json', 'jsonl', 'csv', 'sqlite'], default='json',
+                        help='结果格式：json(默认) / jsonl / csv(评分列) / sqlite')
+    parser.add_argument('--resume', action='store_true',
+                        help='从上次中断处继续（跳过已完成的行，续写已有结果文件）')
+    parser.add_argument('--dedup', action='store_true',
+                        help='相同输入（姓名、性别、出生时间、经纬度）只计算一次')
+    parser.add_argument('--verbose', action='store_true',
+                        help='逐条显示详细结果（默认只显示一行进度）')
+    args = parser.parse_args()
     
     # 初始化
     calc = Calculator('local.db')
     storage = Storage('local.db')
-    processor = BatchProcessor(calc, storage)
+    processor = BatchProcessor(calc, storage, output_format=args.output_format, verbose=args.verbose,
+                               dedup=args.dedup)
     
     # 处理文件
-    result = processor.process_file(input_file)
+    result = processor.process_file(args.input_file, resume=args.resume)
     
     if result['success']:
         print(f"\n批处理成功完成！")
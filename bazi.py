@@ -6,6 +6,7 @@ Author: Auto Generated
 Date: 2025-12-03
 """
 
+import os
 import sys
 import argparse
 import logging
@@ -41,22 +42,63 @@ def main():
   python bazi.py              # 启动交互界面
   python bazi.py -t           # 启动姓名测试
   python bazi.py -b names.txt # 批量处理模式
+  python bazi.py -b names.csv --output-format jsonl  # 批量结果输出为 JSON Lines
+  python bazi.py -b names.csv --resume  # 从上次中断处继续批量处理
+  python bazi.py -b names.txt --verbose # 批量处理时逐条显示详细结果
+  python bazi.py -b names.txt --dedup   # 相同输入只计算一次
   python bazi.py -v           # 显示版本信息
   python bazi.py --reload-data     # 重新加载数据
+  python bazi.py --build-db dist/local.db  # 构建预构建数据库及清单
+  python bazi.py --verify-db local.db      # 校验下载的预构建数据库
   python bazi.py --clear-history   # 清空历史记录
   python bazi.py --clear-all-data  # 清空所有数据表
   python bazi.py --show-tables     # 显示数据表统计
+  python bazi.py --show-tables --deep  # 重新计数并校正表统计
+  python bazi.py --history --name-prefix 张 --min-score 80   # 分页查看历史记录
+  python bazi.py --export-history history.jsonl              # 导出历史记录
+  python bazi.py --stats           # 显示历史评分分布统计
+  python bazi.py --compact-history --max-age-days 180 --keep-latest 3  # 按保留策略清理历史
   python bazi.py --geo-help        # 显示经纬度查询帮助
         """
     )
     parser.add_argument('-t', '--test', action='store_true', help='开始姓名测试')
     parser.add_argument('-v', '--version', action='store_true', help='显示版本信息')
     parser.add_argument('-b', '--batch', type=str, metavar='FILE', help='批量处理模式，从文件读取姓名信息')
+    parser.add_argument('--output-format', choices=['json', 'jsonl', 'csv', 'sqlite'], default='json',
+                        help='批量处理结果格式：json(默认) / jsonl / csv(评分列) / sqlite')
+    parser.add_argument('--resume', action='store_true',
+                        help='批量处理从上次中断处继续（跳过已完成的行，续写已有结果文件）')
+    parser.add_argument('--dedup', action='store_true',
+                        help='批量处理时相同输入（姓名、性别、出生时间、经纬度）只计算一次')
+    parser.add_argument('--verbose', action='store_true',
+                        help='批量处理时逐条显示详细结果（默认只显示一行进度）')
     parser.add_argument('--reload-data', action='store_true', help='重新加载资源数据')
+    parser.add_argument('--load-workers', type=int, default=min(4, os.cpu_count() or 1), metavar='N',
+                        help='加载资源数据时并行解析的进程数（默认取 CPU 核数，最多4）')
+    parser.add_argument('--build-db', type=str, metavar='FILE',
+                        help='由资源文件构建可分发的预构建数据库（同时生成 FILE.manifest.json）')
+    parser.add_argument('--verify-db', type=str, metavar='FILE', help='按清单文件校验下载的预构建数据库')
     parser.add_argument('--clear-history', action='store_true', help='清空所有历史计算结果')
     parser.add_argument('--clear-all-data', action='store_true', help='清空所有数据表（包括资源数据）')
     parser.add_argument('--show-tables', action='store_true', help='显示所有数据表统计信息')
+    parser.add_argument('--deep', action='store_true', help='配合 --show-tables：重新计数各表并校正统计元数据')
     parser.add_argument('--geo-help', action='store_true', help='显示经纬度查询帮助')
+    parser.add_argument('--stats', action='store_true', help='显示历史评分分布统计（生肖/三才/评分分段）')
+    parser.add_argument('--history', action='store_true', help='分页查看历史记录（最新在前）')
+    parser.add_argument('--export-history', type=str, metavar='FILE', help='按过滤条件导出历史记录到JSON Lines文件')
+    parser.add_argument('--history-limit', type=int, default=20, metavar='N', help='历史记录每页条数（默认20）')
+    parser.add_argument('--cursor', type=str, metavar='TOKEN', help='历史记录分页游标（取自上一页输出）')
+    parser.add_argument('--name-prefix', type=str, help='历史记录按姓名前缀过滤')
+    parser.add_argument('--min-score', type=int, help='历史记录综合评分下限')
+    parser.add_argument('--max-score', type=int, help='历史记录综合评分上限')
+    parser.add_argument('--since', type=str, metavar='DATE', help='历史记录创建时间下限（YYYY-MM-DD[ HH:MM:SS]）')
+    parser.add_argument('--until', type=str, metavar='DATE', help='历史记录创建时间上限（YYYY-MM-DD[ HH:MM:SS]）')
+    parser.add_argument('--compact-history', action='store_true',
+                        help='按保留策略清理个人版/公司版历史记录并回收数据库空间')
+    parser.add_argument('--max-age-days', type=int, metavar='N', help='保留策略：删除早于 N 天的记录')
+    parser.add_argument('--max-rows', type=int, metavar='N', help='保留策略：每类历史最多保留最新 N 条')
+    parser.add_argument('--keep-latest', type=int, metavar='N', help='保留策略：同一姓名/公司只保留最新 N 条')
+    parser.add_argument('--chunk-size', type=int, default=500, metavar='N', help='清理时每个事务删除的记录数（默认500）')
     
     args = parser.parse_args()
     
@@ -77,7 +119,7 @@ def main():
         if args.show_tables:
             from modules.storage import Storage
             storage = Storage()
-            tables_info = storage.get_all_tables_info()
+            tables_info = storage.get_all_tables_info(deep=args.deep)
             
             if not tables_info:
                 print("\n数据库中没有数据表")
@@ -113,6 +155,85 @@ def main():
             print(f"历史记录总计: {total_result:>8,} 条")
             return 0
         
+        # 显示历史评分分布统计
+        if args.stats:
+            from modules.storage import Storage
+            from modules.analytics import PERSON_DIMENSIONS
+            storage = Storage()
+            summary = storage.analytics.summary(PERSON_DIMENSIONS)
+            
+            if not any(summary.values()):
+                print("\n当前没有历史记录")
+                return 0
+            
+            for dimension, label in PERSON_DIMENSIONS.items():
+                print(f"\n{label}分布:")
+                print("-" * 60)
+                for item in summary.get(dimension, []):
+                    print(f"  {item['bucket']:12s} {item['count']:>8,} 条  平均分: {item['avg_score']}")
+            return 0
+        
+        # 分页查看 / 导出历史记录
+        if args.history or args.export_history:
+            from modules.storage import Storage
+            storage = Storage()
+            filters = {
+                'name_prefix': args.name_prefix,
+                'min_score': args.min_score,
+                'max_score': args.max_score,
+                'start_time': args.since,
+                'end_time': args.until
+            }
+            
+            if args.export_history:
+                import json
+                count = 0
+                with open(args.export_history, 'w', encoding='utf-8') as f:
+                    for record in storage.iter_history(**filters):
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                        count += 1
+                print(f"\n已导出 {count} 条历史记录到: {args.export_history}")
+                return 0
+            
+            records = storage.query_history(
+                limit=args.history_limit, cursor=Storage.decode_cursor(args.cursor), **filters
+            )
+            if not records:
+                print("\n没有符合条件的历史记录")
+                return 0
+            
+            print(f"\n历史记录（{len(records)} 条）:")
+            print("=" * 60)
+            for record in records:
+                print(f"  [{record['id']}] {record['name']} ({record['gender']}) "
+                      f"{record['birth_time']} 评分: {record['score']}分 时间: {record['created_at']}")
+            print("=" * 60)
+            if len(records) == args.history_limit:
+                print(f"下一页: --cursor \"{Storage.encode_cursor(records[-1])}\"")
+            return 0
+        
+        # 按保留策略清理历史记录
+        if args.compact_history:
+            from modules.storage import Storage
+            from modules.retention import HistoryRetention
+            retention = HistoryRetention(Storage(), chunk_size=args.chunk_size)
+            
+            if retention.enable_incremental_vacuum():
+                print("\n已将数据库切换为增量空间回收模式（已执行一次完整 VACUUM）")
+            result = retention.apply(
+                max_age_days=args.max_age_days,
+                max_rows=args.max_rows,
+                keep_latest_per_name=args.keep_latest
+            )
+            freed = retention.incremental_vacuum()
+            
+            print("\n历史记录清理完成:")
+            print(f"  个人版删除: {result['person_deleted']:>8,} 条")
+            print(f"  公司版删除: {result['company_deleted']:>8,} 条")
+            print(f"  孤立明细:   {result['orphans_deleted']:>8,} 条")
+            print(f"  回收页数:   {freed:>8,}")
+            return 0
+        
         # 清空历史记录
         if args.clear_history:
             from modules.storage import Storage
@@ -126,6 +247,8 @@ def main():
             confirm = input("确认清空所有历史记录？(yes/no): ").strip().lower()
             if confirm in ['yes', 'y', '是']:
                 if storage.clear_all_records():
+                    from modules.retention import HistoryRetention
+                    HistoryRetention(storage).incremental_vacuum()
                     print("✓ 历史记录已清空")
                     logger.info("用户清空了历史记录")
                 else:
@@ -169,6 +292,34 @@ def main():
                 print("操作已取消")
             return 0
         
+        # 构建预构建数据库
+        if args.build_db:
+            from modules.db_builder import DatabaseBuilder
+            print(f"\n正在构建数据库: {args.build_db}")
+            result = DatabaseBuilder(workers=args.load_workers).build(args.build_db)
+            if not result['success']:
+                print("✗ 构建失败:")
+                for error in result['errors']:
+                    print(f"  {error}")
+                return 1
+            manifest = result['manifest']
+            print(f"✓ 构建完成: {result['path']} ({manifest['size']:,} 字节)")
+            print(f"  结构版本: {manifest['schema_version']}")
+            print(f"  SHA-256: {manifest['sha256']}")
+            return 0
+        
+        # 校验预构建数据库
+        if args.verify_db:
+            from modules.db_builder import DatabaseBuilder
+            result = DatabaseBuilder().verify(args.verify_db)
+            if result['valid']:
+                print(f"✓ 校验通过: {args.verify_db}")
+                return 0
+            print(f"✗ 校验失败: {args.verify_db}")
+            for error in result['errors']:
+                print(f"  {error}")
+            return 1
+        
         # 初始化数据加载器
         logger.info("初始化数据加载器...")
         loader = DataLoader()
@@ -176,12 +327,16 @@ def main():
         # 重新加载数据
         if args.reload_data:
             logger.info("开始重新加载资源数据...")
-            result = loader.load_all_resources(force_reload=True)
+            result = loader.load_all_resources(force_reload=True, bulk=True, workers=args.load_workers)
             if result['success']:
                 logger.info("资源数据加载成功")
                 print("\n资源数据加载完成！")
                 for resource, stats in result['statistics'].items():
-                    print(f"  {resource}: 成功 {stats['success']}, 失败 {stats['failed']}")
+                    changes = stats.get('changes') or {}
+                    detail = (f"（新增 {changes.get('inserted', 0)}, 修改 {changes.get('updated', 0)}, "
+                              f"删除 {changes.get('deleted', 0)}）") if changes else ''
+                    print(f"  {resource}: 成功 {stats['success']}, 失败 {stats['failed']}{detail}"
+                          f" 耗时 {stats.get('duration', 0)}s")
             else:
                 logger.error("资源数据加载失败")
                 print("\n资源数据加载失败，请检查日志文件")
@@ -191,7 +346,7 @@ def main():
             integrity = loader.check_resource_integrity()
             if not integrity['complete']:
                 logger.warning("资源数据不完整，开始自动加载...")
-                result = loader.load_all_resources(force_reload=False)
+                result = loader.load_all_resources(force_reload=False, workers=args.load_workers)
                 if not result['success']:
                     logger.error("资源数据加载失败")
                     print("\n错误：资源数据加载失败，请使用 --reload-data 参数重新加载")
@@ -206,9 +361,10 @@ def main():
             
             calculator = Calculator()
             storage = Storage()
-            processor = BatchProcessor(calculator, storage)
+            processor = BatchProcessor(calculator, storage, output_format=args.output_format,
+                                       verbose=args.verbose, dedup=args.dedup)
             
-            result = processor.process_file(args.batch)
+            result = processor.process_file(args.batch, resume=args.resume)
             if result['success']:
                 print(f"\n[完成] 批量处理完成")
                 print(f"  成功: {result['success_count']} 条")
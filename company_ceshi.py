@@ -1,21 +1,63 @@
 import argparse
-import json
 import os
 from pathlib import Path
+import unicodedata
 from modules.company_calculator import CompanyCalculator
 from modules.storage import Storage
+from modules.company_batch import (COMPANY_RESULT_COLUMNS, CompanyBatchProcessor, company_score_row,
+                                   owner_bazi_info)
+from modules.result_writer import OUTPUT_FORMATS, open_result_writer
 
 VERSION = "0.3.0-company"
 
 
+def _pad(text: str, width: int) -> str:
+    """按显示宽度（汉字占两列）左对齐"""
+    shown = sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+    return text + ' ' * max(width - shown, 0)
+
+
+def print_compare_table(comparison: dict):
+    """打印名称对比排名表：第一名显示各项评分，其余名称附带与第一名的分差"""
+    dimensions = comparison['dimensions']
+    ranking = comparison['ranking']
+    name_width = max([8] + [len(item['name']) * 2 for item in ranking])
+    print(f"行业: {comparison['industry_type']} ({comparison['industry_code']})  候选 {len(ranking)} 个")
+    print((f"{_pad('排名', 4)}  {_pad('名称', name_width)}  " + '  '.join(_pad(label, 9) for _, label in dimensions)).rstrip())
+    for item in ranking:
+        cells = []
+        for key, _ in dimensions:
+            delta = item['deltas'][key]
+            cells.append(_pad(f"{item['scores'][key]}" + (f"({delta:+d})" if item['rank'] > 1 else ''), 9))
+        print((f"{item['rank']:<4}  {_pad(item['name'], name_width)}  " + '  '.join(cells)).rstrip())
+
+
 def main():
     parser = argparse.ArgumentParser(description="公司版名称分析 CLI")
     parser.add_argument('-c', '--company', action='store_true', help='启动公司名称测试')
     parser.add_argument('-bc', '--company-batch', type=str, metavar='FILE', help='公司名称批量处理（CSV或TXT）')
-    parser.add_argument('-cc', '--company-compare', action='store_true', help='公司名方案对比模式（预留）')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), metavar='N',
+                        help='批量分析的进程数（默认 min(4, CPU核数)，1 为单进程）')
+    parser.add_argument('-cc', '--company-compare', nargs='*', metavar='NAME',
+                        help='公司名方案对比：同一负责人、同一行业下的多个候选名称，输出排名与各项分差')
+    parser.add_argument('--names-file', type=str, metavar='FILE', help='对比模式的候选名称文件（每行一个，# 开头为注释）')
+    parser.add_argument('--industry', type=str, help='对比模式的行业类型（中文名或行业代码）')
+    parser.add_argument('--owner-birth', type=str, metavar='TIME', help='对比模式的负责人出生时间（YYYY-MM-DD HH:MM）')
+    parser.add_argument('--owner-lon', type=float, metavar='LON', help='对比模式的负责人出生地经度')
+    parser.add_argument('--owner-lat', type=float, metavar='LAT', help='对比模式的负责人出生地纬度')
     parser.add_argument('--company-history', action='store_true', help='查看公司测试历史记录')
+    parser.add_argument('--history-limit', type=int, default=20, metavar='N', help='历史记录每页条数（默认20）')
+    parser.add_argument('--cursor', type=str, metavar='TOKEN', help='历史记录分页游标（取自上一页输出）')
+    parser.add_argument('--name-prefix', type=str, help='历史记录按公司全称前缀过滤')
+    parser.add_argument('--min-score', type=int, help='历史记录综合评分下限')
+    parser.add_argument('--max-score', type=int, help='历史记录综合评分上限')
+    parser.add_argument('--since', type=str, metavar='DATE', help='历史记录创建时间下限（YYYY-MM-DD[ HH:MM:SS]）')
+    parser.add_argument('--until', type=str, metavar='DATE', help='历史记录创建时间上限（YYYY-MM-DD[ HH:MM:SS]）')
     parser.add_argument('--clear-history', action='store_true', help='清空所有历史记录')
+    parser.add_argument('--stats', action='store_true', help='显示公司历史评分分布统计（行业评级/评分分段）')
     parser.add_argument('--export-company', type=str, metavar='FILE', help='导出公司测试结果到JSON文件')
+    parser.add_argument('--export-format', choices=['json', 'jsonl', 'csv', 'sqlite'], default='json',
+                        help='批量结果格式：json数组(默认) / jsonl / csv(评分列) / sqlite')
     parser.add_argument('--industry-help', action='store_true', help='显示行业五行对照表')
     parser.add_argument('-v', '--version', action='store_true', help='显示版本信息')
 
@@ -35,13 +77,38 @@ def main():
 
     # 历史查询
     if args.company_history:
-        history = storage.get_company_history(limit=20)
+        history = storage.get_company_history(
+            limit=args.history_limit,
+            cursor=Storage.decode_cursor(args.cursor),
+            name_prefix=args.name_prefix,
+            min_score=args.min_score,
+            max_score=args.max_score,
+            start_time=args.since,
+            end_time=args.until
+        )
         if not history:
             print('暂无公司历史记录')
             return
         # 简洁打印
         for item in history:
             print(f"[{item['id']}] {item['full_name']} | 行业: {item.get('industry_type') or '-'} | 负责人: {item.get('owner_name') or '-'} | 综合:{item.get('total_score')}/{item.get('grade') or '-'} | 五格:{item.get('wuge_score') or '-'} | 喜用:{item.get('xiyong_match_score') or '-'} | 时间:{item.get('created_at')}")
+        if len(history) == args.history_limit:
+            print(f"下一页: --cursor \"{Storage.encode_cursor(history[-1])}\"")
+        return
+
+    # 评分分布统计
+    if args.stats:
+        from modules.analytics import COMPANY_DIMENSIONS
+        summary = storage.analytics.summary(COMPANY_DIMENSIONS)
+        if not any(summary.values()):
+            print('暂无公司历史记录')
+            return
+        print("行业评级分布:")
+        for item in summary.get('industry_grade', []):
+            print(f"  {item['bucket']} / {item['sub_bucket']}: {item['count']} 条 | 平均分 {item['avg_score']}")
+        print("综合评分分段:")
+        for item in summary.get('company_score_band', []):
+            print(f"  {item['bucket']}: {item['count']} 条 | 平均分 {item['avg_score']}")
         return
 
     # 清空历史
@@ -136,105 +203,60 @@ def main():
 
     # 仅实现批量与导出，符合SRD的 -bc 流程
     if args.company_batch:
-        file_path = args.company_batch
-        default_bazi = {'xiyong_shen': ['木', '水'], 'ji_shen': ['土'], 'bazi_match_score': 75}
-        if file_path.lower().endswith('.csv'):
-            import csv
-            results = []
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                count = 0
-                for row in reader:
-                    if count >= 5:
-                        break
-                    # 使用数据文件中的公司名称字段，不做程序内拼接/拆分
-                    full_name = (row.get('公司全称','') or row.get('公司名称','') or row.get('企业名称','') or '').strip()
-                    # 若数据文件未提供统一的全称字段，才回退到拼接（保持兼容老格式）
-                    if not full_name:
-                        full_name = ''.join(filter(None, [
-                            row.get('行政区划','').strip(),
-                            row.get('字号(主名)','').strip(),
-                            row.get('行业/经营特点','').strip(),
-                            row.get('组织形式','').strip()
-                        ]))
-                    birth = row.get('出生时间','').strip()
-                    lon = row.get('经度','').strip()
-                    lat = row.get('纬度','').strip()
-                    owner_name = row.get('负责人姓名','').strip()
-                    owner_gender = row.get('负责人性别','').strip()
-                    industry_type = row.get('行业类型','').strip()
-                    if birth and lon and lat:
-                        try:
-                            bazi_info_row = calc.build_bazi_info(birth, float(lon), float(lat))
-                        except Exception:
-                            bazi_info_row = default_bazi
-                    else:
-                        bazi_info_row = default_bazi
-                    # 为生肖分析提供日期回退：即使未能计算八字，也保留出生日期字符串
-                    if 'birth_time' not in bazi_info_row and birth:
-                        bazi_info_row['birth_time'] = birth
-                    result_row = calc.analyze_single(row.get('行政区划','').strip(),
-                                                     row.get('字号(主名)','').strip(), 
-                                                     row.get('行业/经营特点','').strip(), 
-                                                     row.get('组织形式','').strip(), 
-                                                     full_name,industry_type,bazi_info_row)
-                    # 附加负责人信息与行业类型到结果，便于后续持久化与审计
-                    result_row['owner'] = {
-                        'name': owner_name,
-                        'gender': owner_gender,
-                        'birth_time': birth,
-                        'longitude': lon,
-                        'latitude': lat
-                    }
-                    if industry_type:
-                        result_row['parsed']['industry_type'] = industry_type
-                    # 落库
-                    try:
-                        record_id = storage.save_company_result(result_row)
-                        if record_id:
-                            result_row['record_id'] = record_id
-                    except Exception:
-                        pass
-                    results.append(result_row)
-                    count += 1
-            output = results
-        else:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                names = [line.strip() for line in f if line.strip()][:4]
-            out_items = calc.batch_analyze(names, industry_type, default_bazi)
-            # 批量落库
-            output = []
-            for item in out_items:
-                try:
-                    record_id = storage.save_company_result(item)
-                    if record_id:
-                        item['record_id'] = record_id
-                except Exception:
-                    pass
-                output.append(item)
-
-        # 自动导出到默认文件
+        # 结果逐条写入导出文件，汇总信息单独写出
         if not args.export_company:
-            import datetime
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            args.export_company = f'tests/out_company_batch.json'
-        
-        with open(args.export_company, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
-        
+            args.export_company = f'tests/out_company_batch{OUTPUT_FORMATS[args.export_format]}'
+        processor = CompanyBatchProcessor(storage, db_path=str(db_path), output_format=args.export_format,
+                                          workers=args.workers)
+        result = processor.process_file(args.company_batch, args.export_company)
+        if not result['success']:
+            print(f"批量测试失败: {result['error']}")
+            return
+
         # 打印摘要
-        print(f"\n批量测试完成，共处理 {len(output)} 条")
-        print(f"结果已保存到: {args.export_company}")
-        print("\n评分摘要:")
-        for i, item in enumerate(output, 1):
-            name = item.get('parsed', {}).get('full_name', '未知')
-            score = item.get('scores', {}).get('total_score', 0)
-            grade = item.get('scores', {}).get('grade', '-')
+        print(f"\n批量测试完成，共处理 {result['total']} 条（成功 {result['success_count']}，失败 {result['failed_count']}）")
+        print(f"结果已保存到: {result['output_file']}")
+        if result['persist_failed_count']:
+            print(f"警告: {result['persist_failed_count']} 条结果保存到历史记录失败")
+        print(f"汇总信息: {result['summary_file']}")
+        print("\n评分最高:")
+        for i, (name, score, grade) in enumerate(result['top'], 1):
             print(f"  {i}. {name}: {score}分 ({grade})")
         return
 
+    # 名称方案对比：所有候选共用一个负责人/行业会话
+    if args.company_compare is not None:
+        names = list(args.company_compare)
+        if args.names_file:
+            with open(args.names_file, 'r', encoding='utf-8') as f:
+                names.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+        if len(names) < 2:
+            print('错误：至少需要两个候选名称（-cc 名称1 名称2 ... 或 --names-file FILE）')
+            return
+        if not args.industry:
+            print('错误：对比模式需要 --industry 指定行业类型')
+            return
+        owner = {'birth_time': args.owner_birth or '', 'longitude': args.owner_lon, 'latitude': args.owner_lat}
+        try:
+            comparison = calc.compare_names(names, args.industry, owner_bazi_info(calc, owner))
+        except Exception as e:
+            print(f"对比失败：{e}")
+            return
+
+        print_compare_table(comparison)
+        if args.export_company:
+            with open_result_writer(args.export_format, args.export_company,
+                                    columns=COMPANY_RESULT_COLUMNS, row_builder=company_score_row) as writer:
+                for item in comparison['ranking']:
+                    result = item['result']
+                    result['parsed']['industry_type'] = args.industry
+                    result['compare'] = {'rank': item['rank'], 'deltas': item['deltas']}
+                    writer.write(result)
+            print(f"\n对比结果已保存到: {args.export_company}")
+        return
+
     # 其他模式暂不实现，提示使用 -bc
-    print('请使用 -bc FILE 进行批量测试（支持CSV/TXT）')
+    print('请使用 -bc FILE 进行批量测试（支持CSV/TXT），或 -cc 名称1 名称2 ... 进行名称对比')
 
 
 if __name__ == '__main__':
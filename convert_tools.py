@@ -5,12 +5,19 @@
 将多个源文件合并转换为 kangxi.json 格式
 """
 
+import argparse
 import json
+import os
 import re
 import sys
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from modules.json_stream import iter_json_array
+from modules.result_writer import JsonResultWriter
+from modules.sql_dump import iter_dump_rows_parallel
+from modules.unihan import UnihanStore, read_unihan
+
 try:
     import pandas as pd
 except ImportError:
@@ -26,6 +33,8 @@ class KangxiConverter:
         self.unihan_strokes = {}  # Unicode -> 笔画数
         self.unihan_pinyin = {}   # Unicode -> 拼音
         self.unihan_simplified = {}  # Unicode -> 简体字Unicode
+        self.unihan_traditional = {}  # Unicode -> 繁体字Unicode
+        self.unihan_irg_sources = {}  # IRG来源字段 -> {Unicode -> 来源编号}
         
     def char_to_unicode_str(self, char: str) -> str:
         """
@@ -52,43 +61,25 @@ class KangxiConverter:
         except (ValueError, OverflowError):
             return ""
     
+    def load_unihan(self, irg_sources: str, readings: str, variants: str,
+                    cache_path: Optional[str] = None):
+        """
+        一次性加载转换所需的全部 Unihan 字段（每个文件只扫描一遍，结果缓存）
+        :param cache_path: 缓存文件路径，默认放在 Unihan 目录下；源文件未变化时直接读取缓存
+        """
+        print("正在加载 Unihan 数据...")
+        store = UnihanStore([irg_sources, readings, variants], cache_path)
+        fields = store.load()
+        print(f"  {'读取缓存' if store.from_cache else '解析源文件并写入缓存'}: {store.cache_path}")
+        self._apply_unihan_fields(fields)
+    
     def load_unihan_strokes(self, file_path: str):
         """
         加载 Unihan_IRGSources.txt 中的笔画数据
         :param file_path: 文件路径
         """
         print(f"正在加载笔画数据: {file_path}")
-        count = 0
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    # 跳过注释和空行
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    parts = line.split('\t')
-                    if len(parts) >= 3:
-                        unicode_str = parts[0]
-                        field_type = parts[1]
-                        
-                        # 只处理 kTotalStrokes 字段
-                        if field_type == 'kTotalStrokes':
-                            # 笔画数可能有多个值，取第一个
-                            strokes_str = parts[2].split()[0]
-                            try:
-                                strokes = int(strokes_str)
-                                self.unihan_strokes[unicode_str] = strokes
-                                count += 1
-                            except ValueError:
-                                pass
-            
-            print(f"  加载了 {count} 个汉字的笔画数据")
-        except FileNotFoundError:
-            print(f"  警告: 文件不存在 - {file_path}")
-        except Exception as e:
-            print(f"  错误: 加载失败 - {e}")
+        self._load_unihan_file(file_path)
     
     def load_unihan_readings(self, file_path: str):
         """
@@ -96,32 +87,7 @@ class KangxiConverter:
         :param file_path: 文件路径
         """
         print(f"正在加载拼音数据: {file_path}")
-        count = 0
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    parts = line.split('\t')
-                    if len(parts) >= 3:
-                        unicode_str = parts[0]
-                        field_type = parts[1]
-                        
-                        # 只处理 kMandarin 字段（普通话拼音）
-                        if field_type == 'kMandarin':
-                            # 拼音可能有多个，取第一个，并转为小写
-                            pinyin = parts[2].split()[0].lower()
-                            self.unihan_pinyin[unicode_str] = pinyin
-                            count += 1
-            
-            print(f"  加载了 {count} 个汉字的拼音数据")
-        except FileNotFoundError:
-            print(f"  警告: 文件不存在 - {file_path}")
-        except Exception as e:
-            print(f"  错误: 加载失败 - {e}")
+        self._load_unihan_file(file_path)
     
     def load_unihan_variants(self, file_path: str):
         """
@@ -129,33 +95,44 @@ class KangxiConverter:
         :param file_path: 文件路径
         """
         print(f"正在加载简繁体数据: {file_path}")
-        count = 0
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    parts = line.split('\t')
-                    if len(parts) >= 3:
-                        unicode_str = parts[0]
-                        field_type = parts[1]
-                        
-                        # 只处理 kSimplifiedVariant 字段（简体字变体）
-                        if field_type == 'kSimplifiedVariant':
-                            # 简体字可能有多个，取第一个
-                            simplified_unicode = parts[2].split()[0]
-                            self.unihan_simplified[unicode_str] = simplified_unicode
-                            count += 1
-            
-            print(f"  加载了 {count} 个汉字的简繁体对应关系")
-        except FileNotFoundError:
+        self._load_unihan_file(file_path)
+    
+    def _load_unihan_file(self, file_path: str):
+        """不经缓存读取单个 Unihan 文件"""
+        if not Path(file_path).exists():
             print(f"  警告: 文件不存在 - {file_path}")
+            return
+        try:
+            self._apply_unihan_fields(read_unihan([file_path]))
         except Exception as e:
             print(f"  错误: 加载失败 - {e}")
     
+    def _apply_unihan_fields(self, fields: Dict[str, Dict[str, str]]):
+        """
+        按转换规则从字段原始值生成查询表
+        笔画、拼音、变体均可能有多个值，取第一个；拼音转为小写
+        """
+        for unicode_str, value in fields.get('kTotalStrokes', {}).items():
+            try:
+                self.unihan_strokes[unicode_str] = int(value.split()[0])
+            except (ValueError, IndexError):
+                pass
+        for unicode_str, value in fields.get('kMandarin', {}).items():
+            if value:
+                self.unihan_pinyin[unicode_str] = value.split()[0].lower()
+        for unicode_str, value in fields.get('kSimplifiedVariant', {}).items():
+            if value:
+                self.unihan_simplified[unicode_str] = value.split()[0]
+        for unicode_str, value in fields.get('kTraditionalVariant', {}).items():
+            if value:
+                self.unihan_traditional[unicode_str] = value.split()[0]
+        for field, values in fields.items():
+            if field.startswith('kIRG_'):
+                self.unihan_irg_sources.setdefault(field, {}).update(values)
+        
+        print(f"  笔画 {len(self.unihan_strokes)} 个，拼音 {len(self.unihan_pinyin)} 个，"
+              f"简繁对应 {len(self.unihan_simplified)} 个，IRG来源字段 {len(self.unihan_irg_sources)} 个")
+    
     def load_kangxi_excel(self, file_path: str) -> List[str]:
         """
         加载康熙字典.xls文件的第一列汉字（或从.txt文件读取）
@@ -333,7 +310,8 @@ class KangxiConverter:
         }
     
     def convert_all(self, kangxi_excel: str, irg_sources: str, 
-                   readings: str, variants: str, output_json: str):
+                   readings: str, variants: str, output_json: str,
+                   cache_path: Optional[str] = None):
         """
         执行完整的转换流程
         :param kangxi_excel: 康熙字典Excel文件路径
@@ -341,6 +319,7 @@ class KangxiConverter:
         :param readings: Unihan_Readings.txt 路径
         :param variants: Unihan_Variants.txt 路径
         :param output_json: 输出的JSON文件路径
+        :param cache_path: Unihan 解析缓存路径（默认 Unihan 目录下的 unihan_cache.pickle）
         """
         print("=" * 60)
         print("康熙字典数据转换工具")
@@ -348,9 +327,7 @@ class KangxiConverter:
         
         # 1. 加载 Unihan 数据
         print("\n步骤 1: 加载 Unihan 数据库")
-        self.load_unihan_strokes(irg_sources)
-        self.load_unihan_readings(readings)
-        self.load_unihan_variants(variants)
+        self.load_unihan(irg_sources, readings, variants, cache_path)
         
         # 2. 加载康熙字典汉字列表
         print("\n步骤 2: 加载康熙字典汉字列表")
@@ -574,228 +551,157 @@ def convert_xls_to_txt():
         return 1
 
 
+# lunar.sql 中每行值的顺序对应的字段
+LUNAR_SQL_FIELDS = [
+    'gregorian_date',      # 公历时间
+    'lunar_date',          # 农历时间（YYYY-MM-DD格式）
+    'lunar_show',          # 显示农历的日名称
+    'is_holiday',          # 是否节假日
+    'lunar_festival',      # 农历节日
+    'gregorian_festival',  # 公历节日
+    'yi',                  # 宜
+    'ji',                  # 忌
+    'shen_wei',            # 诸神位置
+    'tai_shen',            # 胎神位置
+    'chong',               # 冲煞
+    'sui_sha',             # 岁煞
+    'wuxing_jiazi',        # 甲子五行
+    'wuxing_year',         # 纳音五行年
+    'wuxing_month',        # 纳音五行月
+    'wuxing_day',          # 纳音五行日
+    'moon_phase',          # 月相
+    'star_east',           # 二十八星宿
+    'star_west',           # 星座
+    'peng_zu',             # 彭祖百忌
+    'jian_shen',           # 十二神-执位
+    'year_ganzhi',         # 天干地支年
+    'month_ganzhi',        # 天干地支月
+    'day_ganzhi',          # 天干地支日
+    'lunar_month_name',    # 农历月代名词
+    'zodiac',              # 生肖
+    'lunar_month',         # 农历月
+    'lunar_day',           # 农历日
+    'solar_term',          # 节气
+]
+
+
 class LunarConverter:
     """万年历数据转换器"""
     
-    def convert_lunar_sql_to_json(self, sql_path: str, output_json: str):
+    def convert_lunar_sql_to_json(self, sql_path: str, output_json: str,
+                                  workers: int = 1, db_path: Optional[str] = None):
         """
         将 lunar.sql 转换为 wannianli.json
+        解析结果逐条写入 JSON 文件（不在内存中保留全部记录）；指定 db_path 时同时导入其 wannianli 表
         :param sql_path: lunar.sql 文件路径
         :param output_json: 输出的 JSON 文件路径
+        :param workers: 大于 1 时按字节范围切分文件，多进程解析
+        :param db_path: 可选，同时导入的数据库路径
         """
         print("=" * 60)
         print("万年历数据转换工具")
         print("=" * 60)
         print(f"输入: {sql_path}")
         print(f"输出: {output_json}")
+        if db_path:
+            print(f"数据库: {db_path}")
         
         if not Path(sql_path).exists():
             print(f"\n✗ 错误: 文件不存在 - {sql_path}")
             return False
         
-        print("\n正在解析 SQL 文件...")
+        print(f"\n正在解析 SQL 文件（{workers} 个进程）...")
         
-        records = []
+        # 创建输出目录；先写临时文件，全部解析成功后才替换原有的 JSON（解析中途出错时保留原文件）
+        Path(output_json).parent.mkdir(parents=True, exist_ok=True)
+        temp_json = f"{output_json}.tmp"
+        writer = JsonResultWriter(temp_json, header={
+            "version": "1.0",
+            "description": "万年历数据（1970-2100）",
+            "source": "lunar.sql"
+        }, items_key='data', flush_every=10000)
         
-        try:
-            with open(sql_path, 'r', encoding='utf-8') as f:
-                line_count = 0
-                for line in f:
-                    line_count += 1
-                    
-                    # 跳过注释和空行
-                    line_stripped = line.strip()
-                    if not line_stripped or line_stripped.startswith('--') or line_stripped.startswith('/*') or line_stripped.startswith('SET') or line_stripped.startswith('DROP') or line_stripped.startswith('CREATE'):
-                        continue
-                    
-                    # 检查是否是 INSERT 语句
-                    if not line_stripped.upper().startswith('INSERT INTO'):
-                        continue
-                    
-                    # 找到 VALUES 后的括号
-                    values_start = line.find('VALUES (')
-                    if values_start == -1:
-                        values_start = line.find('VALUES(')
-                        if values_start == -1:
-                            continue
-                        values_start += 7  # len('VALUES(')
-                    else:
-                        values_start += 8  # len('VALUES (')
-                    
-                    # 找到最后的分号前的右括号
-                    values_end = line.rfind(');')
-                    if values_end == -1:
-                        continue
-                    
-                    # 提取值部分
-                    values_str = line[values_start:values_end]
-                    
-                    # 解析值（处理引号和逗号）
-                    values = self._parse_sql_values(values_str)
-                    
-                    if len(values) >= 29:  # 确保有足够的字段
-                            record = {
-                                'gregorian_date': values[0],  # 公历时间
-                                'lunar_date': values[1],      # 农历时间（YYYY-MM-DD格式）
-                                'lunar_show': values[2],       # 显示农历的日名称
-                                'is_holiday': values[3] == '1',  # 是否节假日
-                                'lunar_festival': values[4],   # 农历节日
-                                'gregorian_festival': values[5],  # 公历节日
-                                'yi': values[6],              # 宜
-                                'ji': values[7],              # 忌
-                                'shen_wei': values[8],        # 诸神位置
-                                'tai_shen': values[9],        # 胎神位置
-                                'chong': values[10],          # 冲煞
-                                'sui_sha': values[11],        # 岁煞
-                                'wuxing_jiazi': values[12],   # 甲子五行
-                                'wuxing_year': values[13],    # 纳音五行年
-                                'wuxing_month': values[14],   # 纳音五行月
-                                'wuxing_day': values[15],     # 纳音五行日
-                                'moon_phase': values[16],     # 月相
-                                'star_east': values[17],      # 二十八星宿
-                                'star_west': values[18],      # 星座
-                                'peng_zu': values[19],        # 彭祖百忌
-                                'jian_shen': values[20],      # 十二神-执位
-                                'year_ganzhi': values[21],    # 天干地支年
-                                'month_ganzhi': values[22],   # 天干地支月
-                                'day_ganzhi': values[23],     # 天干地支日
-                                'lunar_month_name': values[24],  # 农历月代名词
-                                'zodiac': values[25],         # 生肖
-                                'lunar_month': values[26],    # 农历月
-                                'lunar_day': values[27],      # 农历日
-                                'solar_term': values[28] if len(values) > 28 else '',  # 节气
-                            }
-                            records.append(record)
-                    
-                    # 每10000行显示进度
-                    if line_count % 10000 == 0:
-                        print(f"  已处理: {line_count} 行，解析出: {len(records)} 条记录")
-            
-            print(f"\n✓ 解析完成")
-            print(f"  总行数: {line_count}")
-            print(f"  有效记录数: {len(records)}")
-            
-            if records:
-                # 显示日期范围
-                first_date = records[0]['gregorian_date']
-                last_date = records[-1]['gregorian_date']
-                print(f"  日期范围: {first_date} 至 {last_date}")
+        stats = {'rows': 0, 'records': 0, 'first': None, 'last': None}
+        
+        def records():
+            """解析出的记录，边产出边写入 JSON"""
+            for values in iter_dump_rows_parallel(sql_path, workers):
+                stats['rows'] += 1
+                if len(values) < 29:  # 确保有足够的字段
+                    continue
+                record = dict(zip(LUNAR_SQL_FIELDS, values))
+                record['is_holiday'] = values[3] == '1'
+                writer.write(record)
                 
-                # 显示示例记录
-                print(f"\n示例记录（第1条）:")
-                sample = records[0]
-                print(f"  公历: {sample['gregorian_date']}")
-                print(f"  农历: {sample['lunar_date']} ({sample['lunar_month']}{sample['lunar_day']})")
-                print(f"  干支: {sample['year_ganzhi']}年 {sample['month_ganzhi']}月 {sample['day_ganzhi']}日")
-                print(f"  生肖: {sample['zodiac']}")
-                if sample['solar_term']:
-                    print(f"  节气: {sample['solar_term']}")
-                if sample['gregorian_festival']:
-                    print(f"  节日: {sample['gregorian_festival']}")
+                stats['records'] += 1
+                stats['last'] = record
+                if stats['first'] is None:
+                    stats['first'] = record
+                if stats['records'] % 10000 == 0:
+                    print(f"  已解析: {stats['records']} 条记录")
+                yield record
+        
+        try:
+            import_result = None
+            if db_path:
+                from modules.loader import DataLoader
+                import_result = DataLoader(db_path).import_records('wannianli', records())
+            else:
+                for _ in records():
+                    pass
             
-            # 保存为 JSON
-            print(f"\n正在保存到 {output_json}...")
-            output_data = {
-                "version": "1.0",
-                "description": "万年历数据（1970-2100）",
-                "source": "lunar.sql",
+            first, last = stats['first'], stats['last']
+            writer.close({
                 "date_range": {
-                    "start": records[0]['gregorian_date'] if records else "",
-                    "end": records[-1]['gregorian_date'] if records else ""
+                    "start": first['gregorian_date'] if first else "",
+                    "end": last['gregorian_date'] if last else ""
                 },
-                "total_records": len(records),
-                "data": records
-            }
+                "total_records": stats['records']
+            })
             
-            # 创建输出目录
-            Path(output_json).parent.mkdir(parents=True, exist_ok=True)
+            # 导入失败时记录可能未读完（例如解析出错），不能用不完整的文件覆盖原有的 JSON
+            if import_result is not None and not import_result['success']:
+                Path(temp_json).unlink(missing_ok=True)
+                print(f"✗ 导入数据库失败: {import_result.get('error') or import_result['validation']['error_counts']}")
+                print(f"  未修改 {output_json}")
+                return False
+            os.replace(temp_json, output_json)
             
-            with open(output_json, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
+            print(f"\n✓ 解析完成")
+            print(f"  数据行数: {stats['rows']}")
+            print(f"  有效记录数: {stats['records']}")
             
-            print(f"✓ 成功保存 {len(records)} 条记录")
+            if first:
+                print(f"  日期范围: {first['gregorian_date']} 至 {last['gregorian_date']}")
+                
+                # 显示示例记录
+                print(f"\n示例记录（第1条）:")
+                print(f"  公历: {first['gregorian_date']}")
+                print(f"  农历: {first['lunar_date']} ({first['lunar_month']}{first['lunar_day']})")
+                print(f"  干支: {first['year_ganzhi']}年 {first['month_ganzhi']}月 {first['day_ganzhi']}日")
+                print(f"  生肖: {first['zodiac']}")
+                if first['solar_term']:
+                    print(f"  节气: {first['solar_term']}")
+                if first['gregorian_festival']:
+                    print(f"  节日: {first['gregorian_festival']}")
+            
+            print(f"✓ 成功保存 {stats['records']} 条记录到 {output_json}")
+            
+            if import_result is not None:
+                changes = import_result['changes']
+                print(f"✓ 已导入数据库: 新增 {changes['inserted']}, 修改 {changes['updated']}, "
+                      f"删除 {changes['deleted']}, 未变 {changes['unchanged']}")
             
             return True
             
         except Exception as e:
+            writer.close()
+            Path(temp_json).unlink(missing_ok=True)
             print(f"\n✗ 转换失败: {e}")
+            print(f"  未修改 {output_json}")
             import traceback
             traceback.print_exc()
             return False
-    
-    def _parse_sql_values(self, values_str: str) -> List[str]:
-        """
-        解析 SQL VALUES 子句中的值
-        :param values_str: VALUES 中的字符串（不含括号）
-        :return: 值列表
-        """
-        values = []
-        current_value = ""
-        in_quotes = False
-        quote_char = None
-        i = 0
-        
-        while i < len(values_str):
-            char = values_str[i]
-            
-            if not in_quotes:
-                if char in ("'", '"'):
-                    # 开始引号
-                    in_quotes = True
-                    quote_char = char
-                    i += 1
-                elif char == ',' and current_value.strip():
-                    # 字段分隔符（确保有内容才分隔）
-                    values.append(current_value.strip())
-                    current_value = ""
-                    i += 1
-                elif char == ',' and not current_value.strip():
-                    # 空字段
-                    values.append("")
-                    i += 1
-                elif char == ' ' and not current_value:
-                    # 跳过前导空格
-                    i += 1
-                else:
-                    # 普通字符（NULL等）
-                    current_value += char
-                    i += 1
-            else:
-                if char == quote_char:
-                    # 检查是否是转义的引号
-                    if i + 1 < len(values_str) and values_str[i + 1] == quote_char:
-                        # 转义的引号，添加一个引号
-                        current_value += quote_char
-                        i += 2
-                    else:
-                        # 结束引号
-                        in_quotes = False
-                        quote_char = None
-                        i += 1
-                elif char == '\\' and i + 1 < len(values_str):
-                    # 转义字符
-                    next_char = values_str[i + 1]
-                    if next_char == 'n':
-                        current_value += '\n'
-                    elif next_char == 't':
-                        current_value += '\t'
-                    elif next_char == 'r':
-                        current_value += '\r'
-                    elif next_char == '\\':
-                        current_value += '\\'
-                    elif next_char in ("'", '"'):
-                        current_value += next_char
-                    else:
-                        current_value += next_char
-                    i += 2
-                else:
-                    current_value += char
-                    i += 1
-        
-        # 添加最后一个值
-        values.append(current_value.strip())
-        
-        return values
 
 
 def test_single_character():
@@ -812,13 +718,8 @@ def test_single_character():
     
     converter = KangxiConverter()
     
-    # 加载必要数据
-    if irg_sources.exists():
-        converter.load_unihan_strokes(str(irg_sources))
-    if readings.exists():
-        converter.load_unihan_readings(str(readings))
-    if variants.exists():
-        converter.load_unihan_variants(str(variants))
+    # 加载必要数据（缺失的文件会被跳过）
+    converter.load_unihan(str(irg_sources), str(readings), str(variants))
     
     # 测试几个常见汉字
     test_chars = ["劉", "张", "王", "李", "陳"]
@@ -839,6 +740,12 @@ def convert_lunar_sql():
     """转换万年历 SQL 文件为 JSON"""
     base_dir = Path(__file__).parent
     
+    parser = argparse.ArgumentParser(prog='convert_tools.py --convert-lunar')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='并行解析的进程数（默认取 CPU 核数，最多4）')
+    parser.add_argument('--db', metavar='PATH', help='同时导入该数据库的 wannianli 表')
+    args = parser.parse_args(sys.argv[2:])
+    
     sql_path = base_dir / "predata" / "lunar.sql"
     output_json = base_dir / "data" / "wannianli.json"
     
@@ -847,11 +754,55 @@ def convert_lunar_sql():
         return 1
     
     converter = LunarConverter()
-    success = converter.convert_lunar_sql_to_json(str(sql_path), str(output_json))
+    success = converter.convert_lunar_sql_to_json(str(sql_path), str(output_json),
+                                                  workers=args.workers, db_path=args.db)
     
     return 0 if success else 1
 
 
+# 万年历记录字段 -> ch_calendar.xls 列（None 表示 Excel 中没有此字段），顺序即输出顺序
+CALENDAR_EXCEL_COLUMNS = [
+    ('gregorian_date', None),
+    ('lunar_date', None),           # 由 time_str 转换为数字格式
+    ('lunar_show', 'time_str'),
+    ('is_holiday', None),
+    ('lunar_festival', 'festival'),
+    ('gregorian_festival', 'o_festival'),
+    ('yi', None),
+    ('ji', None),
+    ('shen_wei', None),             # 由各神位列拼接
+    ('tai_shen', None),
+    ('chong', 'chong'),
+    ('sui_sha', 'sha'),
+    ('wuxing_jiazi', None),
+    ('wuxing_year', 'year_ny'),
+    ('wuxing_month', 'month_ny'),
+    ('wuxing_day', 'day_ny'),
+    ('moon_phase', None),
+    ('star_east', 'xingxiu'),
+    ('star_west', None),
+    ('peng_zu', 'pengzu'),
+    ('jian_shen', None),
+    ('year_ganzhi', 'year_gz'),
+    ('month_ganzhi', 'month_gz'),
+    ('day_ganzhi', 'day_gz'),
+    ('lunar_month_name', None),
+    ('zodiac', 'year_sx'),
+    ('lunar_month', None),
+    ('lunar_day', None),
+    ('solar_term', 'jieqi'),
+]
+
+# shen_wei 字段的组成：(标签, Excel 列)
+SHEN_WEI_COLUMNS = [
+    ('喜神：', 'xi_desc'),
+    ('福神：', 'fu_desc'),
+    ('财神：', 'cai_desc'),
+    ('阳贵：', 'yanggui_desc'),
+    ('阴贵：', 'yingui_desc'),
+]
+
+
 class CalendarMerger:
     """万年历数据合并器"""
     
@@ -936,6 +887,13 @@ class CalendarMerger:
         
         return '01'  # 默认值
     
+    def _month_number(self, text: str) -> str:
+        """按月份映射表顺序查找第一个出现的月份名称，未找到时为 '01'"""
+        for month_cn, month_digit in self.month_map.items():
+            if month_cn in text:
+                return month_digit
+        return '01'
+    
     def convert_lunar_date_to_numeric(self, lunar_str: str, gregorian_date: str) -> str:
         """
         将中文农历日期转换为数字格式
@@ -961,11 +919,7 @@ class CalendarMerger:
             year_num = self._convert_chinese_number(year_cn)
             
             # 2. 提取月份
-            month_num = '01'
-            for month_cn, month_digit in self.month_map.items():
-                if month_cn in lunar_str:
-                    month_num = month_digit
-                    break
+            month_num = self._month_number(lunar_str)
             
             # 3. 提取日期（月份之后的部分）
             day_match = re.search(r'月(.+)$', lunar_str)
@@ -983,6 +937,94 @@ class CalendarMerger:
             print(f"  警告: 转换农历日期失败 '{lunar_str}': {e}")
             return ''
     
+    def lunar_dates_to_numeric(self, lunar: 'pd.Series') -> 'pd.Series':
+        """
+        按列将中文农历日期转换为数字格式（与 convert_lunar_date_to_numeric 结果一致）
+        年、月、日各部分先用正则按列提取，再通过由唯一值构建的查找表映射，不逐行调用转换函数
+        :param lunar: 中文农历列，如 "二〇二四年正月初一"，空值转换为 ''
+        """
+        text = lunar.where(lunar.notna(), '').astype(str)
+        year_cn = text.str.extract(r'^([\u4e00-\u9fff〇]+)年', expand=False)
+        month_cn = text.str.extract(r'^(.*?月)', expand=False)
+        day_cn = text.str.extract(r'月(.+)$', expand=False).str.strip()
+        
+        years = {v: self._convert_chinese_number(v) for v in year_cn.dropna().unique()}
+        months = {v: self._month_number(v) for v in month_cn.dropna().unique()}
+        days = {v: self._parse_lunar_day(v) for v in day_cn.dropna().unique()}
+        
+        numeric = (year_cn.map(years) + '-' + month_cn.map(months).fillna('01') + '-'
+                   + day_cn.map(days).fillna('01'))
+        return numeric.where(year_cn.notna(), '')
+    
+    @staticmethod
+    def _text_column(df: 'pd.DataFrame', column: str) -> 'pd.Series':
+        """取 Excel 列的字符串形式，缺失的列或空值为 ''"""
+        if column not in df.columns:
+            return pd.Series('', index=df.index, dtype=object)
+        values = df[column]
+        return values.astype(object).where(values.notna(), '').astype(str)
+    
+    def calendar_frame(self, df: 'pd.DataFrame') -> 'pd.DataFrame':
+        """
+        将 ch_calendar.xls 的行按列转换为万年历记录（列顺序与 CALENDAR_EXCEL_COLUMNS 一致）
+        :param df: 含 id(YYYYMMDD) 及各数据列的 DataFrame
+        """
+        ids = df['id'].astype(str)
+        columns = {'gregorian_date': ids.str[:4] + '-' + ids.str[4:6] + '-' + ids.str[6:8]}
+        
+        if 'time_str' in df.columns:
+            columns['lunar_date'] = self.lunar_dates_to_numeric(df['time_str'])
+        
+        shen_wei = pd.Series('', index=df.index, dtype=object)
+        for label, column in SHEN_WEI_COLUMNS:
+            if column not in df.columns:
+                continue
+            present = df[column].notna()
+            separator = pd.Series('', index=df.index, dtype=object).mask(present & (shen_wei != ''), ' ')
+            part = (label + self._text_column(df, column)).where(present, '')
+            shen_wei = shen_wei + separator + part
+        columns['shen_wei'] = shen_wei
+        
+        frame = pd.DataFrame(index=df.index)
+        for field, column in CALENDAR_EXCEL_COLUMNS:
+            if field in columns:
+                frame[field] = columns[field]
+            elif field == 'is_holiday':
+                frame[field] = False  # Excel 中没有此字段
+            elif column is None:
+                frame[field] = ''  # Excel 中没有此字段
+            else:
+                frame[field] = self._text_column(df, column)
+        return frame.reset_index(drop=True)
+    
+    @staticmethod
+    def conflict_report(existing: 'pd.DataFrame', new: 'pd.DataFrame') -> Dict:
+        """
+        统计新记录覆盖的已有日期，以及各字段取值不同的日期数
+        :return: {'overlap': 重叠日期数, 'changed': 至少一个字段不同的日期数, 'fields': {字段: 不同的日期数}}
+        """
+        report = {'overlap': 0, 'changed': 0, 'fields': {}}
+        if existing.empty or new.empty:
+            return report
+        
+        fields = [c for c in new.columns if c in existing.columns and c != 'gregorian_date']
+        overlap = new.drop_duplicates('gregorian_date', keep='last').merge(
+            existing.drop_duplicates('gregorian_date', keep='last'),
+            on='gregorian_date', how='inner', suffixes=('_new', '_old')
+        )
+        report['overlap'] = len(overlap)
+        if overlap.empty:
+            return report
+        
+        differs = pd.DataFrame({
+            field: overlap[f'{field}_new'].astype(str) != overlap[f'{field}_old'].fillna('').astype(str)
+            for field in fields
+        })
+        counts = differs.sum()
+        report['fields'] = {field: int(count) for field, count in counts.items() if count}
+        report['changed'] = int(differs.any(axis=1).sum())
+        return report
+    
     def merge_calendar_data(self, excel_path: str, json_path: str, output_path: str = None):
         """
         合并 ch_calendar.xls 和 wannianli.json 数据
@@ -1011,13 +1053,11 @@ class CalendarMerger:
                 json_data = json.load(f)
             
             existing_records = json_data.get('data', [])
+            existing_dates = pd.Series([r['gregorian_date'] for r in existing_records], dtype=object)
             print(f"  已有记录数: {len(existing_records)}")
             
             if existing_records:
-                existing_dates = {record['gregorian_date'] for record in existing_records}
-                first_date = min(existing_dates)
-                last_date = max(existing_dates)
-                print(f"  日期范围: {first_date} 至 {last_date}")
+                print(f"  日期范围: {existing_dates.min()} 至 {existing_dates.max()}")
             
             # 2. 读取 Excel 数据
             print("\n步骤 2: 读取 Excel 数据...")
@@ -1033,94 +1073,29 @@ class CalendarMerger:
             if len(df_filtered) > 0:
                 print(f"  日期范围: {df_filtered['id'].min()} 至 {df_filtered['id'].max()}")
             
-            # 4. 转换 Excel 数据为 JSON 格式
+            # 4. 按列转换 Excel 数据为 JSON 格式
             print("\n步骤 4: 转换数据格式...")
-            new_records = []
-            
-            for idx, row in df_filtered.iterrows():
-                # 格式化日期 YYYYMMDD -> YYYY-MM-DD
-                date_str = str(row['id'])
-                gregorian_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
-                
-                # 转换农历日期为数字格式
-                lunar_date_numeric = ''
-                if pd.notna(row.get('time_str')):
-                    lunar_date_numeric = self.convert_lunar_date_to_numeric(
-                        str(row['time_str']), 
-                        gregorian_date
-                    )
-                
-                # 构建 shen_wei 字段
-                shen_wei_parts = []
-                if pd.notna(row.get('xi_desc')):
-                    shen_wei_parts.append(f"喜神：{row['xi_desc']}")
-                if pd.notna(row.get('fu_desc')):
-                    shen_wei_parts.append(f"福神：{row['fu_desc']}")
-                if pd.notna(row.get('cai_desc')):
-                    shen_wei_parts.append(f"财神：{row['cai_desc']}")
-                if pd.notna(row.get('yanggui_desc')):
-                    shen_wei_parts.append(f"阳贵：{row['yanggui_desc']}")
-                if pd.notna(row.get('yingui_desc')):
-                    shen_wei_parts.append(f"阴贵：{row['yingui_desc']}")
-                
-                shen_wei = " ".join(shen_wei_parts)
-                
-                # 构建记录
-                record = {
-                    'gregorian_date': gregorian_date,
-                    'lunar_date': lunar_date_numeric,  # 转换后的数字格式
-                    'lunar_show': str(row.get('time_str', '')) if pd.notna(row.get('time_str')) else '',
-                    'is_holiday': False,  # Excel 中没有此字段
-                    'lunar_festival': str(row.get('festival', '')) if pd.notna(row.get('festival')) else '',
-                    'gregorian_festival': str(row.get('o_festival', '')) if pd.notna(row.get('o_festival')) else '',
-                    'yi': '',  # Excel 中没有此字段
-                    'ji': '',  # Excel 中没有此字段
-                    'shen_wei': shen_wei,
-                    'tai_shen': '',  # Excel 中没有此字段
-                    'chong': str(row.get('chong', '')) if pd.notna(row.get('chong')) else '',
-                    'sui_sha': str(row.get('sha', '')) if pd.notna(row.get('sha')) else '',
-                    'wuxing_jiazi': '',  # Excel 中没有此字段
-                    'wuxing_year': str(row.get('year_ny', '')) if pd.notna(row.get('year_ny')) else '',
-                    'wuxing_month': str(row.get('month_ny', '')) if pd.notna(row.get('month_ny')) else '',
-                    'wuxing_day': str(row.get('day_ny', '')) if pd.notna(row.get('day_ny')) else '',
-                    'moon_phase': '',  # Excel 中没有此字段
-                    'star_east': str(row.get('xingxiu', '')) if pd.notna(row.get('xingxiu')) else '',
-                    'star_west': '',  # Excel 中没有此字段
-                    'peng_zu': str(row.get('pengzu', '')) if pd.notna(row.get('pengzu')) else '',
-                    'jian_shen': '',  # Excel 中没有此字段
-                    'year_ganzhi': str(row.get('year_gz', '')) if pd.notna(row.get('year_gz')) else '',
-                    'month_ganzhi': str(row.get('month_gz', '')) if pd.notna(row.get('month_gz')) else '',
-                    'day_ganzhi': str(row.get('day_gz', '')) if pd.notna(row.get('day_gz')) else '',
-                    'lunar_month_name': '',  # Excel 中没有此字段
-                    'zodiac': str(row.get('year_sx', '')) if pd.notna(row.get('year_sx')) else '',
-                    'lunar_month': '',  # Excel 中没有此字段
-                    'lunar_day': '',  # Excel 中没有此字段
-                    'solar_term': str(row.get('jieqi', '')) if pd.notna(row.get('jieqi')) else '',
-                }
-                
-                new_records.append(record)
-                
-                # 每1000条显示进度
-                if (idx + 1) % 1000 == 0:
-                    print(f"  已转换: {idx + 1}/{len(df_filtered)}")
+            new = self.calendar_frame(df_filtered)
+            print(f"  转换完成: {len(new)} 条新记录")
             
-            print(f"  转换完成: {len(new_records)} 条新记录")
-            
-            # 5. 合并数据（去重）
+            # 5. 合并数据（同一日期新记录覆盖旧记录）
             print("\n步骤 5: 合并数据...")
-            
-            # 构建现有记录的日期集合
-            existing_dates_set = {record['gregorian_date'] for record in existing_records}
-            
-            # 只添加不存在的新记录，已存在的用新记录替换
-            records_dict = {record['gregorian_date']: record for record in existing_records}
-            for new_record in new_records:
-                records_dict[new_record['gregorian_date']] = new_record  # 新记录覆盖旧记录
-            
-            all_records = list(records_dict.values())
-            
-            # 按日期排序
-            all_records.sort(key=lambda x: x['gregorian_date'])
+            overlapping = existing_dates.isin(new['gregorian_date'])
+            report = self.conflict_report(
+                pd.DataFrame.from_records([existing_records[i] for i in overlapping[overlapping].index]), new
+            )
+            print(f"  覆盖已有日期: {report['overlap']} 个，其中内容不同: {report['changed']} 个")
+            for field, count in sorted(report['fields'].items(), key=lambda x: -x[1]):
+                print(f"    {field}: {count}")
+            
+            # 只对日期列去重排序，已有记录保持原字典不做转换
+            # 按列取 Python 列表再逐行组装，比 DataFrame.to_dict('records') 快数倍
+            fields = list(new.columns)
+            new_records = [dict(zip(fields, values)) for values in zip(*(new[c].tolist() for c in fields))]
+            combined = existing_records + new_records
+            dates = pd.concat([existing_dates, new['gregorian_date']], ignore_index=True)
+            order = dates.drop_duplicates(keep='last').sort_values(kind='stable').index
+            all_records = [combined[i] for i in order]
             
             print(f"  合并后总记录数: {len(all_records)}")
             
@@ -1206,6 +1181,7 @@ def show_help():
     print("  （无参数）            转换康熙字典（默认）")
     print("\n示例:")
     print("  python convert_tools.py --convert-lunar")
+    print("  python convert_tools.py --convert-lunar --workers 4 --db local.db")
     print("  python convert_tools.py --merge-calendar")
     print("  python convert_tools.py --merge-mdb")
     print("  python convert_tools.py --test")
@@ -1310,6 +1286,20 @@ def main():
     return 0
 
 
+# 导入 kangxi_strokes 的列及缺省值（第一列为唯一键）
+KANGXI_EXPORT_COLUMNS = [
+    ('character', ''),
+    ('traditional', ''),
+    ('strokes', 0),
+    ('pinyin', ''),
+    ('radical', ''),
+    ('bs_strokes', 0),
+    ('ch_strokes', 0),
+    ('luck', ''),
+    ('wuxing', ''),
+]
+
+
 class KangxiMdbMerger:
     """康熙字典MDB数据库合并器"""
     
@@ -1420,70 +1410,66 @@ class KangxiMdbMerger:
             return False
         
         try:
-            # 读取现有JSON数据
-            with open(json_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-            
-            existing_records = json_data.get('data', [])
-            print(f"  现有记录数: {len(existing_records)}")
-            
             # 构建MDB数据的查找字典
             mdb_dict = {record['character']: record for record in mdb_data}
             print(f"  MDB记录数: {len(mdb_dict)}")
             
-            # 合并数据
+            # 保存合并后的数据（先写临时文件，输出路径可以与输入相同）
+            output_file = output_path if output_path else json_path
+            temp_file = f"{output_file}.tmp"
+            
+            # 逐条读取现有JSON数据、合并并写出，不整体载入内存
             updated_count = 0
             new_fields_count = 0
+            total_count = 0
+            sample = None
             
-            for record in existing_records:
-                char = record.get('character', '')
-                
-                if char in mdb_dict:
-                    mdb_record = mdb_dict[char]
-                    
-                    # 覆盖字段：strokes, radical
-                    if mdb_record['strokes'] > 0:
-                        record['strokes'] = mdb_record['strokes']
-                    if mdb_record['radical']:
-                        record['radical'] = mdb_record['radical']
+            writer = JsonResultWriter(temp_file, header={
+                "version": "2.0",
+                "description": "康熙字典笔画数据（含五行、吉凶）",
+                "source": "Unihan + 康熙字典.mdb"
+            }, items_key='data')
+            try:
+                for record in iter_json_array(json_path, 'data'):
+                    total_count += 1
+                    char = record.get('character', '')
                     
-                    # 添加新字段
-                    record['bs_strokes'] = mdb_record['bs_strokes']
-                    record['ch_strokes'] = mdb_record['ch_strokes']
-                    record['luck'] = mdb_record['luck']
-                    record['wuxing'] = mdb_record['wuxing']
+                    if char in mdb_dict:
+                        mdb_record = mdb_dict[char]
+                        
+                        # 覆盖字段：strokes, radical
+                        if mdb_record['strokes'] > 0:
+                            record['strokes'] = mdb_record['strokes']
+                        if mdb_record['radical']:
+                            record['radical'] = mdb_record['radical']
+                        
+                        # 添加新字段
+                        record['bs_strokes'] = mdb_record['bs_strokes']
+                        record['ch_strokes'] = mdb_record['ch_strokes']
+                        record['luck'] = mdb_record['luck']
+                        record['wuxing'] = mdb_record['wuxing']
+                        
+                        updated_count += 1
+                        new_fields_count += 1
+                        if sample is None:
+                            sample = record
                     
-                    updated_count += 1
-                    new_fields_count += 1
+                    writer.write(record)
+            finally:
+                writer.close({"total_records": total_count})
+            os.replace(temp_file, output_file)
             
+            print(f"  现有记录数: {total_count}")
             print(f"  更新记录数: {updated_count}")
             print(f"  添加新字段记录数: {new_fields_count}")
-            
-            # 保存合并后的数据
-            output_file = output_path if output_path else json_path
-            
-            output_data = {
-                "version": "2.0",
-                "description": "康熙字典笔画数据（含五行、吉凶）",
-                "source": "Unihan + 康熙字典.mdb",
-                "total_records": len(existing_records),
-                "data": existing_records
-            }
-            
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
-            
             print(f"\n✓ 成功保存到: {output_file}")
             
             # 显示示例
-            if updated_count > 0:
+            if sample is not None:
                 print("\n示例记录:")
-                for record in existing_records[:3]:
-                    if 'wuxing' in record:
-                        print(f"  {record['character']}: 笔画={record['strokes']}, "
-                              f"部首={record['radical']}, 五行={record['wuxing']}, "
-                              f"吉凶={record['luck']}")
-                        break
+                print(f"  {sample['character']}: 笔画={sample['strokes']}, "
+                      f"部首={sample['radical']}, 五行={sample['wuxing']}, "
+                      f"吉凶={sample['luck']}")
             
             return True
             
@@ -1498,6 +1484,7 @@ class KangxiMdbMerger:
         将kangxi.json数据导入到数据库
         :param json_path: kangxi.json路径
         :param db_path: 数据库路径
+        :return: 成功时为 {'total', 'inserted', 'updated', 'unchanged'} 条数，失败时为 False
         """
         print(f"\n正在导入数据到数据库: {db_path}")
         
@@ -1505,15 +1492,11 @@ class KangxiMdbMerger:
             print(f"\n✗ 错误: JSON文件不存在 - {json_path}")
             return False
         
+        import sqlite3
+        conn = None
         try:
-            import sqlite3
-            
-            # 读取JSON数据
-            with open(json_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-            
-            records = json_data.get('data', [])
-            print(f"  待导入记录数: {len(records)}")
+            # 流式读取JSON数据
+            records = iter_json_array(json_path, 'data')
             
             # 连接数据库
             conn = sqlite3.connect(db_path)
@@ -1538,51 +1521,89 @@ class KangxiMdbMerger:
             except Exception as e:
                 print(f"  警告: 更新表结构失败 - {e}")
             
-            # 插入数据
-            inserted_count = 0
-            updated_count = 0
+            # 1. 逐批写入临时表（同一字符重复时以最后一条为准）
+            cursor.execute(f"""
+                CREATE TEMP TABLE kangxi_import (
+                    character TEXT PRIMARY KEY,
+                    {', '.join(c for c, _ in KANGXI_EXPORT_COLUMNS[1:])}
+                )
+            """)
+            placeholders = ', '.join('?' * len(KANGXI_EXPORT_COLUMNS))
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO temp.kangxi_import VALUES ({placeholders})",
+                (tuple(record.get(c, default) for c, default in KANGXI_EXPORT_COLUMNS) for record in records)
+            )
             
-            for record in records:
-                try:
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO kangxi_strokes 
-                        (character, traditional, strokes, pinyin, radical, 
-                         bs_strokes, ch_strokes, luck, wuxing)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        record.get('character', ''),
-                        record.get('traditional', ''),
-                        record.get('strokes', 0),
-                        record.get('pinyin', ''),
-                        record.get('radical', ''),
-                        record.get('bs_strokes', 0),
-                        record.get('ch_strokes', 0),
-                        record.get('luck', ''),
-                        record.get('wuxing', '')
-                    ))
-                    
-                    if cursor.rowcount > 0:
-                        inserted_count += 1
-                    else:
-                        updated_count += 1
-                        
-                except Exception as e:
-                    print(f"  警告: 插入记录失败 {record.get('character', '')}: {e}")
+            # 2. 由 SQL 统计新增/修改/未变条数
+            columns = [c for c, _ in KANGXI_EXPORT_COLUMNS]
+            
+            def changed(old: str, new: str) -> str:
+                return ' OR '.join(f"{old}.{c} IS NOT {new}.{c}" for c in columns[1:])
+            
+            cursor.execute(f"""
+                SELECT COUNT(*),
+                       SUM(k.character IS NULL),
+                       SUM(k.character IS NOT NULL AND ({changed('k', 'i')}))
+                FROM temp.kangxi_import i
+                LEFT JOIN kangxi_strokes k ON k.character = i.character
+            """)
+            total, inserted_count, updated_count = (v or 0 for v in cursor.fetchone())
+            
+            # 3. 一条语句写入：新字符插入，内容有变化的字符原地更新（保留 id 与 created_at）
+            before = conn.total_changes
+            cursor.execute(f"""
+                INSERT INTO kangxi_strokes ({', '.join(columns)})
+                SELECT {', '.join(columns)} FROM temp.kangxi_import WHERE true
+                ON CONFLICT(character) DO UPDATE SET
+                    {', '.join(f"{c} = excluded.{c}" for c in columns[1:])}
+                WHERE {changed('kangxi_strokes', 'excluded')}
+            """)
+            written = conn.total_changes - before
+            if written != inserted_count + updated_count:
+                print(f"  警告: 实际写入 {written} 条，与统计的 {inserted_count + updated_count} 条不一致")
+            
+            if written:
+                self._invalidate_db_metadata(cursor)
+            cursor.execute("DROP TABLE temp.kangxi_import")
             
             conn.commit()
-            conn.close()
             
+            unchanged_count = total - inserted_count - updated_count
+            print(f"  导入记录数: {total}")
             print(f"  插入: {inserted_count} 条")
             print(f"  更新: {updated_count} 条")
+            print(f"  未变: {unchanged_count} 条")
             print(f"\n✓ 数据导入完成")
             
-            return True
+            return {'total': total, 'inserted': inserted_count, 'updated': updated_count,
+                    'unchanged': unchanged_count}
             
         except Exception as e:
             print(f"\n✗ 导入失败: {e}")
             import traceback
             traceback.print_exc()
             return False
+        finally:
+            # 出错时未提交的事务随连接关闭回滚
+            if conn is not None:
+                conn.close()
+    
+    @staticmethod
+    def _invalidate_db_metadata(cursor):
+        """
+        绕过 DataLoader 直接修改了字库：修正表统计中的行数，并清除预构建清单
+        （行指纹不需要处理，加载器下次导入时会按差异重新写入）
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('table_stats', 'db_manifest')")
+        tables = {row[0] for row in cursor.fetchall()}
+        if 'table_stats' in tables:
+            cursor.execute("""
+                UPDATE table_stats
+                SET row_count = (SELECT COUNT(*) FROM kangxi_strokes), updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'kangxi_strokes'
+            """)
+        if 'db_manifest' in tables:
+            cursor.execute("DELETE FROM db_manifest")
 
 
 def merge_kangxi_mdb():
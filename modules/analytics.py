@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+统计模块 - 维护历史记录的评分分布聚合表
+
+聚合表在 Storage 写入/删除记录时于同一事务内增量更新，
+查询分布时无需再遍历历史明细。
+"""
+
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 个人版统计维度
+PERSON_DIMENSIONS = {
+    'zodiac': '生肖',
+    'sancai': '三才配置',
+    'score_band': '综合评分分段'
+}
+
+# 公司版统计维度
+COMPANY_DIMENSIONS = {
+    'industry_grade': '行业评级',
+    'company_score_band': '公司综合评分分段'
+}
+
+
+class ScoreAnalytics:
+    """评分分布统计类"""
+
+    def __init__(self, db_path: str = 'local.db'):
+        """初始化统计表，首次创建时从已有历史记录回填"""
+        self.db_path = db_path
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='analytics_histograms'"
+            )
+            existed = cursor.fetchone() is not None
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analytics_histograms (
+                dimension TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                sub_bucket TEXT NOT NULL DEFAULT '',
+                record_count INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, bucket, sub_bucket)
+            )
+            ''')
+
+            if not existed:
+                self._rebuild(cursor)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"统计表初始化失败: {e}")
+            raise
+        finally:
+            conn.close()
+
+    def apply_person(self, cursor, record_id: int, sign: int = 1):
+        """
+        将一条个人版记录计入（sign=1）或移出（sign=-1）统计
+        需在写入/删除明细的同一事务中调用，且此时明细行必须存在
+        """
+        cursor.execute('''
+        SELECT t.comprehensive_score,
+               (SELECT shengxiao FROM shengxiao_results WHERE record_id = t.id LIMIT 1),
+               (SELECT sancai FROM wuge_results WHERE record_id = t.id LIMIT 1)
+        FROM test_records t WHERE t.id = ?
+        ''', (record_id,))
+        row = cursor.fetchone()
+        if not row:
+            return
+
+        score, zodiac, sancai = row
+        score = score or 0
+        self._bump(cursor, 'zodiac', zodiac or '未知', '', sign, score)
+        self._bump(cursor, 'sancai', sancai or '未知', '', sign, score)
+        self._bump(cursor, 'score_band', _score_band(score), '', sign, score)
+
+    def apply_company(self, cursor, record_id: int, sign: int = 1):
+        """将一条公司版记录（主记录 + 评分）计入或移出统计"""
+        cursor.execute('''
+        SELECT COALESCE(NULLIF(t.industry_type, ''), NULLIF(t.industry_code, ''), '未知'),
+               s.total_score, s.grade
+        FROM company_test_records t
+        JOIN company_scores s ON s.record_id = t.id
+        WHERE t.id = ?
+        ''', (record_id,))
+        row = cursor.fetchone()
+        if not row:
+            return
+
+        industry, score, grade = row
+        score = score or 0
+        self._bump(cursor, 'industry_grade', industry, grade or '-', sign, score)
+        self._bump(cursor, 'company_score_band', _score_band(score), '', sign, score)
+
+    def reset(self, cursor, dimensions: Dict[str, str]):
+        """清空指定维度的统计（配合清空历史记录使用）"""
+        cursor.executemany(
+            'DELETE FROM analytics_histograms WHERE dimension = ?',
+            [(d,) for d in dimensions]
+        )
+
+    def rebuild(self) -> bool:
+        """从历史明细全量重建统计表"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            self._rebuild(cursor)
+            conn.commit()
+            logger.info("统计表重建完成")
+            return True
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"统计表重建失败: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def summary(self, dimensions: Optional[Dict[str, str]] = None) -> Dict[str, List[Dict]]:
+        """
+        查询分布统计
+        :param dimensions: 维度字典（默认个人版+公司版全部维度）
+        :return: {维度: [{'bucket', 'sub_bucket', 'count', 'avg_score'}, ...]}
+        """
+        if dimensions is None:
+            dimensions = {**PERSON_DIMENSIONS, **COMPANY_DIMENSIONS}
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            result = {}
+            for dimension in dimensions:
+                cursor.execute('''
+                SELECT bucket, sub_bucket, record_count, score_sum
+                FROM analytics_histograms
+                WHERE dimension = ? AND record_count > 0
+                ORDER BY record_count DESC, bucket, sub_bucket
+                ''', (dimension,))
+                result[dimension] = [
+                    {
+                        'bucket': row[0],
+                        'sub_bucket': row[1],
+                        'count': row[2],
+                        'avg_score': round(row[3] / row[2], 1)
+                    }
+                    for row in cursor.fetchall()
+                ]
+            return result
+        except Exception as e:
+            logger.error(f"查询统计失败: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def _bump(self, cursor, dimension: str, bucket: str, sub_bucket: str,
+              sign: int, score: float):
+        """增量更新单个分桶"""
+        cursor.execute('''
+        INSERT INTO analytics_histograms (dimension, bucket, sub_bucket, record_count, score_sum)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(dimension, bucket, sub_bucket) DO UPDATE SET
+            record_count = record_count + excluded.record_count,
+            score_sum = score_sum + excluded.score_sum
+        ''', (dimension, bucket, sub_bucket, sign, sign * score))
+
+    def _rebuild(self, cursor):
+        """用聚合查询重建所有维度"""
+        cursor.execute('DELETE FROM analytics_histograms')
+
+        tables = {
+            row[0] for row in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table'"
+            )
+        }
+
+        if {'test_records', 'shengxiao_results', 'wuge_results'} <= tables:
+            cursor.execute('''
+            INSERT INTO analytics_histograms (dimension, bucket, sub_bucket, record_count, score_sum)
+            SELECT 'zodiac', COALESCE(sx.shengxiao, '未知'), '', COUNT(*), COALESCE(SUM(t.comprehensive_score), 0)
+            FROM test_records t
+            LEFT JOIN (SELECT record_id, MAX(shengxiao) AS shengxiao
+                       FROM shengxiao_results GROUP BY record_id) sx ON sx.record_id = t.id
+            GROUP BY 2
+            ''')
+            cursor.execute('''
+            INSERT INTO analytics_histograms (dimension, bucket, sub_bucket, record_count, score_sum)
+            SELECT 'sancai', COALESCE(w.sancai, '未知'), '', COUNT(*), COALESCE(SUM(t.comprehensive_score), 0)
+            FROM test_records t
+            LEFT JOIN (SELECT record_id, MAX(sancai) AS sancai
+                       FROM wuge_results GROUP BY record_id) w ON w.record_id = t.id
+            GROUP BY 2
+            ''')
+            cursor.execute('''
+            INSERT INTO analytics_histograms (dimension, bucket, sub_bucket, record_count, score_sum)
+            SELECT 'score_band', band, '', COUNT(*), SUM(score)
+            FROM (SELECT COALESCE(comprehensive_score, 0) AS score,
+                         (COALESCE(comprehensive_score, 0) / 10 * 10) || '-' ||
+                         (COALESCE(comprehensive_score, 0) / 10 * 10 + 9) AS band
+                  FROM test_records)
+            GROUP BY band
+            ''')
+
+        if {'company_test_records', 'company_scores'} <= tables:
+            cursor.execute('''
+            INSERT INTO analytics_histograms (dimension, bucket, sub_bucket, record_count, score_sum)
+            SELECT 'industry_grade',
+                   COALESCE(NULLIF(t.industry_type, ''), NULLIF(t.industry_code, ''), '未知'),
+                   COALESCE(s.grade, '-'), COUNT(*), COALESCE(SUM(s.total_score), 0)
+            FROM company_test_records t
+            JOIN company_scores s ON s.record_id = t.id
+            GROUP BY 2, 3
+            ''')
+            cursor.execute('''
+            INSERT INTO analytics_histograms (dimension, bucket, sub_bucket, record_count, score_sum)
+            SELECT 'company_score_band', band, '', COUNT(*), SUM(score)
+            FROM (SELECT COALESCE(s.total_score, 0) AS score,
+                         (COALESCE(s.total_score, 0) / 10 * 10) || '-' ||
+                         (COALESCE(s.total_score, 0) / 10 * 10 + 9) AS band
+                  FROM company_test_records t
+                  JOIN company_scores s ON s.record_id = t.id)
+            GROUP BY band
+            ''')
+
+
+def _score_band(score) -> str:
+    """评分分段，例如 85 -> '80-89'"""
+    low = int(score) // 10 * 10
+    return f"{low}-{low + 9}"
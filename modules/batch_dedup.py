@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+批量输入去重模块 - 相同输入只计算一次
+
+按规整后的 (姓名, 性别, 出生时间, 经纬度) 计算记录键。处理时缓存最近 DEDUP_CACHE_SIZE 个不同输入的结果（LRU），
+命中时直接复用，不重复计算和保存；内存占用以缓存大小为上限，间隔很远的重复行可能被重新计算。
+"""
+
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+# 与计算时使用的缺省值一致
+DEFAULT_BIRTH_TIME = '12:00'
+DEFAULT_LONGITUDE = 116.4074  # 北京
+DEFAULT_LATITUDE = 39.9042
+
+# 经纬度比较精度（小数位数），0.01 度经度约对应真太阳时 2.4 秒
+COORDINATE_DIGITS = 2
+
+# 缓存结果的不同输入数
+DEDUP_CACHE_SIZE = 10000
+
+
+def record_key(record: Dict) -> bytes:
+    """
+    计算记录键：出生时间按日期时间解析后规整（1990-1-1 8:00 与 1990-01-01 08:00 相同），
+    缺省的时间、经纬度按计算时的缺省值处理
+    """
+    birth = f"{record['birth_date']} {record.get('birth_time', DEFAULT_BIRTH_TIME)}"
+    try:
+        birth = datetime.strptime(birth, '%Y-%m-%d %H:%M').strftime('%Y-%m-%d %H:%M')
+    except ValueError:
+        pass  # 格式错误的保留原文，计算时会报错
+
+    parts = [
+        record['name'],
+        record['gender'],
+        birth,
+        f"{float(record.get('longitude', DEFAULT_LONGITUDE)):.{COORDINATE_DIGITS}f}",
+        f"{float(record.get('latitude', DEFAULT_LATITUDE)):.{COORDINATE_DIGITS}f}",
+    ]
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).digest()
+
+
+class DuplicateIndex:
+    """重复输入索引：按记录键缓存最近计算的结果（LRU），超过上限时淘汰最久未用的结果"""
+
+    def __init__(self, max_size: int = DEDUP_CACHE_SIZE):
+        """
+        :param max_size: 最多缓存的结果数
+        """
+        self.max_size = max(1, int(max_size))
+        self._results: 'OrderedDict[bytes, Dict]' = OrderedDict()
+        self.collapsed = 0
+
+    def take(self, key: bytes) -> Optional[Dict]:
+        """取出相同输入已计算的结果，没有（或已被淘汰）时返回 None"""
+        result = self._results.get(key)
+        if result is None:
+            return None
+        self._results.move_to_end(key)
+        self.collapsed += 1
+        return result
+
+    def store(self, key: bytes, result: Dict):
+        """缓存计算完成的结果，供后续相同输入复用"""
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if len(self._results) > self.max_size:
+            self._results.popitem(last=False)
@@ -6,26 +6,54 @@ Author: Auto Generated
 Date: 2025-12-06
 """
 
-import json
+import time
 import logging
+from itertools import chain
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+from .batch_dedup import (DEFAULT_BIRTH_TIME, DEFAULT_LATITUDE, DEFAULT_LONGITUDE,
+                          DuplicateIndex, record_key)
+from .batch_reader import count_lines, iter_batch_records
+from .checkpoint import CheckpointJournal
+from .progress import ProgressReporter
+from .result_writer import OUTPUT_FORMATS, ResultWriter, open_result_writer
+from .write_behind import WriteBehindQueue
 
 logger = logging.getLogger(__name__)
 
 
+# CSV / SQLite 输出的扁平评分列
+RESULT_COLUMNS = [
+    'name', 'success', 'gender', 'birth_time', 'longitude', 'latitude',
+    'comprehensive_score', 'wuge_score', 'sancai', 'bazi_score', 'bazi_str',
+    'ziyi_score', 'shengxiao', 'shengxiao_score', 'chenggu_weight', 'error'
+]
+
+
 class BatchProcessor:
     """批量处理器"""
     
-    def __init__(self, calculator, storage):
+    def __init__(self, calculator, storage, output_format: str = 'json', checkpoint_every: int = 500,
+                 verbose: bool = False, dedup: bool = False):
         """
         初始化批量处理器
         :param calculator: Calculator 实例
         :param storage: Storage 实例
+        :param output_format: 结果输出格式（json / jsonl / csv / sqlite）
+        :param checkpoint_every: 每处理多少条保存一次检查点（中断后最多重算这么多条）
+        :param verbose: 逐条输出详细结果；默认只显示一行进度
+        :param dedup: 相同输入（姓名、性别、出生时间、经纬度）只计算一次，结果复用到每一行（只缓存最近的 DEDUP_CACHE_SIZE 个结果）
         """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"不支持的输出格式: {output_format}")
         self.calculator = calculator
         self.storage = storage
+        self.output_format = output_format
+        self.checkpoint_every = max(1, int(checkpoint_every))
+        self.verbose = verbose
+        self.dedup = dedup
     
     def _get_kangxi_info(self, name: str) -> List[Dict]:
         """
@@ -75,10 +103,11 @@ class BatchProcessor:
         
         return kangxi_info
     
-    def process_file(self, input_file: str) -> Dict[str, Any]:
+    def process_file(self, input_file: str, resume: bool = False) -> Dict[str, Any]:
         """
         处理输入文件
-        :param input_file: 输入文件路径（支持 .txt, .json, .csv）
+        :param input_file: 输入文件路径（支持 .txt, .json, .jsonl, .csv）
+        :param resume: 从上次中断处继续：跳过已完成的行，并在已有输出文件上续写
         :return: 处理结果字典
         """
         file_path = Path(input_file)
@@ -89,39 +118,72 @@ class BatchProcessor:
                 'error': f'文件不存在: {input_file}'
             }
         
-        # 根据文件扩展名选择解析方法
-        suffix = file_path.suffix.lower()
-        
         try:
-            if suffix == '.json':
-                records = self._parse_json(file_path)
-            elif suffix == '.csv':
-                records = self._parse_csv(file_path)
-            else:  # .txt 或其他
-                records = self._parse_txt(file_path)
-            
-            if not records:
+            # 根据文件扩展名选择读取器，记录边读边处理，不整体载入内存
+            records = iter_batch_records(str(file_path))
+            first = next(records, None)
+            if first is None:
                 return {
                     'success': False,
                     'error': '文件中没有有效的记录'
                 }
+            records = chain([first], records)
             
-            # 批量处理
-            results = self._batch_calculate(records)
+            # 批量处理：每条结果计算完成即写入输出文件
+            output_file = file_path.parent / f"{file_path.stem}_result{OUTPUT_FORMATS[self.output_format]}"
+            journal = CheckpointJournal(str(file_path), str(output_file), self.output_format)
+            state = journal.load() if resume else None
+            if state:
+                print(f"[续跑] 从第 {state['last_line']} 行之后继续，已完成 {state['stats']['total']} 条")
+                stats = dict(state['stats'])
+                stats.setdefault('duplicates', 0)
+                records = ((line_no, record) for line_no, record in records if line_no > state['last_line'])
+            else:
+                if resume:
+                    print("[续跑] 没有可用的检查点，从头开始处理")
+                journal.remove()
+                stats = {'total': 0, 'success': 0, 'failed': 0, 'duplicates': 0}
             
-            # 保存结果
-            output_file = self._save_results(results, file_path)
+            duplicates = DuplicateIndex() if self.dedup else None
+            writer = open_result_writer(
+                self.output_format, str(output_file),
+                header={
+                    'input_file': str(file_path),
+                    'process_time': datetime.now().strftime('%Y%m%d_%H%M%S')
+                },
+                columns=RESULT_COLUMNS,
+                row_builder=self._score_row,
+                resume=state['writer'] if state else None
+            )
+            # 历史记录由后台线程批量写入，计算不等待磁盘
+            persister = WriteBehindQueue(self.storage)
+            progress = None
+            if not self.verbose:
+                progress = ProgressReporter(count_lines(str(file_path)), start_line=journal.last_line)
+            completed = False
+            try:
+                self._batch_calculate(records, writer, stats, persister, journal, progress, duplicates)
+                completed = True
+            finally:
+                if not completed:
+                    # 中断时记录已完成的位置，--resume 从下一条继续
+                    self._save_checkpoint(journal, writer, persister, stats)
+                # 汇总信息在结果之后单独写出（中途出错时也保留已处理部分的统计）
+                writer.close(stats)
+                persist_stats = persister.close()
+            journal.remove()
             
-            # 统计结果
-            success_count = sum(1 for r in results if r['success'])
-            failed_count = len(results) - success_count
+            if persist_stats['failed']:
+                print(f"[警告] {persist_stats['failed']} 条结果保存到历史记录失败，请查看日志")
             
+            logger.info(f"结果已保存到: {output_file}")
             return {
                 'success': True,
-                'success_count': success_count,
-                'failed_count': failed_count,
-                'output_file': str(output_file),
-                'results': results
+                'success_count': stats['success'],
+                'failed_count': stats['failed'],
+                'duplicate_count': stats['duplicates'],
+                'persist_failed_count': persist_stats['failed'],
+                'output_file': str(output_file)
             }
             
         except Exception as e:
@@ -131,470 +193,331 @@ class BatchProcessor:
                 'error': str(e)
             }
     
-    def _parse_json(self, file_path: Path) -> List[Dict]:
+    def _batch_calculate(self, records: Iterable[Tuple[int, Dict]], writer: ResultWriter,
+                         stats: Dict[str, int], persister: WriteBehindQueue,
+                         journal: Optional[CheckpointJournal] = None,
+                         progress: Optional[ProgressReporter] = None,
+                         duplicates: Optional[DuplicateIndex] = None):
         """
-        解析 JSON 格式文件
-        格式示例:
-        [
-          {
-            "name": "张三",
-            "gender": "男",
-            "birth_date": "1990-01-01",
-            "birth_time": "10:30",
-            "longitude": 116.4074,
-            "latitude": 39.9042
-          }
-        ]
+        批量计算
+        :param records: (行号, 记录) 序列，按需逐条读取
+        :param writer: 结果写入器，每条结果完成后立即写入
+        :param stats: 统计计数（total/success/failed/duplicates），处理过程中原地更新
+        :param persister: 后台写入队列，用于保存历史记录
+        :param journal: 检查点日志，每 checkpoint_every 条保存一次进度
+        :param progress: 进度行，按固定间隔刷新
+        :param duplicates: 重复输入索引，相同输入只计算一次
         """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if isinstance(data, dict):
-            data = [data]
+        print(f"\n{'='*70}")
+        print(f"开始批量处理")
+        print(f"{'='*70}\n")
         
-        records = []
-        for idx, item in enumerate(data):
-            if not isinstance(item, dict):
-                logger.warning(f"跳过第 {idx+1} 条记录（格式错误）")
-                continue
+        for idx, (line_no, record) in enumerate(records, 1):
+            if self.verbose:
+                print(f"[{idx}] {record['name']}", end=' ')
+            started = time.perf_counter()
             
-            # 验证必填字段
-            if not all(key in item for key in ['name', 'gender', 'birth_date']):
-                logger.warning(f"跳过第 {idx+1} 条记录（缺少必填字段）")
-                continue
+            key = record_key(record) if duplicates is not None else None
+            output = duplicates.take(key) if key is not None else None
+            if output is not None:
+                # 与前面某行输入相同：直接复用结果，不重复计算和保存
+                self._write_output(writer, stats, output)
+                stats['duplicates'] += 1
+                if self.verbose:
+                    print("[重复] 复用相同输入的结果")
+            else:
+                output = self._process_record(line_no, record, writer, stats, persister)
+                if key is not None:
+                    duplicates.store(key, output)
             
-            records.append(item)
+            if progress is not None:
+                progress.update(line_no, time.perf_counter() - started, stats)
+            if journal is not None:
+                journal.advance(line_no)
+                if idx % self.checkpoint_every == 0:
+                    self._save_checkpoint(journal, writer, persister, stats)
         
-        return records
-    
-    def _parse_csv(self, file_path: Path) -> List[Dict]:
-        """
-        解析 CSV 格式文件
-        格式示例:
-        name,gender,birth_date,birth_time,longitude,latitude
-        张三,男,1990-01-01,10:30,116.4074,39.9042
-        李四,女,1992-05-20,14:00,,
-        """
-        import csv
-        
-        records = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for idx, row in enumerate(reader):
-                # 验证必填字段
-                if not all(key in row for key in ['name', 'gender', 'birth_date']):
-                    logger.warning(f"跳过第 {idx+2} 行（缺少必填字段）")
-                    continue
-                
-                if not row['name'].strip():
-                    logger.warning(f"跳过第 {idx+2} 行（姓名为空）")
-                    continue
-                
-                # 转换数据类型
-                record = {
-                    'name': row['name'].strip(),
-                    'gender': row['gender'].strip(),
-                    'birth_date': row['birth_date'].strip(),
-                }
-                
-                if 'birth_time' in row and row['birth_time'].strip():
-                    record['birth_time'] = row['birth_time'].strip()
-                
-                if 'longitude' in row and row['longitude'].strip():
-                    try:
-                        record['longitude'] = float(row['longitude'])
-                    except ValueError:
-                        logger.warning(f"第 {idx+2} 行经度格式错误")
-                
-                if 'latitude' in row and row['latitude'].strip():
-                    try:
-                        record['latitude'] = float(row['latitude'])
-                    except ValueError:
-                        logger.warning(f"第 {idx+2} 行纬度格式错误")
-                
-                records.append(record)
-        
-        return records
-    
-    def _parse_txt(self, file_path: Path) -> List[Dict]:
-        """
-        解析 TXT 格式文件
-        格式示例（每行一条记录，字段用空格或制表符分隔）:
-        张三 男 1990-01-01 10:30 116.4074 39.9042
-        李四 女 1992-05-20 14:00
-        王五 男 1985-03-15
-        
-        或者使用键值对格式（每条记录用空行分隔）:
-        name: 张三
-        gender: 男
-        birth_date: 1990-01-01
-        birth_time: 10:30
-        longitude: 116.4074
-        latitude: 39.9042
-        
-        name: 李四
-        gender: 女
-        birth_date: 1992-05-20
-        """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 检测格式（检查非注释行中是否有键值对格式）
-        has_keyvalue = False
-        for line in content.split('\n'):
-            stripped = line.strip()
-            if stripped and not stripped.startswith('#'):
-                if 'name:' in line.lower() or 'gender:' in line.lower():
-                    has_keyvalue = True
-                    break
-        
-        if has_keyvalue and '\n\n' in content:
-            return self._parse_txt_keyvalue(content)
-        else:
-            return self._parse_txt_tabular(content)
+        if progress is not None:
+            progress.finish(stats)
+        print(f"\n{'='*70}")
+        print(f"批量处理完成")
+        print(f"总计: {stats['total']} 条 | 成功: {stats['success']} 条 | "
+              f"失败: {stats['failed']} 条 | 重复输入: {stats['duplicates']} 条（未重复计算）")
+        print(f"{'='*70}\n")
     
-    def _parse_txt_keyvalue(self, content: str) -> List[Dict]:
-        """解析键值对格式的 TXT"""
-        records = []
-        blocks = content.strip().split('\n\n')
-        
-        for idx, block in enumerate(blocks):
-            if not block.strip():
-                continue
-            
-            record = {}
-            for line in block.strip().split('\n'):
-                if ':' not in line:
-                    continue
-                
-                key, value = line.split(':', 1)
-                key = key.strip().lower()
-                value = value.strip()
-                
-                if key in ['name', 'gender', 'birth_date', 'birth_time']:
-                    record[key] = value
-                elif key == 'longitude':
-                    try:
-                        record['longitude'] = float(value)
-                    except ValueError:
-                        logger.warning(f"第 {idx+1} 条记录经度格式错误")
-                elif key == 'latitude':
-                    try:
-                        record['latitude'] = float(value)
-                    except ValueError:
-                        logger.warning(f"第 {idx+1} 条记录纬度格式错误")
+    def _process_record(self, line_no: int, record: Dict, writer: ResultWriter, stats: Dict[str, int],
+                        persister: WriteBehindQueue) -> Dict:
+        """计算单条记录，写出结果并提交历史记录，返回输出结果"""
+        try:
+            # 准备参数
+            name = record['name']
+            gender = record['gender']
+            birth_date = record['birth_date']
+            birth_time_str = record.get('birth_time', DEFAULT_BIRTH_TIME)  # 默认中午
+            longitude = record.get('longitude', DEFAULT_LONGITUDE)  # 默认北京
+            latitude = record.get('latitude', DEFAULT_LATITUDE)
             
-            # 验证必填字段
-            if not all(key in record for key in ['name', 'gender', 'birth_date']):
-                logger.warning(f"跳过第 {idx+1} 条记录（缺少必填字段）")
-                continue
+            # 组合完整的出生时间
+            birth_datetime = f"{birth_date} {birth_time_str}"
             
-            records.append(record)
-        
-        return records
-    
-    def _parse_txt_tabular(self, content: str) -> List[Dict]:
-        """解析表格格式的 TXT"""
-        records = []
-        lines = content.strip().split('\n')
-        
-        line_no = 0
-        for line in lines:
-            line_no += 1
-            # 跳过空行和注释行
-            if not line.strip() or line.strip().startswith('#'):
-                continue
+            # 分离姓和名（假设单姓，取第一个字为姓）
+            surname = name[0]
+            given_name = name[1:] if len(name) > 1 else ''
             
-            # 分隔符可以是空格或制表符
-            parts = line.split()
+            if not given_name:
+                raise ValueError("姓名至少需要两个字")
             
-            if len(parts) < 3:
-                logger.warning(f"跳过第 {line_no} 行（字段不足）")
-                continue
+            # 调用计算器
+            result = self.calculator.calculate_name(
+                surname=surname,
+                given_name=given_name,
+                gender=gender,
+                birth_time=birth_datetime,
+                longitude=longitude,
+                latitude=latitude
+            )
             
-            record = {
-                'name': parts[0],
-                'gender': parts[1],
-                'birth_date': parts[2],
-            }
+            # 保存到历史记录（后台批量写入）
+            persister.save_test_result(result)
             
-            if len(parts) >= 4:
-                record['birth_time'] = parts[3]
+            output = self._emit(writer, stats, {
+                'success': True,
+                'name': name,
+                'result': result
+            })
             
-            if len(parts) >= 5:
-                try:
-                    record['longitude'] = float(parts[4])
-                except ValueError:
-                    logger.warning(f"第 {line_no} 行经度格式错误")
+            if self.verbose:
+                self._print_result_detail(result)
             
-            if len(parts) >= 6:
-                try:
-                    record['latitude'] = float(parts[5])
-                except ValueError:
-                    logger.warning(f"第 {line_no} 行纬度格式错误")
+        except ValueError as ve:
+            error_msg = str(ve)
+            output = self._emit(writer, stats, {
+                'success': False,
+                'name': record.get('name', '未知'),
+                'error': error_msg
+            })
+            if self.verbose:
+                print(f"[失败] {error_msg}")
+            logger.error(f"数据验证失败（第 {line_no} 行）{name}: {error_msg}")
             
-            records.append(record)
+        except Exception as e:
+            error_msg = str(e)
+            output = self._emit(writer, stats, {
+                'success': False,
+                'name': record.get('name', '未知'),
+                'error': error_msg
+            })
+            if self.verbose:
+                print(f"[失败] {error_msg}")
+            logger.exception(f"处理记录失败（第 {line_no} 行）: {record}")
         
-        return records
+        return output
     
-    def _batch_calculate(self, records: List[Dict]) -> List[Dict]:
-        """
-        批量计算
-        :param records: 记录列表
-        :return: 结果列表
-        """
-        results = []
-        total = len(records)
-        
-        print(f"\n{'='*70}")
-        print(f"开始批量处理 {total} 条记录")
-        print(f"{'='*70}\n")
-        
-        for idx, record in enumerate(records, 1):
-            print(f"[{idx}/{total}] {record['name']}", end=' ')
+    def _print_result_detail(self, result: Dict):
+        """逐条输出八字、五行、五格、生肖、字义等详细信息（--verbose）"""
+        bazi = result.get('bazi', {})
+        score = result.get('comprehensive_score', 0)
+        if bazi:
+            print(f"[成功] 综合评分: {score}分")
+            print(f"  八字: {bazi.get('bazi_str', '')}")
+            print(f"  日主: {bazi.get('rizhu', '')} - {bazi.get('siji', '')}")
             
-            try:
-                # 准备参数
-                name = record['name']
-                gender = record['gender']
-                birth_date = record['birth_date']
-                birth_time_str = record.get('birth_time', '12:00')  # 默认中午
-                longitude = record.get('longitude', 116.4074)  # 默认北京
-                latitude = record.get('latitude', 39.9042)
-                
-                # 组合完整的出生时间
-                birth_datetime = f"{birth_date} {birth_time_str}"
-                
-                # 分离姓和名（假设单姓，取第一个字为姓）
-                surname = name[0]
-                given_name = name[1:] if len(name) > 1 else ''
-                
-                if not given_name:
-                    raise ValueError("姓名至少需要两个字")
+            # 显示五行强度（更紧凑的格式）
+            if 'wuxing_strength' in bazi:
+                strength = bazi['wuxing_strength']
+                total_strength = sum(strength.values())
+                strength_parts = []
+                for wx in ['木', '火', '土', '金', '水']:
+                    s = strength.get(wx, 0)
+                    percent = (s / total_strength * 100) if total_strength > 0 else 0
+                    # 强度状态标记
+                    if s < 100:
+                        mark = '!'
+                    elif s < 500:
+                        mark = '-'
+                    elif s >= 1500:
+                        mark = '+'
+                    else:
+                        mark = ''
+                    strength_parts.append(f"{wx}{s}{mark}")
+                print(f"  五行: {' '.join(strength_parts)}  (!极弱 -弱 +旺)")
+            
+            # 显示同类异类和喜用神
+            if 'tongyi' in bazi and 'yilei' in bazi:
+                tongyi = bazi['tongyi']
+                yilei = bazi['yilei']
+                tongyi_elem = ''.join(tongyi['elements'])
+                yilei_elem = ''.join(yilei['elements'])
+                print(f"  同类({tongyi_elem}){tongyi['strength']}({tongyi['percent']:.1f}%) | "
+                      f"异类({yilei_elem}){yilei['strength']}({yilei['percent']:.1f}%)")
                 
-                # 调用计算器
-                result = self.calculator.calculate_name(
-                    surname=surname,
-                    given_name=given_name,
-                    gender=gender,
-                    birth_time=birth_datetime,
-                    longitude=longitude,
-                    latitude=latitude
-                )
+                xiyong = bazi.get('xiyong_shen', [])
+                ji = bazi.get('ji_shen', [])
+                if tongyi['percent'] > 55:
+                    status = "身强"
+                elif tongyi['percent'] < 45:
+                    status = "身弱"
+                else:
+                    status = "中和"
                 
-                # 保存到历史记录
-                self.storage.save_test_result(result)
+                print(f"  判断: {status} | 喜用: {','.join(xiyong)}", end='')
+                if ji:
+                    print(f" | 忌: {','.join(ji)}")
+                else:
+                    print()
+            
+            # 显示四季用神参考
+            if bazi.get('siji'):
+                siji = bazi['siji']
+                # 如果是详细格式，显示完整信息
+                if len(siji) > 20:  # 详细格式通常较长
+                    print(f"  四季: {siji}")
+            
+            # 显示五格信息（紧凑格式）
+            if 'wuge' in result:
+                wuge = result['wuge']
+                print(f"  五格: 天{wuge['tiange']['num']}({wuge['tiange']['fortune']}) "
+                      f"人{wuge['renge']['num']}({wuge['renge']['fortune']}) "
+                      f"地{wuge['dige']['num']}({wuge['dige']['fortune']}) "
+                      f"外{wuge['waige']['num']}({wuge['waige']['fortune']}) "
+                      f"总{wuge['zongge']['num']}({wuge['zongge']['fortune']}) | {wuge['sancai']}")
+            
+            # 显示生肖信息
+            if 'shengxiao' in result:
+                shengxiao_info = result['shengxiao']
+                sx = shengxiao_info.get('shengxiao', '')
+                wx = shengxiao_info.get('wuxing', '')
+                score_sx = shengxiao_info.get('score', 0)
                 
-                results.append({
-                    'success': True,
-                    'name': name,
-                    'result': result
-                })
+                print(f"  生肖: {sx}({wx}) 得分:{score_sx}分")
                 
-                # 显示八字信息
-                bazi = result.get('bazi', {})
-                score = result.get('comprehensive_score', 0)
-                if bazi:
-                    print(f"[成功] 综合评分: {score}分")
-                    print(f"  八字: {bazi.get('bazi_str', '')}")
-                    print(f"  日主: {bazi.get('rizhu', '')} - {bazi.get('siji', '')}")
-                    
-                    # 显示五行强度（更紧凑的格式）
-                    if 'wuxing_strength' in bazi:
-                        strength = bazi['wuxing_strength']
-                        total_strength = sum(strength.values())
-                        strength_parts = []
-                        for wx in ['木', '火', '土', '金', '水']:
-                            s = strength.get(wx, 0)
-                            percent = (s / total_strength * 100) if total_strength > 0 else 0
-                            # 强度状态标记
-                            if s < 100:
-                                mark = '!'
-                            elif s < 500:
-                                mark = '-'
-                            elif s >= 1500:
-                                mark = '+'
-                            else:
-                                mark = ''
-                            strength_parts.append(f"{wx}{s}{mark}")
-                        print(f"  五行: {' '.join(strength_parts)}  (!极弱 -弱 +旺)")
-                    
-                    # 显示同类异类和喜用神
-                    if 'tongyi' in bazi and 'yilei' in bazi:
-                        tongyi = bazi['tongyi']
-                        yilei = bazi['yilei']
-                        tongyi_elem = ''.join(tongyi['elements'])
-                        yilei_elem = ''.join(yilei['elements'])
-                        print(f"  同类({tongyi_elem}){tongyi['strength']}({tongyi['percent']:.1f}%) | "
-                              f"异类({yilei_elem}){yilei['strength']}({yilei['percent']:.1f}%)")
-                        
-                        xiyong = bazi.get('xiyong_shen', [])
-                        ji = bazi.get('ji_shen', [])
-                        if tongyi['percent'] > 55:
-                            status = "身强"
-                        elif tongyi['percent'] < 45:
-                            status = "身弱"
-                        else:
-                            status = "中和"
+                # 显示详细计算过程
+                calc_steps = shengxiao_info.get('calculation_steps', [])
+                if calc_steps:
+                    print(f"    计算过程:")
+                    for step in calc_steps:
+                        step_name = step.get('step', '')
+                        step_value = step.get('value', 0)
+                        step_desc = step.get('description', '')
                         
-                        print(f"  判断: {status} | 喜用: {','.join(xiyong)}", end='')
-                        if ji:
-                            print(f" | 忌: {','.join(ji)}")
-                        else:
-                            print()
-                    
-                    # 显示四季用神参考
-                    if bazi.get('siji'):
-                        siji = bazi['siji']
-                        # 如果是详细格式，显示完整信息
-                        if len(siji) > 20:  # 详细格式通常较长
-                            print(f"  四季: {siji}")
-                    
-                    # 显示五格信息（紧凑格式）
-                    if 'wuge' in result:
-                        wuge = result['wuge']
-                        print(f"  五格: 天{wuge['tiange']['num']}({wuge['tiange']['fortune']}) "
-                              f"人{wuge['renge']['num']}({wuge['renge']['fortune']}) "
-                              f"地{wuge['dige']['num']}({wuge['dige']['fortune']}) "
-                              f"外{wuge['waige']['num']}({wuge['waige']['fortune']}) "
-                              f"总{wuge['zongge']['num']}({wuge['zongge']['fortune']}) | {wuge['sancai']}")
-                    
-                    # 显示生肖信息
-                    if 'shengxiao' in result:
-                        shengxiao_info = result['shengxiao']
-                        sx = shengxiao_info.get('shengxiao', '')
-                        wx = shengxiao_info.get('wuxing', '')
-                        score_sx = shengxiao_info.get('score', 0)
-                        
-                        print(f"  生肖: {sx}({wx}) 得分:{score_sx}分")
-                        
-                        # 显示详细计算过程
-                        calc_steps = shengxiao_info.get('calculation_steps', [])
-                        if calc_steps:
-                            print(f"    计算过程:")
-                            for step in calc_steps:
-                                step_name = step.get('step', '')
-                                step_value = step.get('value', 0)
-                                step_desc = step.get('description', '')
-                                
-                                # 跳过基础分和最终得分，只显示加减分项
-                                if step_name not in ['基础分', '最终得分']:
-                                    if isinstance(step_value, (int, float)) and step_value != 0:
-                                        # 显示加减分项的详细信息
-                                        details = step.get('details', [])
-                                        if details:
-                                            if step_name == '五行关系':
-                                                detail_str = '、'.join([f"{d['char']}({d['description']})" for d in details])
-                                                print(f"      {step_name}: {step_value:+d}分 [{detail_str}]")
-                                            else:
-                                                detail_str = '、'.join([str(d) for d in details])
-                                                print(f"      {step_name}: {step_value:+d}分 [{detail_str}]")
-                                        else:
-                                            print(f"      {step_name}: {step_value:+d}分")
-                        
-                        # 显示建议
-                        xi_wuxing = shengxiao_info.get('recommended_xi_wuxing', [])
-                        ji_wuxing = shengxiao_info.get('recommended_ji_wuxing', [])
-                        xi_shengxiao = shengxiao_info.get('recommended_xi_shengxiao', [])
-                        ji_shengxiao = shengxiao_info.get('recommended_ji_shengxiao', [])
-                        
-                        if xi_wuxing or ji_wuxing:
-                            print(f"    建议五行: 喜{'、'.join(xi_wuxing) if xi_wuxing else '无'} | 忌{'、'.join(ji_wuxing) if ji_wuxing else '无'}")
-                        if xi_shengxiao or ji_shengxiao:
-                            print(f"    建议生肖: 喜{'、'.join(xi_shengxiao) if xi_shengxiao else '无'} | 忌{'、'.join(ji_shengxiao) if ji_shengxiao else '无'}")
-                    
-                    # 显示字义音形信息
-                    if 'ziyi' in result:
-                        ziyi_info = result['ziyi']
-                        ziyi_score = ziyi_info.get('score', 0)
-                        luck_score = ziyi_info.get('luck_analysis', {}).get('score', 0)
-                        tone_score = ziyi_info.get('tone_analysis', {}).get('score', 0)
-                        print(f"  字义音形: 综合{ziyi_score}分 (字义{luck_score}分 音韵{tone_score}分)")
-                else:
-                    print(f"[成功] 综合评分: {score}分")
+                        # 跳过基础分和最终得分，只显示加减分项
+                        if step_name not in ['基础分', '最终得分']:
+                            if isinstance(step_value, (int, float)) and step_value != 0:
+                                # 显示加减分项的详细信息
+                                details = step.get('details', [])
+                                if details:
+                                    if step_name == '五行关系':
+                                        detail_str = '、'.join([f"{d['char']}({d['description']})" for d in details])
+                                        print(f"      {step_name}: {step_value:+d}分 [{detail_str}]")
+                                    else:
+                                        detail_str = '、'.join([str(d) for d in details])
+                                        print(f"      {step_name}: {step_value:+d}分 [{detail_str}]")
+                                else:
+                                    print(f"      {step_name}: {step_value:+d}分")
                 
-            except ValueError as ve:
-                error_msg = str(ve)
-                results.append({
-                    'success': False,
-                    'name': record.get('name', '未知'),
-                    'error': error_msg
-                })
-                print(f"[失败] {error_msg}")
-                logger.error(f"数据验证失败 {name}: {error_msg}")
+                # 显示建议
+                xi_wuxing = shengxiao_info.get('recommended_xi_wuxing', [])
+                ji_wuxing = shengxiao_info.get('recommended_ji_wuxing', [])
+                xi_shengxiao = shengxiao_info.get('recommended_xi_shengxiao', [])
+                ji_shengxiao = shengxiao_info.get('recommended_ji_shengxiao', [])
                 
-            except Exception as e:
-                error_msg = str(e)
-                results.append({
-                    'success': False,
-                    'name': record.get('name', '未知'),
-                    'error': error_msg
-                })
-                print(f"[失败] {error_msg}")
-                logger.exception(f"处理记录失败: {record}")
-        
-        print(f"\n{'='*70}")
-        print(f"批量处理完成")
-        print(f"总计: {total} 条 | 成功: {sum(1 for r in results if r['success'])} 条 | "
-              f"失败: {sum(1 for r in results if not r['success'])} 条")
-        print(f"{'='*70}\n")
+                if xi_wuxing or ji_wuxing:
+                    print(f"    建议五行: 喜{'、'.join(xi_wuxing) if xi_wuxing else '无'} | 忌{'、'.join(ji_wuxing) if ji_wuxing else '无'}")
+                if xi_shengxiao or ji_shengxiao:
+                    print(f"    建议生肖: 喜{'、'.join(xi_shengxiao) if xi_shengxiao else '无'} | 忌{'、'.join(ji_shengxiao) if ji_shengxiao else '无'}")
+            
+            # 显示字义音形信息
+            if 'ziyi' in result:
+                ziyi_info = result['ziyi']
+                ziyi_score = ziyi_info.get('score', 0)
+                luck_score = ziyi_info.get('luck_analysis', {}).get('score', 0)
+                tone_score = ziyi_info.get('tone_analysis', {}).get('score', 0)
+                print(f"  字义音形: 综合{ziyi_score}分 (字义{luck_score}分 音韵{tone_score}分)")
+        else:
+            print(f"[成功] 综合评分: {score}分")
         
-        return results
     
-    def _save_results(self, results: List[Dict], input_file: Path) -> Path:
+    @staticmethod
+    def _save_checkpoint(journal: CheckpointJournal, writer: ResultWriter,
+                         persister: WriteBehindQueue, stats: Dict[str, int]):
+        """等待历史记录与输出落盘后保存检查点，检查点之前的行续跑时不再重算"""
+        if not journal.last_line:
+            return
+        try:
+            persister.flush()
+            journal.save(writer.checkpoint(), stats)
+        except Exception as e:
+            logger.error(f"保存检查点失败: {e}")
+    
+    def _emit(self, writer: ResultWriter, stats: Dict[str, int], item: Dict) -> Dict:
+        """写出单条结果并更新统计，返回输出结果"""
+        output = self._build_output_item(item)
+        self._write_output(writer, stats, output)
+        return output
+    
+    @staticmethod
+    def _write_output(writer: ResultWriter, stats: Dict[str, int], output: Dict):
+        writer.write(output)
+        stats['total'] += 1
+        stats['success' if output['success'] else 'failed'] += 1
+    
+    def _build_output_item(self, item: Dict) -> Dict:
         """
-        保存结果到文件
-        :param results: 结果列表
-        :param input_file: 输入文件路径
-        :return: 输出文件路径
+        将单条处理结果转换为输出格式
+        :param item: {'success', 'name', 'result'} 或 {'success', 'name', 'error'}
+        :return: 输出字典
         """
-        # 生成输出文件名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = input_file.parent / f"{input_file.stem}_result.json"
+        if not item['success']:
+            return {
+                'name': item['name'],
+                'success': False,
+                'error': item.get('error', '未知错误')
+            }
         
-        # 准备输出数据
-        output_data = {
-            'input_file': str(input_file),
-            'process_time': timestamp,
-            'total': len(results),
-            'success': sum(1 for r in results if r['success']),
-            'failed': sum(1 for r in results if not r['success']),
-            'results': []
+        # 提取完整信息
+        result = item['result']
+        return {
+            'name': item['name'],
+            'success': True,
+            'basic_info': {
+                'surname': result.get('surname', ''),
+                'given_name': result.get('given_name', ''),
+                'gender': result.get('gender', ''),
+                'birth_time': result.get('birth_time', ''),
+                'longitude': result.get('longitude'),
+                'latitude': result.get('latitude')
+            },
+            'kangxi_info': self._get_kangxi_info(item['name']),
+            'comprehensive_score': result.get('comprehensive_score', 0),
+            'wuge': result.get('wuge', {}),
+            'bazi': result.get('bazi', {}),
+            'ziyi': result.get('ziyi', {}),
+            'shengxiao': result.get('shengxiao', {}),
+            'chenggu': result.get('chenggu', {})
+        }
+    
+    @staticmethod
+    def _score_row(output_item: Dict) -> Dict[str, Any]:
+        """将输出结果展开为 CSV / SQLite 的扁平评分列"""
+        basic = output_item.get('basic_info', {})
+        wuge = output_item.get('wuge', {})
+        bazi = output_item.get('bazi', {})
+        shengxiao = output_item.get('shengxiao', {})
+        return {
+            'name': output_item.get('name'),
+            'success': output_item.get('success'),
+            'gender': basic.get('gender'),
+            'birth_time': basic.get('birth_time'),
+            'longitude': basic.get('longitude'),
+            'latitude': basic.get('latitude'),
+            'comprehensive_score': output_item.get('comprehensive_score'),
+            'wuge_score': wuge.get('score'),
+            'sancai': wuge.get('sancai'),
+            'bazi_score': bazi.get('score'),
+            'bazi_str': bazi.get('bazi_str'),
+            'ziyi_score': output_item.get('ziyi', {}).get('score'),
+            'shengxiao': shengxiao.get('shengxiao'),
+            'shengxiao_score': shengxiao.get('score'),
+            'chenggu_weight': output_item.get('chenggu', {}).get('weight'),
+            'error': output_item.get('error')
         }
-        
-        for item in results:
-            if item['success']:
-                # 提取完整信息
-                result = item['result']
-                output_data['results'].append({
-                    'name': item['name'],
-                    'success': True,
-                    'basic_info': {
-                        'surname': result.get('surname', ''),
-                        'given_name': result.get('given_name', ''),
-                        'gender': result.get('gender', ''),
-                        'birth_time': result.get('birth_time', ''),
-                        'longitude': result.get('longitude'),
-                        'latitude': result.get('latitude')
-                    },
-                    'kangxi_info': self._get_kangxi_info(item['name']),
-                    'comprehensive_score': result.get('comprehensive_score', 0),
-                    'wuge': result.get('wuge', {}),
-                    'bazi': result.get('bazi', {}),
-                    'ziyi': result.get('ziyi', {}),
-                    'shengxiao': result.get('shengxiao', {}),
-                    'chenggu': result.get('chenggu', {})
-                })
-            else:
-                output_data['results'].append({
-                    'name': item['name'],
-                    'success': False,
-                    'error': item.get('error', '未知错误')
-                })
-        
-        # 保存到文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"结果已保存到: {output_file}")
-        return output_file
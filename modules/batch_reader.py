@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+批量输入读取模块 - 逐条读取批量输入文件
+
+各格式的读取器都是生成器，边读边校验，产出 (行号, 记录)，内存占用与文件大小无关。
+JSON 数组没有行的概念，行号为元素序号。校验失败的记录记录警告后跳过。
+"""
+
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .json_stream import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+
+REQUIRED_FIELDS = ('name', 'gender', 'birth_date')
+TEXT_FIELDS = ('name', 'gender', 'birth_date', 'birth_time')
+FLOAT_FIELDS = (('longitude', '经度'), ('latitude', '纬度'))
+
+
+def build_record(fields: Dict[str, Any], where: str) -> Optional[Dict]:
+    """
+    校验并规整一条输入记录
+    :param fields: 原始字段，值可以是字符串或数字
+    :param where: 用于日志的位置描述，如 "第 3 行"
+    :return: 只含已知字段的记录；缺少必填字段时返回 None
+    """
+    record = {}
+    for key in TEXT_FIELDS:
+        value = fields.get(key)
+        if value is not None and str(value).strip():
+            record[key] = str(value).strip()
+
+    for key, label in FLOAT_FIELDS:
+        value = fields.get(key)
+        if value is None or not str(value).strip():
+            continue
+        try:
+            record[key] = float(value)
+        except (TypeError, ValueError):
+            logger.warning(f"{where}{label}格式错误")
+
+    missing = [key for key in REQUIRED_FIELDS if key not in record]
+    if missing:
+        logger.warning(f"跳过{where}（缺少必填字段: {', '.join(missing)}）")
+        return None
+    return record
+
+
+def iter_csv_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    读取 CSV 文件，首行为列名
+    name,gender,birth_date,birth_time,longitude,latitude
+    张三,男,1990-01-01,10:30,116.4074,39.9042
+    """
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            line_no = reader.line_num
+            record = build_record(row, f"第 {line_no} 行")
+            if record:
+                yield line_no, record
+
+
+def iter_jsonl_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """读取 JSON Lines 文件，每行一个 JSON 对象"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"跳过第 {line_no} 行（JSON 格式错误: {e}）")
+                continue
+            if not isinstance(item, dict):
+                logger.warning(f"跳过第 {line_no} 行（格式错误）")
+                continue
+            record = build_record(item, f"第 {line_no} 行")
+            if record:
+                yield line_no, record
+
+
+def iter_json_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    读取 JSON 文件：顶层为对象数组时逐个元素解码，为单个对象时作为一条记录
+    产出的行号为元素序号
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        first = f.read(4096).lstrip()[:1]
+
+    if first == '[':
+        items = iter_json_array(file_path, key=None)
+    else:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            items = [json.load(f)]
+
+    for idx, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            logger.warning(f"跳过第 {idx} 条记录（格式错误）")
+            continue
+        record = build_record(item, f"第 {idx} 条记录")
+        if record:
+            yield idx, record
+
+
+def iter_txt_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """读取 TXT 文件，按第一条有效内容判断是键值对格式还是表格格式"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            stripped = line.strip().lower()
+            if not stripped or stripped.startswith('#'):
+                continue
+            keyvalue = 'name:' in stripped or 'gender:' in stripped
+            break
+        else:
+            return
+
+    if keyvalue:
+        yield from iter_txt_keyvalue_records(file_path)
+    else:
+        yield from iter_txt_tabular_records(file_path)
+
+
+def iter_txt_tabular_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    读取表格格式的 TXT，每行一条记录，字段用空格或制表符分隔，# 开头为注释
+    张三 男 1990-01-01 10:30 116.4074 39.9042
+    王五 男 1985-03-15
+    """
+    columns = TEXT_FIELDS + tuple(key for key, _ in FLOAT_FIELDS)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip() or line.strip().startswith('#'):
+                continue
+
+            parts = line.split()
+            if len(parts) < len(REQUIRED_FIELDS):
+                logger.warning(f"跳过第 {line_no} 行（字段不足）")
+                continue
+
+            record = build_record(dict(zip(columns, parts)), f"第 {line_no} 行")
+            if record:
+                yield line_no, record
+
+
+def iter_txt_keyvalue_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    读取键值对格式的 TXT，每条记录用空行分隔，行号为记录第一行
+    name: 张三
+    gender: 男
+    birth_date: 1990-01-01
+    """
+    fields = {}
+    start = 0
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            stripped = line.strip()
+            if not stripped:
+                if fields:
+                    record = build_record(fields, f"第 {start} 行开始的记录")
+                    if record:
+                        yield start, record
+                    fields = {}
+                continue
+            if stripped.startswith('#') or ':' not in stripped:
+                continue
+
+            key, value = stripped.split(':', 1)
+            if not fields:
+                start = line_no
+            fields[key.strip().lower()] = value.strip()
+
+    if fields:
+        record = build_record(fields, f"第 {start} 行开始的记录")
+        if record:
+            yield start, record
+
+
+# 文件扩展名 -> 读取器，其他扩展名按 TXT 读取
+READERS = {
+    '.csv': iter_csv_records,
+    '.json': iter_json_records,
+    '.jsonl': iter_jsonl_records,
+    '.ndjson': iter_jsonl_records,
+}
+
+
+def iter_batch_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """按扩展名选择读取器，逐条产出 (行号, 记录)"""
+    reader = READERS.get(Path(file_path).suffix.lower(), iter_txt_records)
+    return reader(str(file_path))
+
+
+def count_lines(file_path: str) -> Optional[int]:
+    """
+    统计输入文件行数，用于估算剩余时间
+    JSON 数组的行号是元素序号而非文件行号，返回 None
+    """
+    if READERS.get(Path(file_path).suffix.lower()) is iter_json_records:
+        return None
+    lines = 0
+    last = b'\n'
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+    return lines if last == b'\n' else lines + 1
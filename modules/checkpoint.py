@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+断点续跑模块 - 记录批量处理的进度
+
+检查点日志与输出文件放在一起，记录输入文件哈希、最后一条已确认的输入行号、
+输出写入器的位置以及统计计数。续跑时跳过已确认的行，并从记录的位置续写输出文件。
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 检查点格式版本，修改结构时递增
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path_for(output_file: str) -> Path:
+    """输出文件对应的检查点日志路径"""
+    output = Path(output_file)
+    return output.with_name(output.name + '.checkpoint')
+
+
+def _input_digest(path: str) -> str:
+    """计算输入文件的 SHA-256"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class CheckpointJournal:
+    """批量处理检查点日志"""
+
+    def __init__(self, input_file: str, output_file: str, output_format: str):
+        """
+        :param input_file: 输入文件路径
+        :param output_file: 结果输出文件路径
+        :param output_format: 结果输出格式，格式不同的检查点不能续用
+        """
+        self.input_file = str(input_file)
+        self.output_file = Path(output_file)
+        self.output_format = output_format
+        self.path = checkpoint_path_for(output_file)
+        self.last_line = 0
+        self._input_hash = None
+
+    @property
+    def input_hash(self) -> str:
+        if self._input_hash is None:
+            self._input_hash = _input_digest(self.input_file)
+        return self._input_hash
+
+    def load(self) -> Optional[Dict]:
+        """
+        读取可续用的检查点
+        :return: {'last_line', 'writer', 'stats', ...}；不存在或与当前输入、输出不匹配时返回 None
+        """
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取检查点失败: {e}")
+            return None
+
+        if state.get('version') != CHECKPOINT_VERSION or state.get('output_format') != self.output_format:
+            logger.warning("检查点格式或输出格式不一致，无法续跑")
+            return None
+        if state.get('input_hash') != self.input_hash:
+            logger.warning("输入文件在上次运行后已修改，无法续跑")
+            return None
+        if not self.output_file.exists():
+            logger.warning(f"输出文件不存在，无法续跑: {self.output_file}")
+            return None
+        if self.output_format != 'sqlite' and self.output_file.stat().st_size < state['writer']['offset']:
+            logger.warning("输出文件比检查点记录的位置短，无法续跑")
+            return None
+
+        self.last_line = state['last_line']
+        return state
+
+    def advance(self, line_no: int):
+        """记录最后一条已处理的输入行号（保存检查点时写入）"""
+        self.last_line = line_no
+
+    def save(self, writer_state: Dict[str, int], stats: Dict[str, int]):
+        """
+        写入检查点（先写临时文件再替换）
+        调用前需确保 writer_state 对应的输出以及历史记录都已落盘
+        """
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'input_file': self.input_file,
+            'input_hash': self.input_hash,
+            'output_format': self.output_format,
+            'last_line': self.last_line,
+            'writer': writer_state,
+            'stats': stats,
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        """处理完成后删除检查点"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+公司版批量处理模块 - 逐条读取公司名称并批量分析
+
+输入边读边处理，条数不限。每个工作进程只构建一套 CompanyCalculator（含八字计算器），
+负责人八字按 (出生时间, 经度, 纬度) 缓存，同一负责人、同一行业的行共用一个分析会话（CompanySession）；
+workers 大于 1 时按块提交到进程池，按输入顺序取回结果，逐条写入输出文件，历史记录由后台线程批量落库。
+"""
+
+import csv
+import heapq
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .company_calculator import CompanyCalculator, CompanySession
+from .result_writer import OUTPUT_FORMATS, open_result_writer
+from .write_behind import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
+
+
+# CSV / SQLite 导出的扁平评分列
+COMPANY_RESULT_COLUMNS = [
+    'full_name', 'main_name', 'industry_type', 'owner_name', 'total_score', 'grade',
+    'wuge_score', 'industry_score', 'bazi_match_score', 'xiyong_match_score',
+    'shengxiao_score', 'ziyi_score'
+]
+
+# 未提供负责人出生信息（或八字计算失败）时使用的缺省八字
+DEFAULT_OWNER_BAZI = {'xiyong_shen': ['木', '水'], 'ji_shen': ['土'], 'bazi_match_score': 75}
+
+# 每个进程池任务包含的条数
+CHUNK_SIZE = 20
+
+# 完成后打印的最高分条数
+SUMMARY_TOP_N = 10
+
+# 每个进程缓存的分析会话数（按负责人与行业区分）
+SESSION_CACHE_SIZE = 256
+
+
+def company_score_row(item: Dict) -> Dict:
+    """将公司版结果展开为扁平评分列"""
+    parsed = item.get('parsed', {})
+    scores = item.get('scores', {})
+    row = {k: scores.get(k) for k in COMPANY_RESULT_COLUMNS if k in scores}
+    row.update({
+        'full_name': parsed.get('full_name'),
+        'main_name': parsed.get('main_name'),
+        'industry_type': parsed.get('industry_type'),
+        'owner_name': (item.get('owner') or {}).get('name')
+    })
+    return row
+
+
+def iter_company_rows(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    逐条读取公司批量输入，产出 (行号, 输入行)
+    CSV 首行为列名；其他扩展名按 TXT 读取：每行一个公司全称，可用空白分隔附加行业类型，# 开头为注释
+    """
+    if Path(file_path).suffix.lower() == '.csv':
+        yield from _iter_csv_rows(file_path)
+    else:
+        yield from _iter_txt_rows(file_path)
+
+
+def _iter_csv_rows(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            row = {key: (value or '').strip() for key, value in row.items() if key}
+            # 使用数据文件中的公司名称字段，不做程序内拼接/拆分
+            full_name = row.get('公司全称') or row.get('公司名称') or row.get('企业名称') or ''
+            # 若数据文件未提供统一的全称字段，才回退到拼接（保持兼容老格式）
+            if not full_name:
+                full_name = ''.join(filter(None, [
+                    row.get('行政区划'), row.get('字号(主名)'), row.get('行业/经营特点'), row.get('组织形式')
+                ]))
+            if not full_name:
+                logger.warning(f"跳过第 {reader.line_num} 行（缺少公司名称）")
+                continue
+            yield reader.line_num, {
+                'prefix': row.get('行政区划', ''),
+                'main_name': row.get('字号(主名)', ''),
+                'suffix': row.get('行业/经营特点', ''),
+                'form_org': row.get('组织形式', ''),
+                'full_name': full_name,
+                'industry_type': row.get('行业类型', ''),
+                'owner': {
+                    'name': row.get('负责人姓名', ''),
+                    'gender': row.get('负责人性别', ''),
+                    'birth_time': row.get('出生时间', ''),
+                    'longitude': row.get('经度', ''),
+                    'latitude': row.get('纬度', '')
+                }
+            }
+
+
+def _iter_txt_rows(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            parts = line.split(None, 1)
+            if not parts or parts[0].startswith('#'):
+                continue
+            # TXT 模式不做拆分：全称即主名
+            yield line_no, {
+                'prefix': '',
+                'main_name': parts[0],
+                'suffix': '',
+                'form_org': '',
+                'full_name': parts[0],
+                'industry_type': parts[1].strip() if len(parts) > 1 else '',
+                'owner': {}
+            }
+
+
+def analyze_company_row(calc: CompanyCalculator, row: Dict,
+                        sessions: Optional[Dict[tuple, CompanySession]] = None) -> Dict:
+    """
+    分析一条输入行，附加负责人信息与行业类型，便于后续持久化与审计
+    :param sessions: 分析会话缓存，同一负责人、同一行业的行共用一个会话
+    """
+    owner = row['owner']
+    key = (owner.get('birth_time', ''), owner.get('longitude', ''), owner.get('latitude', ''),
+           row['industry_type'], row['suffix'])
+    session = sessions.get(key) if sessions is not None else None
+    if session is None:
+        session = calc.session(owner_bazi_info(calc, owner), row['industry_type'], row['suffix'])
+        if sessions is not None:
+            if len(sessions) >= SESSION_CACHE_SIZE:
+                del sessions[next(iter(sessions))]
+            sessions[key] = session
+
+    result = session.analyze(row['prefix'], row['main_name'], row['suffix'], row['form_org'], row['full_name'])
+    result['owner'] = owner
+    if row['industry_type']:
+        result['parsed']['industry_type'] = row['industry_type']
+    return result
+
+
+def owner_bazi_info(calc: CompanyCalculator, owner: Dict) -> Dict:
+    """计算负责人八字；未提供出生信息或计算失败时使用缺省八字"""
+    birth = owner.get('birth_time', '')
+    if birth and owner.get('longitude') and owner.get('latitude'):
+        try:
+            return calc.build_bazi_info(birth, float(owner['longitude']), float(owner['latitude']))
+        except Exception as e:
+            logger.warning(f"负责人八字计算失败，使用缺省八字: {e}")
+    bazi_info = dict(DEFAULT_OWNER_BAZI)
+    # 为生肖分析提供日期回退：即使未能计算八字，也保留出生日期字符串
+    if birth:
+        bazi_info['birth_time'] = birth
+    return bazi_info
+
+
+def _analyze_safely(calc: CompanyCalculator, line_no: int, row: Dict,
+                    sessions: Dict[tuple, CompanySession]) -> Tuple[int, Dict, Optional[Dict], Optional[str]]:
+    """分析一条输入行，返回 (行号, 输入行, 结果, 错误)，单条失败不影响整批"""
+    try:
+        return line_no, row, analyze_company_row(calc, row, sessions), None
+    except Exception as e:
+        return line_no, row, None, str(e)
+
+
+_worker_calc = None
+_worker_sessions: Dict[tuple, CompanySession] = {}
+
+
+def _init_company_worker(db_path: str):
+    """进程池子进程初始化：每个进程只构建一套计算器，八字与会话缓存随之在进程内复用"""
+    global _worker_calc
+    _worker_calc = CompanyCalculator(db_path=db_path)
+
+
+def _analyze_chunk(rows: List[Tuple[int, Dict]]) -> List[Tuple[int, Dict, Optional[Dict], Optional[str]]]:
+    """进程池任务：分析一块输入行"""
+    return [_analyze_safely(_worker_calc, line_no, row, _worker_sessions) for line_no, row in rows]
+
+
+class CompanyBatchProcessor:
+    """公司版批量处理器"""
+
+    def __init__(self, storage, db_path: str = 'local.db', output_format: str = 'json',
+                 workers: int = 1, chunk_size: int = CHUNK_SIZE):
+        """
+        :param storage: Storage 实例（历史记录由后台线程调用 save_company_results 批量写入）
+        :param db_path: 数据库路径，各工作进程据此构建计算器
+        :param output_format: 结果输出格式（json / jsonl / csv / sqlite）
+        :param workers: 大于 1 时在进程池中并行分析
+        :param chunk_size: 每个进程池任务包含的条数
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"不支持的输出格式: {output_format}")
+        self.storage = storage
+        self.db_path = db_path
+        self.output_format = output_format
+        self.workers = max(1, int(workers))
+        self.chunk_size = max(1, int(chunk_size))
+
+    def process_file(self, input_file: str, output_file: str) -> Dict:
+        """
+        处理公司批量输入文件，结果逐条写入 output_file
+        :return: {'success', 'total', 'success_count', 'failed_count', 'persist_failed_count',
+                  'top', 'output_file', 'summary_file'}
+        """
+        if not Path(input_file).exists():
+            return {
+                'success': False,
+                'error': f'文件不存在: {input_file}'
+            }
+
+        writer = open_result_writer(self.output_format, output_file,
+                                    columns=COMPANY_RESULT_COLUMNS, row_builder=company_score_row)
+        # 历史记录由后台线程批量落库
+        persister = WriteBehindQueue(self.storage)
+        stats = {'total': 0, 'success': 0, 'failed': 0}
+        errors = []
+        # 最高分的若干条：(总分, -序号, 全称, 评级) 小顶堆
+        top = []
+        try:
+            for line_no, row, result, error in self._analyze_all(input_file):
+                stats['total'] += 1
+                if result is None:
+                    stats['failed'] += 1
+                    logger.error(f"第 {line_no} 行 {row['full_name']} 分析失败: {error}")
+                    errors.append(f"第 {line_no} 行 {row['full_name']}: {error}")
+                    continue
+
+                stats['success'] += 1
+                persister.save_company_result(result)
+                writer.write(result)
+
+                scores = result.get('scores', {})
+                entry = (scores.get('total_score', 0), -stats['total'], row['full_name'], scores.get('grade', '-'))
+                if len(top) < SUMMARY_TOP_N:
+                    heapq.heappush(top, entry)
+                else:
+                    heapq.heappushpop(top, entry)
+        finally:
+            persist_stats = persister.close()
+            writer.close({
+                'input_file': str(input_file),
+                'process_time': datetime.now().strftime('%Y%m%d_%H%M%S'),
+                'total': writer.count,
+                'failed': stats['failed'],
+                'errors': errors[:100]
+            })
+
+        return {
+            'success': True,
+            'total': stats['total'],
+            'success_count': stats['success'],
+            'failed_count': stats['failed'],
+            'persist_failed_count': persist_stats['failed'],
+            'top': [(name, score, grade) for score, _, name, grade in sorted(top, reverse=True)],
+            'output_file': str(output_file),
+            'summary_file': str(output_file if self.output_format == 'sqlite' else writer.summary_path)
+        }
+
+    def _analyze_all(self, input_file: str) -> Iterator[Tuple[int, Dict, Optional[Dict], Optional[str]]]:
+        """按输入顺序产出 (行号, 输入行, 结果, 错误)"""
+        rows = iter_company_rows(input_file)
+        if self.workers <= 1:
+            calc = CompanyCalculator(db_path=self.db_path)
+            sessions = {}
+            for line_no, row in rows:
+                yield _analyze_safely(calc, line_no, row, sessions)
+            return
+
+        # 同时在途的块不超过 workers * 2 个，内存占用与输入条数无关
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_company_worker,
+                                 initargs=(self.db_path,)) as executor:
+            pending = deque()
+            for chunk in iter(lambda: list(islice(rows, self.chunk_size)), []):
+                pending.append(executor.submit(_analyze_chunk, chunk))
+                if len(pending) >= self.workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
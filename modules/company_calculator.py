@@ -2,7 +2,7 @@ import json
 import sqlite3
 import logging
 from typing import Dict, Any, List
-from .company_parser import parse_company_name
+from .company_parser import CompanyParser
 from .bazi_calculator import BaziCalculator
 from datetime import datetime
 from .industry_analyzer import IndustryAnalyzer
@@ -12,6 +12,20 @@ from .wuge_calculator import WugeCalculator
 
 logger = logging.getLogger(__name__)
 
+# 负责人八字缓存上限（条），超过时淘汰最早加入的
+BAZI_CACHE_SIZE = 1024
+
+# 名称对比的评分维度：(评分键, 显示名)，第一项为排名依据
+COMPARE_DIMENSIONS = [
+    ('total_score', '综合'),
+    ('wuge_score', '五格'),
+    ('industry_score', '行业'),
+    ('bazi_match_score', '八字'),
+    ('xiyong_match_score', '喜用'),
+    ('shengxiao_score', '生肖'),
+    ('ziyi_score', '字义'),
+]
+
 class CompanyCalculator:
     def __init__(self, data_dir: str = 'data', db_path: str = 'local.db'):
         self.data_dir = data_dir
@@ -20,9 +34,303 @@ class CompanyCalculator:
         self.wuge_calc = WugeCalculator(db_path=db_path)
         self.sx_analyzer = ShengxiaoAnalyzer(db_path=db_path)
         self.ziyi_analyzer = ZiyiAnalyzer(db_path=db_path)
+        # 八字计算器构造时要建立大量对照表，整个实例只建一次
+        self._bazi_calc = None
+        # 负责人八字缓存：(出生时间, 经度, 纬度) -> bazi_info
+        self._bazi_cache: Dict[tuple, Dict[str, Any]] = {}
+        # 名称解析器（含行业词自动机），首次使用时按 industry_config 构建
+        self._parser = None
+
+    def session(self, owner_bazi: Dict[str, Any], industry: str,
+                fallback_industry: str = '') -> 'CompanySession':
+        """创建分析会话：负责人与行业相关的数据只解析一次，之后可对任意多个名称打分"""
+        return CompanySession(owner_bazi, industry, self, fallback_industry)
 
     def analyze_single(self, prefix_name: str, main_name: str, suffix_name: str, form_org: str,
                        full_name: str, industry_type, bazi_info: Dict[str, Any]) -> Dict[str, Any]:
+        # 行业类型无法解析时回退到行业/经营特点
+        session = self.session(bazi_info, industry_type, suffix_name)
+        return session.analyze(prefix_name, main_name, suffix_name, form_org, full_name)
+
+    @property
+    def parser(self) -> CompanyParser:
+        """名称解析器：行业词典为内置行业词加 industry_config 中的行业中文名，只查询一次数据库"""
+        if self._parser is None:
+            industries = {}
+            try:
+                conn = sqlite3.connect(self.db_path)
+                cur = conn.cursor()
+                cur.execute('SELECT industry_name, industry_code FROM industry_config')
+                industries = {name: code for name, code in cur.fetchall() if name and code}
+            except Exception as e:
+                logger.warning(f"读取行业配置失败，仅使用内置行业词: {e}")
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._parser = CompanyParser(industries)
+        return self._parser
+
+    def _resolve_industry_code(self, industry_name_or_code: str) -> str:
+        """将用户输入的行业中文名或代码映射到标准industry_code（在内存词典中查找，不查数据库）。
+        精确匹配行业名/代码，其次取输入中出现的最长行业词，再次取包含该输入的行业名；找不到则抛出异常。
+        """
+        name = (industry_name_or_code or '').strip()
+        if not name:
+            raise Exception("行业名称或代码不能为空")
+        code = self.parser.industry_code(name)
+        if code:
+            return code
+        raise Exception("无法解析行业名称或代码: {}".format(industry_name_or_code))
+
+    def build_bazi_info(self, birth_time: str, longitude: float, latitude: float) -> Dict[str, Any]:
+        """桥接个人版八字计算，生成公司版所需的 bazi_info。
+        Args:
+            birth_time: 出生时间，格式 'YYYY-MM-DD HH:MM'
+            longitude: 经度
+            latitude: 纬度
+        Returns:
+            dict: 包含 'xiyong_shen', 'ji_shen', 'bazi_match_score'
+        """
+        key = (birth_time, float(longitude), float(latitude))
+        cached = self._bazi_cache.get(key)
+        if cached is not None:
+            # 返回副本，调用方修改不影响缓存
+            return dict(cached)
+
+        try:
+            dt = datetime.strptime(birth_time, "%Y-%m-%d %H:%M")
+        except ValueError:
+            # 尝试无分钟格式
+            dt = datetime.strptime(birth_time, "%Y-%m-%d %H")
+        if self._bazi_calc is None:
+            self._bazi_calc = BaziCalculator(db_path=self.db_path)
+        bazi_calc = self._bazi_calc
+        # 优先从万年历表获取当日干支数据，传入以避免降级路径与警告
+        try:
+            wn = bazi_calc._get_ganzhi_from_wannianli(dt)
+        except Exception:
+            wn = None
+        res = bazi_calc.calculate_bazi(dt, wannianli_data=wn, longitude=longitude, latitude=latitude)
+        bazi_info = {
+            'xiyong_shen': res.get('xiyong_shen', []),
+            'ji_shen': res.get('ji_shen', []),
+            'xiyong_desc': res.get('xiyong_desc', ''),
+            'bazi_match_score': int(res.get('score', 75)),
+            'birth_time': birth_time,
+            'bazi_str': res.get('bazi_str'),
+            'wuxing': res.get('wuxing'),
+            'lunar_date': res.get('lunar_date'),
+            'rizhu': res.get('rizhu'),
+            'tongyi': res.get('tongyi'),
+            'yilei': res.get('yilei'),
+            'siji': res.get('siji')
+        }
+        if len(self._bazi_cache) >= BAZI_CACHE_SIZE:
+            del self._bazi_cache[next(iter(self._bazi_cache))]
+        self._bazi_cache[key] = bazi_info
+        return dict(bazi_info)
+
+    def _grade(self, total: int) -> str:
+        if total >= 90:
+            return '极佳'
+        if total >= 80:
+            return '优秀'
+        if total >= 70:
+            return '良好'
+        if total >= 60:
+            return '及格'
+        return '不推荐'
+
+    def _calc_wuge_score(self, name: str) -> int:
+        # 简化版五格评分：以长度映射到区间
+        n = len(name)
+        if n <= 2:
+            return 60
+        if n == 3:
+            return 75
+        if n == 4:
+            return 85
+        if n == 5:
+            return 90
+        return 80
+
+    def _split_main_for_wuge(self, main: str) -> Dict[str, str]:
+        n = len(main or '')
+        if n <= 1:
+            return {'surname': '', 'given': main or ''}
+        if n == 2:
+            return {'surname': main[0], 'given': main[1]}
+        if n == 3:
+            return {'surname': main[0], 'given': main[1:]}
+        if n == 4:
+            return {'surname': main[:2], 'given': main[2:]}
+        # n > 4 视为双姓复名
+        return {'surname': main[:2], 'given': main[2:]}
+
+    def _get_char_details(self, text: str) -> List[Dict[str, Any]]:
+        if not text:
+            return []
+        items: List[Dict[str, Any]] = []
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cur = conn.cursor()
+            for ch in text:
+                cur.execute(
+                    "SELECT traditional, pinyin, strokes, wuxing, luck FROM kangxi_strokes WHERE character=?",
+                    (ch,)
+                )
+                row = cur.fetchone()
+                if row:
+                    trad, pinyin, strokes, wuxing, luck = row
+                    items.append({
+                        'char': ch,
+                        'traditional': trad or ch,
+                        'pinyin': pinyin or '',
+                        'strokes': strokes,
+                        'element': wuxing or '',
+                        'luck': luck or ''
+                    })
+                else:
+                    items.append({
+                        'char': ch,
+                        'traditional': ch,
+                        'pinyin': '',
+                        'strokes': None,
+                        'element': '',
+                        'luck': ''
+                    })
+        except Exception as e:
+            logger.exception(f"查询字符详情失败 for text={text}: {e}")
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return items
+
+    def batch_analyze(self, names: List[str], industry_type, bazi_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # TXT批量模式：names是完整公司名列表，同一负责人与行业，共用一个会话逐个分析
+        session = self.session(bazi_info, industry_type)
+        return [session.analyze_name(full_name) for full_name in names]
+
+    def compare(self, name_a: str, name_b: str, industry_type, bazi_info: Dict[str, Any]) -> Dict[str, Any]:
+        ranking = self.compare_names([name_a, name_b], industry_type, bazi_info)['ranking']
+        if len(ranking) == 1:
+            # 两个名称相同：rank 只分析一次，结果相同，不分优劣
+            result = ranking[0]['result']
+            return {'a': result, 'b': result, 'better': 'tie'}
+        a, b = sorted(ranking, key=lambda item: item['index'])
+        return {
+            'a': a['result'],
+            'b': b['result'],
+            'better': 'A' if a['rank'] == 1 else 'B'
+        }
+
+    def compare_names(self, names: List[str], industry_type, bazi_info: Dict[str, Any]) -> Dict[str, Any]:
+        """同一负责人、同一行业下对比多个候选名称，返回排名表，见 CompanySession.rank"""
+        session = self.session(bazi_info, industry_type)
+        return {
+            'industry_type': industry_type,
+            'industry_code': session.industry_code,
+            'dimensions': COMPARE_DIMENSIONS,
+            'ranking': session.rank(names)
+        }
+
+
+class CompanySession:
+    """公司名称分析会话
+
+    负责人相关（喜用神、忌神、生肖）与行业相关（行业代码、行业主五行、行业吉祥字）的数据在创建时
+    解析一次，之后 analyze 只做与名称有关的计算，适合同一负责人、同一行业下比较或批量评估多个名称。
+    """
+
+    def __init__(self, owner_bazi: Dict[str, Any], industry: str, calculator: CompanyCalculator,
+                 fallback_industry: str = ''):
+        """
+        :param owner_bazi: 负责人八字信息（build_bazi_info 的返回值或缺省八字）
+        :param industry: 行业中文名或行业代码
+        :param calculator: 提供各分析器的 CompanyCalculator
+        :param fallback_industry: industry 无法解析时尝试的行业名（如名称中的行业/经营特点）
+        """
+        self.calculator = calculator
+        self.owner_bazi = owner_bazi or {}
+        # 从八字中提取喜用神与忌神
+        self.xiyong_shen: List[str] = self.owner_bazi.get('xiyong_shen', [])
+        self.ji_shen: List[str] = self.owner_bazi.get('ji_shen', [])
+
+        # 在内存行业词典中解析中文行业名到标准industry_code（不查数据库）
+        self.industry_code = self._resolve_industry(industry, fallback_industry)
+        self.industry_wuxing = calculator.industry_analyzer._get_industry_wuxing(self.industry_code)
+        self.lucky_chars = calculator.industry_analyzer._get_lucky_chars(self.industry_code)
+
+        # 生肖只取决于负责人出生日期
+        self.birth_dt = self._owner_birth_date(self.owner_bazi)
+        self.shengxiao = calculator.sx_analyzer.get_shengxiao(self.birth_dt) if self.birth_dt else ''
+
+    def _resolve_industry(self, *candidates: str) -> str:
+        """依次尝试各候选行业（跳过空值），都无法解析时抛出第一个候选的错误"""
+        error = None
+        for test_industry in candidates:
+            if not (test_industry or '').strip():
+                continue
+            try:
+                industry_en_code = self.calculator._resolve_industry_code(test_industry)
+                logger.info(f"Resolved industry code: {test_industry} -> {industry_en_code}")
+                return industry_en_code
+            except Exception as e:
+                logger.error(f"Failed to resolve industry code for '{test_industry}': {e}")
+                error = error or e
+        if error is None:
+            # 没有任何非空候选：按空行业名报错
+            return self.calculator._resolve_industry_code('')
+        raise error
+
+    @staticmethod
+    def _owner_birth_date(bazi_info: Dict[str, Any]):
+        """取负责人出生日期（仅日期部分），没有时返回 None"""
+        birth_time_str = bazi_info.get('birth_time') or bazi_info.get('birth_dt')
+        if isinstance(birth_time_str, str) and len(birth_time_str) >= 10:
+            try:
+                return datetime.strptime(birth_time_str[:10], "%Y-%m-%d")
+            except Exception:
+                return None
+        return None
+
+    def analyze_name(self, full_name: str) -> Dict[str, Any]:
+        """分析一个完整公司名，不做拆分（全称即主名）"""
+        return self.analyze('', full_name, '', '', full_name)
+
+    def rank(self, names: List[str]) -> List[Dict[str, Any]]:
+        """
+        对多个候选名称打分并排名：按综合分降序，同分时按行业分降序，再按输入顺序
+        重复的名称只分析一次（保留第一次出现的位置）
+        :return: [{'rank', 'index', 'name', 'scores', 'deltas', 'result'}]，
+                 deltas 为各维度评分与第一名之差（第一名全为 0）
+        """
+        items = []
+        seen = set()
+        for index, name in enumerate(names):
+            if name in seen:
+                continue
+            seen.add(name)
+            result = self.analyze_name(name)
+            items.append({'index': index, 'name': name, 'scores': result['scores'], 'result': result})
+
+        items.sort(key=lambda item: (-item['scores']['total_score'], -item['scores']['industry_score'],
+                                     item['index']))
+        best = items[0]['scores'] if items else {}
+        for rank, item in enumerate(items, 1):
+            item['rank'] = rank
+            item['deltas'] = {key: item['scores'][key] - best[key] for key, _ in COMPARE_DIMENSIONS}
+        return items
+
+    def analyze(self, prefix_name: str, main_name: str, suffix_name: str, form_org: str,
+                full_name: str) -> Dict[str, Any]:
+        """分析一个名称，结构与 CompanyCalculator.analyze_single 的结果相同"""
+        calc = self.calculator
+        bazi_info = self.owner_bazi
         # 按用户要求：不在程序内拆分/拼接公司名，直接使用传入的全称
         parsed = {
             'full_name': full_name,
@@ -30,19 +338,10 @@ class CompanyCalculator:
             'prefix': prefix_name,
             'industry_code': suffix_name
         }
-        # 从八字中提取喜用神与忌神
-        xiyong_shen: List[str] = bazi_info.get('xiyong_shen', [])
-        ji_shen: List[str] = bazi_info.get('ji_shen', [])
+        xiyong_shen = self.xiyong_shen
+        ji_shen = self.ji_shen
         industry_code: str = parsed.get('industry_code', '')
-        
-        # 通过数据库解析中文行业名到标准industry_code（移除硬编码）
-        for test_industry in [industry_type, industry_code]:
-            try:
-                industry_en_code = self._resolve_industry_code(test_industry)
-                logger.info(f"Resolved industry code: {test_industry} -> {industry_en_code}")
-                break
-            except Exception as e:
-                logger.error(f"Failed to resolve industry code for '{test_industry}': {e}")
+        industry_en_code = self.industry_code
 
         # 生肖与字义分析（提前进行以获取生肖五行信息）
         shengxiao_detail = {}
@@ -53,31 +352,24 @@ class CompanyCalculator:
             # 优先使用主名做分析（更贴近字号）
             main_for_eval = parsed.get('main_name') or parsed.get('full_name') or full_name
             # 生肖：需要出生日期，若无则跳过并给中性分
-            birth_dt = None
-            birth_time_str = (bazi_info or {}).get('birth_time') or (bazi_info or {}).get('birth_dt')
-            if isinstance(birth_time_str, str) and len(birth_time_str) >= 10:
-                # 仅取日期部分
-                date_part = birth_time_str[:10]
-                try:
-                    birth_dt = datetime.strptime(date_part, "%Y-%m-%d")
-                except Exception:
-                    birth_dt = None
-            if birth_dt:
-                shengxiao_detail = self.sx_analyzer.analyze_shengxiao(main_for_eval, birth_dt)
+            if self.birth_dt:
+                shengxiao_detail = calc.sx_analyzer.analyze_shengxiao(main_for_eval, self.birth_dt,
+                                                                      self.shengxiao)
                 shengxiao_name = shengxiao_detail.get('shengxiao', '')
                 shengxiao_wuxing = shengxiao_detail.get('wuxing', '')
             # 字义：不依赖生日
-            ziyi_detail = self.ziyi_analyzer.analyze_ziyi(main_for_eval)
+            ziyi_detail = calc.ziyi_analyzer.analyze_ziyi(main_for_eval)
         except Exception:
             pass
         # 五行与喜用神分析（独立于行业，但包含生肖五行信息）
-        wuxing_result = self.industry_analyzer.calculate_wuxing_match_score(
+        wuxing_result = calc.industry_analyzer.calculate_wuxing_match_score(
             parsed['main_name'], industry_en_code, xiyong_shen, ji_shen,
-            shengxiao_name, shengxiao_wuxing
+            shengxiao_name, shengxiao_wuxing, industry_wuxing=self.industry_wuxing
         )
         
         # 行业吉祥字分析
-        lucky_char_result = self.industry_analyzer.calculate_lucky_char_score(parsed['main_name'], industry_en_code)
+        lucky_char_result = calc.industry_analyzer.calculate_lucky_char_score(
+            parsed['main_name'], industry_en_code, lucky=self.lucky_chars)
         
         # 获取喜用神描述
         xiyong_desc = bazi_info.get('xiyong_desc', '')
@@ -95,21 +387,17 @@ class CompanyCalculator:
             industry_grade = '及格'
         
         # 补充行业主五行
-        industry_wuxing = ''
-        try:
-            industry_wuxing = self.industry_analyzer._get_industry_wuxing(industry_en_code)
-        except Exception:
-            pass
+        industry_wuxing = self.industry_wuxing
 
         # 五格计算：全称与主名两套
         # 五格计算统一使用“全称作为名”，不做自动拆分
-        wuge_full = self.wuge_calc.calculate_wuge('', parsed.get('full_name', '') or '')
+        wuge_full = calc.wuge_calc.calculate_wuge('', parsed.get('full_name', '') or '')
 
         # 主名拆分为姓/名
         # 主名五格：同样不做拆分，避免误判
         main = parsed.get('main_name', '') or ''
         split = {'surname': '', 'given': main}
-        wuge_main = self.wuge_calc.calculate_wuge('', main)
+        wuge_main = calc.wuge_calc.calculate_wuge('', main)
 
         # 五格评分（占比15%）：取两套的均值
         wuge_total = int((wuge_full.get('score', 0) + wuge_main.get('score', 0)) / 2)
@@ -137,8 +425,8 @@ class CompanyCalculator:
 
         # 逐字清单（全称与主名）
         char_details = {
-            'full_name': self._get_char_details(full_name),
-            'main_name': self._get_char_details(parsed.get('main_name') or '')
+            'full_name': calc._get_char_details(full_name),
+            'main_name': calc._get_char_details(parsed.get('main_name') or '')
         }
 
         return {
@@ -151,7 +439,7 @@ class CompanyCalculator:
                 'shengxiao_score': shengxiao_score,
                 'ziyi_score': ziyi_score,
                 'total_score': total_score,
-                'grade': self._grade(total_score)
+                'grade': calc._grade(total_score)
             },
             'wuxing_analysis': {
                 'wuxing_dist': wuxing_result['wuxing_dist'],
@@ -209,169 +497,3 @@ class CompanyCalculator:
             },
             'char_details': char_details
         }
-
-    def _resolve_industry_code(self, industry_name_or_code: str) -> str:
-        """通过数据库将用户输入的行业中文名映射到标准industry_code。
-        若传入已为code则直接返回；找不到则返回原值或空字符串。
-        """
-        name = (industry_name_or_code or '').strip()
-        if not name:
-            raise Exception("行业名称或代码不能为空")
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cur = conn.cursor()
-            # 优先按中文名精确匹配
-            cur.execute('SELECT industry_code FROM industry_config WHERE industry_name = ?', (name,))
-            row = cur.fetchone()
-            if row and row[0]:
-                return row[0]
-            # 其次按code匹配（用户可能直接传code）
-            cur.execute('SELECT industry_code FROM industry_config WHERE industry_code = ?', (name,))
-            row = cur.fetchone()
-            if row and row[0]:
-                return row[0]
-            # 可选：按LIKE模糊匹配（避免误匹配，保守处理）
-            cur.execute('SELECT industry_code FROM industry_config WHERE industry_name LIKE ?', (f'%{name}%',))
-            row = cur.fetchone()
-            if row and row[0]:
-                return row[0]
-        except Exception:
-            pass
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
-        raise Exception("无法解析行业名称或代码: {}".format(industry_name_or_code))
-
-    def build_bazi_info(self, birth_time: str, longitude: float, latitude: float) -> Dict[str, Any]:
-        """桥接个人版八字计算，生成公司版所需的 bazi_info。
-        Args:
-            birth_time: 出生时间，格式 'YYYY-MM-DD HH:MM'
-            longitude: 经度
-            latitude: 纬度
-        Returns:
-            dict: 包含 'xiyong_shen', 'ji_shen', 'bazi_match_score'
-        """
-        try:
-            dt = datetime.strptime(birth_time, "%Y-%m-%d %H:%M")
-        except ValueError:
-            # 尝试无分钟格式
-            dt = datetime.strptime(birth_time, "%Y-%m-%d %H")
-        bazi_calc = BaziCalculator()
-        # 优先从万年历表获取当日干支数据，传入以避免降级路径与警告
-        try:
-            wn = bazi_calc._get_ganzhi_from_wannianli(dt)
-        except Exception:
-            wn = None
-        res = bazi_calc.calculate_bazi(dt, wannianli_data=wn, longitude=longitude, latitude=latitude)
-        return {
-            'xiyong_shen': res.get('xiyong_shen', []),
-            'ji_shen': res.get('ji_shen', []),
-            'xiyong_desc': res.get('xiyong_desc', ''),
-            'bazi_match_score': int(res.get('score', 75)),
-            'birth_time': birth_time,
-            'bazi_str': res.get('bazi_str'),
-            'wuxing': res.get('wuxing'),
-            'lunar_date': res.get('lunar_date'),
-            'rizhu': res.get('rizhu'),
-            'tongyi': res.get('tongyi'),
-            'yilei': res.get('yilei'),
-            'siji': res.get('siji')
-        }
-
-    def _grade(self, total: int) -> str:
-        if total >= 90:
-            return '极佳'
-        if total >= 80:
-            return '优秀'
-        if total >= 70:
-            return '良好'
-        if total >= 60:
-            return '及格'
-        return '不推荐'
-
-    def _calc_wuge_score(self, name: str) -> int:
-        # 简化版五格评分：以长度映射到区间
-        n = len(name)
-        if n <= 2:
-            return 60
-        if n == 3:
-            return 75
-        if n == 4:
-            return 85
-        if n == 5:
-            return 90
-        return 80
-
-    def _split_main_for_wuge(self, main: str) -> Dict[str, str]:
-        n = len(main or '')
-        if n <= 1:
-            return {'surname': '', 'given': main or ''}
-        if n == 2:
-            return {'surname': main[0], 'given': main[1]}
-        if n == 3:
-            return {'surname': main[0], 'given': main[1:]}
-        if n == 4:
-            return {'surname': main[:2], 'given': main[2:]}
-        # n > 4 视为双姓复名
-        return {'surname': main[:2], 'given': main[2:]}
-
-    def _get_char_details(self, text: str) -> List[Dict[str, Any]]:
-        if not text:
-            return []
-        items: List[Dict[str, Any]] = []
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cur = conn.cursor()
-            for ch in text:
-                cur.execute(
-                    "SELECT traditional, pinyin, strokes, wuxing, luck FROM kangxi_strokes WHERE character=?",
-                    (ch,)
-                )
-                row = cur.fetchone()
-                if row:
-                    trad, pinyin, strokes, wuxing, luck = row
-                    items.append({
-                        'char': ch,
-                        'traditional': trad or ch,
-                        'pinyin': pinyin or '',
-                        'strokes': strokes,
-                        'element': wuxing or '',
-                        'luck': luck or ''
-                    })
-                else:
-                    items.append({
-                        'char': ch,
-                        'traditional': ch,
-                        'pinyin': '',
-                        'strokes': None,
-                        'element': '',
-                        'luck': ''
-                    })
-        except Exception as e:
-            logger.exception(f"查询字符详情失败 for text={text}: {e}")
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
-        return items
-
-    def batch_analyze(self, names: List[str], industry_type, bazi_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-        # TXT批量模式：names是完整公司名列表，逐个分析
-        results = []
-        for full_name in names:
-            # 不做拆分，传入空字段
-            result = self.analyze_single('', full_name, '', '', full_name, industry_type, bazi_info)
-            results.append(result)
-        return results
-
-    def compare(self, name_a: str, name_b: str, bazi_info: Dict[str, Any]) -> Dict[str, Any]:
-        a = self.analyze_single('', name_a, '', '', name_a, bazi_info)
-        b = self.analyze_single('', name_b, '', '', name_b, bazi_info)
-        return {
-            'a': a,
-            'b': b,
-            'better': 'A' if a['scores']['total_score'] >= b['scores']['total_score'] else 'B'
-        }
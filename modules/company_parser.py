@@ -1,4 +1,5 @@
-from typing import Dict
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 # 行业后缀到行业代码的简易映射
 _INDUSTRY_SUFFIX_TO_CODE = {
@@ -14,38 +15,121 @@ _INDUSTRY_SUFFIX_TO_CODE = {
     '医疗': 'medical'
 }
 
+_ORG_FORMS = ['有限公司', '股份有限公司', '有限合伙', '集团', '中心']
+_PREFIX_CANDIDATES = ['北京', '上海', '深圳', '广州', '杭州', '南京', '天津', '重庆', '武汉', '成都', '香港', '澳门']
+
+
+class KeywordAutomaton:
+    """多模式匹配自动机（Aho-Corasick）：一次扫描找出文本中所有词典词，耗时与文本长度加匹配数成正比"""
+
+    def __init__(self, keywords: Dict[str, Any]):
+        """
+        :param keywords: 词 -> 附带值（如 ('industry', 'tech')）
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 每个状态结束的词：(词长, 词, 附带值)，含经失败链可达的词
+        self._out: List[List[Tuple[int, str, Any]]] = [[]]
+        for word, value in keywords.items():
+            if word:
+                self._add(word, value)
+        self._link()
+
+    def _add(self, word: str, value: Any):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(word), word, value))
+
+    def _link(self):
+        """按层（BFS）建立失败指针，并把失败状态的输出并入当前状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str, Any]]:
+        """产出文本中出现的所有词：(起始下标, 结束下标, 词, 附带值)，允许重叠"""
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, word, value in self._out[state]:
+                yield end - length, end, word, value
+
+
 class CompanyParser:
-    """解析公司名称结构：[行政区划] + [主名/字号] + [行业/后缀] + [组织形式]"""
+    """解析公司名称结构：[行政区划] + [主名/字号] + [行业/后缀] + [组织形式]
 
-    def parse(self, full_name: str) -> Dict:
-        org_forms = ['有限公司', '股份有限公司', '有限合伙', '集团', '中心']
-        industry_suffixes = list(_INDUSTRY_SUFFIX_TO_CODE.keys())
-        prefix_candidates = ['北京', '上海', '深圳', '广州', '杭州', '南京', '天津', '重庆', '武汉', '成都', '香港', '澳门']
+    区划、行业词、组织形式三类词典合并构建为一个自动机，名称只扫描一遍；
+    各段均取最长匹配（如“股份有限公司”优先于“有限公司”）。
+    """
+
+    def __init__(self, industries: Optional[Dict[str, str]] = None):
+        """
+        :param industries: 行业词 -> 行业代码（如 industry_config 中的行业中文名）；
+                           提供时内置行业词只保留其中出现的行业代码，再与之合并
+        """
+        self.industry_codes: Dict[str, str] = dict(_INDUSTRY_SUFFIX_TO_CODE)
+        if industries:
+            known = set(industries.values())
+            self.industry_codes = {word: code for word, code in self.industry_codes.items() if code in known}
+            self.industry_codes.update(industries)
+        self.codes = set(self.industry_codes.values())
 
+        keywords: Dict[str, List[Tuple[str, str]]] = {}
+        for word in _PREFIX_CANDIDATES:
+            keywords.setdefault(word, []).append(('prefix', word))
+        for word, code in self.industry_codes.items():
+            keywords.setdefault(word, []).append(('industry', code))
+        for word in _ORG_FORMS:
+            keywords.setdefault(word, []).append(('org_form', word))
+        self._automaton = KeywordAutomaton(keywords)
+
+    def parse(self, full_name: str) -> Dict:
         name = full_name.strip()
+        # 一次扫描收集各类词的匹配：类别 -> [(起始, 结束, 词, 附带值)]
+        found: Dict[str, List[Tuple[int, int, str, str]]] = {'prefix': [], 'industry': [], 'org_form': []}
+        for start, end, word, kinds in self._automaton.iter_matches(name):
+            for kind, value in kinds:
+                found[kind].append((start, end, word, value))
+
+        # 组织形式：结尾处的最长匹配
+        org_start = len(name)
         org_form = ''
-        for of in org_forms:
-            if name.endswith(of):
-                org_form = of
-                name = name[:-len(of)]
-                break
+        for start, end, word, _ in found['org_form']:
+            if end == len(name) and start < org_start:
+                org_start, org_form = start, word
 
+        # 行业后缀：紧接组织形式之前的最长匹配
+        industry_start = org_start
         industry_suffix = ''
-        for suf in industry_suffixes:
-            if name.endswith(suf):
-                industry_suffix = suf
-                name = name[:-len(suf)]
-                break
+        industry_code = ''
+        for start, end, word, code in found['industry']:
+            if end == org_start and start < industry_start:
+                industry_start, industry_suffix, industry_code = start, word, code
 
+        # 行政区划：开头处、不与行业后缀重叠的最长匹配
         prefix = ''
-        for pre in prefix_candidates:
-            if name.startswith(pre):
-                prefix = pre
-                name = name[len(pre):]
-                break
-
-        main = name
-        industry_code = _INDUSTRY_SUFFIX_TO_CODE.get(industry_suffix, '')
+        for start, end, word, _ in found['prefix']:
+            if start == 0 and end <= industry_start and len(word) > len(prefix):
+                prefix = word
+
+        main = name[len(prefix):industry_start]
         return {
             'full_name': full_name,
             'prefix': prefix,
@@ -55,7 +139,40 @@ class CompanyParser:
             'org_form': org_form,
         }
 
+    def industry_code(self, text: str) -> Optional[str]:
+        """
+        行业中文名或代码 -> 行业代码，不查数据库：
+        精确匹配行业词或代码；否则取文本中出现的最长行业词（如“文化传媒”->culture）；
+        再否则文本为某个行业词的一部分时取该行业（如“医疗”->“医疗健康”）；都找不到返回 None
+        """
+        text = (text or '').strip()
+        if not text:
+            return None
+        if text in self.industry_codes:
+            return self.industry_codes[text]
+        if text in self.codes:
+            return text
+
+        best = None
+        for start, end, word, kinds in self._automaton.iter_matches(text):
+            for kind, code in kinds:
+                if kind == 'industry' and (best is None or end - start > best[0]):
+                    best = (end - start, code)
+        if best:
+            return best[1]
+
+        for word, code in self.industry_codes.items():
+            if text in word:
+                return code
+        return None
+
+
+_default_parser: Optional[CompanyParser] = None
+
 
 def parse_company_name(full_name: str) -> Dict:
-    """提供函数接口以便 CompanyCalculator 调用"""
-    return CompanyParser().parse(full_name)
+    """提供函数接口以便 CompanyCalculator 调用（词典自动机只构建一次）"""
+    global _default_parser
+    if _default_parser is None:
+        _default_parser = CompanyParser()
+    return _default_parser.parse(full_name)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+预构建数据库模块 - 生成可直接分发的参考数据库及其清单，并在部署节点上校验
+
+构建结果只由资源文件内容决定：加载记录在导出前清除，各表的时间戳统一为构建时间
+（取环境变量 SOURCE_DATE_EPOCH，未设置时为 1970-01-01），最终用 VACUUM INTO 写出紧凑的新文件。数据库内的 db_manifest 表记录结构版本与源文件哈希，
+同名的 .manifest.json 额外记录数据库文件自身的 SHA-256，供下载后校验。
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from .loader import DataLoader, RESOURCE_FILES, SCHEMA_VERSION
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# 需要统一为构建时间的时间戳列
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at')
+
+
+def manifest_path_for(db_path: str) -> str:
+    """数据库文件对应的清单文件路径"""
+    return str(db_path) + '.manifest.json'
+
+
+def _file_digest(file_path: str, algorithm: str = 'sha256', chunk_size: int = 1024 * 1024) -> str:
+    """分块计算文件摘要（源文件用 md5，与加载记录中的文件哈希一致）"""
+    hasher = hashlib.new(algorithm)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class DatabaseBuilder:
+    """预构建数据库生成与校验类"""
+
+    def __init__(self, data_dir: str = 'data', workers: int = 1):
+        """
+        :param data_dir: 资源文件目录
+        :param workers: 加载资源时并行解析的进程数（不影响构建结果）
+        """
+        self.data_dir = Path(data_dir)
+        self.workers = workers
+
+    def build(self, output_path: str) -> Dict:
+        """
+        从资源文件构建参考数据库
+        :param output_path: 输出数据库路径（同时生成 <output_path>.manifest.json）
+        :return: {'success', 'path', 'manifest', 'errors'}
+        """
+        output = Path(output_path)
+        work_path = output.with_name(output.name + '.build')
+        vacuum_path = output.with_name(output.name + '.tmp')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        for path in (work_path, vacuum_path):
+            if path.exists():
+                path.unlink()
+
+        try:
+            loader = DataLoader(str(work_path), str(self.data_dir))
+            Storage(str(work_path))
+            load_result = loader.load_all_resources(force_reload=True, bulk=True, workers=self.workers)
+            if not load_result['success']:
+                return {'success': False, 'path': None, 'manifest': None, 'errors': load_result['errors']}
+
+            built_at = datetime.fromtimestamp(int(os.environ.get('SOURCE_DATE_EPOCH', '0')), timezone.utc)
+            manifest = {
+                'schema_version': str(SCHEMA_VERSION),
+                'built_at': built_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'sources': {filename: _file_digest(str(self.data_dir / filename), 'md5')
+                            for _, filename in RESOURCE_FILES}
+            }
+            self._finalize(str(work_path), manifest)
+
+            conn = sqlite3.connect(str(work_path))
+            try:
+                conn.execute('VACUUM INTO ?', (str(vacuum_path),))
+            finally:
+                conn.close()
+            os.replace(vacuum_path, output)
+
+            manifest['sha256'] = _file_digest(str(output))
+            manifest['size'] = output.stat().st_size
+            with open(manifest_path_for(str(output)), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+            logger.info(f"预构建数据库已生成: {output} ({manifest['size']:,} 字节)")
+            return {'success': True, 'path': str(output), 'manifest': manifest, 'errors': []}
+
+        except Exception as e:
+            logger.error(f"构建数据库失败: {e}")
+            return {'success': False, 'path': None, 'manifest': None, 'errors': [str(e)]}
+        finally:
+            for path in (work_path, vacuum_path):
+                if path.exists():
+                    path.unlink()
+
+    @staticmethod
+    def _finalize(db_path: str, manifest: Dict):
+        """清除与构建环境相关的数据，写入数据库清单并更新查询规划统计"""
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('DELETE FROM data_load_records')
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name='data_load_records'")
+
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+            for table in [row[0] for row in cursor.fetchall()]:
+                cursor.execute(f'PRAGMA table_info({table})')
+                for column in [row[1] for row in cursor.fetchall() if row[1] in TIMESTAMP_COLUMNS]:
+                    cursor.execute(f'UPDATE {table} SET {column} = ?', (manifest['built_at'],))
+
+            cursor.execute('DELETE FROM db_manifest')
+            rows = [('schema_version', manifest['schema_version']), ('built_at', manifest['built_at'])]
+            rows.extend((f'source:{filename}', file_hash) for filename, file_hash in manifest['sources'].items())
+            cursor.executemany('INSERT INTO db_manifest (key, value) VALUES (?, ?)', rows)
+
+            cursor.execute('ANALYZE')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def verify(self, db_path: str, manifest_path: Optional[str] = None) -> Dict:
+        """
+        校验下载的预构建数据库
+        :param manifest_path: 清单文件路径，默认 <db_path>.manifest.json
+        :return: {'valid', 'errors', 'manifest'}；本地存在的资源文件与构建时不一致也视为失败
+        """
+        result = {'valid': True, 'errors': [], 'manifest': None}
+        manifest_path = manifest_path or manifest_path_for(db_path)
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            result['valid'] = False
+            result['errors'].append(f"无法读取清单文件 {manifest_path}: {e}")
+            return result
+        result['manifest'] = manifest
+
+        if not Path(db_path).exists():
+            result['errors'].append(f"数据库文件不存在: {db_path}")
+        elif _file_digest(db_path) != manifest.get('sha256'):
+            result['errors'].append("数据库文件 SHA-256 与清单不一致")
+        else:
+            stored = DataLoader.read_manifest(db_path)
+            if stored.get('schema_version') != manifest.get('schema_version'):
+                result['errors'].append("数据库内清单与清单文件的结构版本不一致")
+            for filename, file_hash in manifest.get('sources', {}).items():
+                if stored.get(f'source:{filename}') != file_hash:
+                    result['errors'].append(f"数据库内清单与清单文件的源文件哈希不一致: {filename}")
+
+        if manifest.get('schema_version') != str(SCHEMA_VERSION):
+            result['errors'].append(
+                f"结构版本不匹配: 数据库为 {manifest.get('schema_version')}，程序要求 {SCHEMA_VERSION}"
+            )
+
+        for filename, file_hash in manifest.get('sources', {}).items():
+            local_file = self.data_dir / filename
+            if local_file.exists() and _file_digest(str(local_file), 'md5') != file_hash:
+                result['errors'].append(f"本地资源文件与构建时不一致: {filename}")
+
+        result['valid'] = not result['errors']
+        return result
@@ -1,5 +1,5 @@
 import sqlite3
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -287,7 +287,8 @@ class IndustryAnalyzer:
 
     def calculate_wuxing_match_score(self, main_name: str, industry_code: str,
                                      xiyong_shen: List[str], ji_shen: List[str] = None,
-                                     shengxiao: str = '', shengxiao_wuxing: str = '') -> Dict:
+                                     shengxiao: str = '', shengxiao_wuxing: str = '',
+                                     industry_wuxing: Optional[str] = None) -> Dict:
         """计算五行匹配分，集成关键原则和相对原则分析
         
         Args:
@@ -297,6 +298,7 @@ class IndustryAnalyzer:
             ji_shen: 忌神列表
             shengxiao: 生肖名称（如'龙'）
             shengxiao_wuxing: 生肖五行
+            industry_wuxing: 已查询的行业主五行（同一行业分析多个名称时传入，避免重复查询）
         
         Returns:
             Dict with:
@@ -311,7 +313,8 @@ class IndustryAnalyzer:
             ji_shen = []
         
         # 行业主五行来自数据库
-        industry_wuxing = self._get_industry_wuxing(industry_code)
+        if industry_wuxing is None:
+            industry_wuxing = self._get_industry_wuxing(industry_code)
         
         # 如果未传入生肖五行，从生肖名称推导
         if not shengxiao_wuxing and shengxiao:
@@ -407,9 +410,11 @@ class IndustryAnalyzer:
             'suggestions': []
         }
 
-    def calculate_lucky_char_score(self, main_name: str, industry_code: str) -> Dict:
-        # 从数据库读取行业吉祥字
-        lucky = self._get_lucky_chars(industry_code)
+    def calculate_lucky_char_score(self, main_name: str, industry_code: str,
+                                   lucky: Optional[Dict[str, Dict]] = None) -> Dict:
+        # 从数据库读取行业吉祥字（已查询过的由调用方传入）
+        if lucky is None:
+            lucky = self._get_lucky_chars(industry_code)
         found: List[str] = []
         score = 0
         detail: List[str] = []
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 流式解析模块 - 逐条读取大型资源文件中的数组元素
+
+资源文件格式为 {"version": ..., "data": [{...}, {...}, ...]}，
+按块读取文件并用 JSONDecoder.raw_decode 逐个解码数组元素，内存占用与单条记录大小相关，
+与文件大小无关。仅依赖标准库。
+"""
+
+import json
+from typing import Any, Dict, Iterator, Optional
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _JsonStreamReader:
+    """带缓冲的 JSON 文本读取器"""
+
+    def __init__(self, f, chunk_size: int):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """再读入一块数据，文件结束时返回 False"""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # 丢弃已解析部分，避免缓冲区无限增长
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符（文件结束时返回空串）"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """读取下一个非空白字符，且必须是 chars 之一"""
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"JSON 格式错误: 期望 {chars!r}，实际为 {ch!r}")
+        self._pos += 1
+        return ch
+
+    def value(self) -> Any:
+        """解码下一个完整的 JSON 值"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self._buffer, self._pos)
+                # 值恰好结束在缓冲区末尾时可能被截断（例如数字），需要读入更多数据确认
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+
+def iter_json_array(file_path: str, key: Optional[str] = 'data',
+                    header: Optional[Dict] = None, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    逐条读取 JSON 文件中的数组元素
+    :param file_path: JSON 文件路径
+    :param key: 顶层对象中数组所在的键；为 None 时文件本身是数组
+    :param header: 可选，传入字典时收集数组之前出现的其他顶层字段
+    :param chunk_size: 每次读取的字符数
+    :raises ValueError: 顶层对象中没有 key 字段，或 JSON 格式错误
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        reader = _JsonStreamReader(f, chunk_size)
+
+        if key is not None:
+            reader.expect('{')
+            if reader.peek() == '}':
+                raise ValueError(f"JSON 文件中没有 {key!r} 字段: {file_path}")
+            while True:
+                name = reader.value()
+                reader.expect(':')
+                if name == key:
+                    break
+                value = reader.value()
+                if header is not None:
+                    header[name] = value
+                if reader.expect(',}') == '}':
+                    # 缺少目标数组不能当作空数据，否则导入时会删除全部已有记录
+                    raise ValueError(f"JSON 文件中没有 {key!r} 字段: {file_path}")
+
+        if reader.expect('[') and reader.peek() == ']':
+            return
+        while True:
+            yield reader.value()
+            if reader.expect(',]') == ']':
+                return
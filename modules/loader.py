@@ -3,25 +3,193 @@
 加载模块 - 负责将依赖资源数据加载到数据库中
 """
 
+import re
 import sqlite3
 import json
 import hashlib
 import logging
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+from .json_stream import iter_json_array
+from .table_stats import TableStats, content_hash
+
 logger = logging.getLogger(__name__)
 
 
+# 资源名 -> 数据文件（按加载顺序）
+RESOURCE_FILES = [
+    ('kangxi', 'kangxi.json'),
+    ('ziyi', 'ziyi.json'),
+    ('nayin', 'nayin.json'),
+    ('shuli', 'shuli_wuxing.json'),
+    ('sancai', 'sancai.json'),
+    ('shengxiao', 'shengxiao.json'),
+    ('chenggu', 'chenggu.json'),
+    ('wannianli', 'wannianli.json'),
+    # 以下为公司版行业字库
+    ('industry_wuxing', 'industry_wuxing.json'),
+    ('industry_lucky_chars', 'industry_lucky_chars.json')
+]
+
+# 并行加载时每个资源队列最多缓存的行块数（每块 IMPORT_BATCH_SIZE 行）
+PARALLEL_QUEUE_CHUNKS = 8
+
+# 并行加载时等待队列的轮询间隔（秒），每次超时检查子进程任务是否已异常结束
+QUEUE_POLL_SECONDS = 0.5
+
+# 整体读取（非 data 数组格式）的资源
+WHOLE_FILE_RESOURCES = ('chenggu', 'industry_wuxing', 'industry_lucky_chars')
+
+# 每批 executemany 的行数
+IMPORT_BATCH_SIZE = 1000
+
+# 资源表结构版本，修改表结构时递增（预构建数据库的版本一致时才会被直接使用）
+SCHEMA_VERSION = 1
+
+# 资源表的二级索引（批量加载时先删除，导入完成后重建）
+SECONDARY_INDEXES = {
+    'idx_wannianli_date': 'CREATE INDEX IF NOT EXISTS idx_wannianli_date ON wannianli(gregorian_date)',
+    'idx_wannianli_ganzhi': 'CREATE INDEX IF NOT EXISTS idx_wannianli_ganzhi '
+                            'ON wannianli(year_ganzhi, month_ganzhi, day_ganzhi)'
+}
+
+# 六十甲子、五行、生肖，用于验证资源数据
+JIAZI = {'甲乙丙丁戊己庚辛壬癸'[i % 10] + '子丑寅卯辰巳午未申酉戌亥'[i % 12] for i in range(60)}
+WUXING = {'金', '木', '水', '火', '土'}
+SHENGXIAO = set('鼠牛虎兔龙蛇马羊猴鸡狗猪')
+
+# 验证失败时最多保留的错误明细条数（error_counts 统计全部错误）
+MAX_VALIDATION_ERRORS = 1000
+
+# 资源 -> [(字段, 规则, 参数, 错误说明)]，按列批量检查
+VALIDATION_RULES = {
+    'kangxi': [
+        ('character', 'char', None, "字符必须为单个汉字"),
+        ('strokes', 'int_range', (1, 64), "笔画数范围: 1-64"),
+        ('pinyin', 'required', None, "拼音不能为空"),
+    ],
+    'ziyi': [
+        ('character', 'char', None, "字符必须为单个汉字"),
+        ('pinyin', 'required', None, "拼音不能为空"),
+        ('meaning', 'required', None, "字义不能为空"),
+    ],
+    'nayin': [
+        ('ganzhi', 'choice', JIAZI, "干支必须为六十甲子之一"),
+        ('nayin', 'required', None, "纳音不能为空"),
+        ('wuxing', 'choice', WUXING, "五行必须为金木水火土之一"),
+    ],
+    'shuli': [
+        ('number', 'int_range', (1, 81), "数理范围: 1-81"),
+        ('wuxing', 'required', None, "五行不能为空"),
+    ],
+    'sancai': [
+        ('jixiong', 'required', None, "吉凶不能为空"),
+    ],
+    'shengxiao': [
+        ('shengxiao', 'choice', SHENGXIAO, "生肖名称无效"),
+    ],
+    'wannianli': [
+        ('gregorian_date', 'pattern', re.compile(r'\d{4}-\d{2}-\d{2}( \d{2}:\d{2}(:\d{2})?)?$'),
+         "公历日期格式应为 YYYY-MM-DD"),
+        ('year_ganzhi', 'choice', JIAZI, "年干支必须为六十甲子之一"),
+        ('month_ganzhi', 'choice', JIAZI, "月干支必须为六十甲子之一"),
+        ('day_ganzhi', 'choice', JIAZI, "日干支必须为六十甲子之一"),
+    ],
+}
+
+# 资源 -> {表名: (导入列, 行键列)}，行键用于增量比对
+RESOURCE_TABLES = {
+    'kangxi': {
+        'kangxi_strokes': (['character', 'traditional', 'strokes', 'pinyin', 'radical',
+                            'bs_strokes', 'ch_strokes', 'luck', 'wuxing'], ['character'])
+    },
+    'ziyi': {
+        'character_meanings': (['character', 'pinyin', 'meaning', 'tone', 'structure', 'radical'],
+                               ['character'])
+    },
+    'nayin': {
+        'wuxing_nayin': (['ganzhi', 'nayin', 'wuxing'], ['ganzhi'])
+    },
+    'shuli': {
+        'shuli_wuxing': (['number', 'wuxing', 'jixiong', 'comment'], ['number'])
+    },
+    'sancai': {
+        'sancai_jixiong': (['tian_wuxing', 'ren_wuxing', 'di_wuxing', 'jixiong', 'comment', 'score'],
+                           ['tian_wuxing', 'ren_wuxing', 'di_wuxing'])
+    },
+    'shengxiao': {
+        'shengxiao_xiji': (['shengxiao', 'xi_zigen', 'ji_zigen', 'xi_pianpang', 'ji_pianpang', 'comment'],
+                           ['shengxiao'])
+    },
+    'chenggu': {
+        'chenggu_weights': (['type', 'value', 'weight'], ['type', 'value']),
+        'chenggu_fortune': (['weight', 'fortune_text'], ['weight'])
+    },
+    'wannianli': {
+        'wannianli': ([
+            'gregorian_date', 'lunar_date', 'lunar_show', 'is_holiday',
+            'lunar_festival', 'gregorian_festival', 'yi', 'ji',
+            'shen_wei', 'tai_shen', 'chong', 'sui_sha',
+            'wuxing_jiazi', 'wuxing_year', 'wuxing_month', 'wuxing_day',
+            'moon_phase', 'star_east', 'star_west', 'peng_zu', 'jian_shen',
+            'year_ganzhi', 'month_ganzhi', 'day_ganzhi',
+            'lunar_month_name', 'zodiac', 'lunar_month', 'lunar_day', 'solar_term'
+        ], ['gregorian_date'])
+    },
+    'industry_wuxing': {
+        'industry_config': (['industry_code', 'industry_name', 'primary_wuxing', 'secondary_wuxing'],
+                            ['industry_code'])
+    },
+    'industry_lucky_chars': {
+        'industry_lucky_chars': (['industry_code', 'character', 'char_wuxing', 'frequency',
+                                  'score_bonus', 'meaning', 'examples'], ['industry_code', 'character'])
+    }
+}
+
+
 class DataLoader:
     """数据加载管理类"""
     
-    def __init__(self, db_path: str = 'local.db', data_dir: str = 'data'):
-        """初始化加载模块"""
+    def __init__(self, db_path: str = 'local.db', data_dir: str = 'data', allow_empty: bool = False):
+        """
+        初始化加载模块
+        :param allow_empty: 允许资源数据为空时清空已有的表；默认视为加载失败，保留原有数据
+        """
         self.db_path = db_path
         self.data_dir = Path(data_dir)
-        self._init_resource_tables()
+        self.bulk_mode = False
+        self.allow_empty = allow_empty
+        self.manifest = self.read_manifest(db_path)
+        if self.manifest.get('schema_version') == str(SCHEMA_VERSION):
+            logger.info("检测到预构建数据库，跳过资源表初始化")
+        else:
+            self._init_resource_tables()
+    
+    @staticmethod
+    def read_manifest(db_path: str) -> Dict[str, str]:
+        """读取数据库中的预构建清单 {键: 值}，不是预构建数据库时返回空字典"""
+        if not Path(db_path).exists():
+            return {}
+        
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='db_manifest'")
+            if not cursor.fetchone():
+                return {}
+            cursor.execute('SELECT key, value FROM db_manifest')
+            return dict(cursor.fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"读取数据库清单失败: {e}")
+            return {}
+        finally:
+            conn.close()
     
     def _init_resource_tables(self):
         """初始化资源表结构"""
@@ -29,6 +197,9 @@ class DataLoader:
         cursor = conn.cursor()
         
         try:
+            # 资源表可能与历史记录同库（local.db），空间回收模式与 Storage 保持一致
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            
             # 康熙字典笔画表
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS kangxi_strokes (
@@ -200,15 +371,8 @@ class DataLoader:
             ''')
             
             # 为万年历表创建索引以提高查询性能
-            cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_wannianli_date 
-            ON wannianli(gregorian_date)
-            ''')
-            
-            cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_wannianli_ganzhi 
-            ON wannianli(year_ganzhi, month_ganzhi, day_ganzhi)
-            ''')
+            for index_sql in SECONDARY_INDEXES.values():
+                cursor.execute(index_sql)
             
             # 数据加载记录表
             cursor.execute('''
@@ -224,6 +388,27 @@ class DataLoader:
             )
             ''')
             
+            # 资源行指纹表（增量重新加载时比对）
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS resource_row_fingerprints (
+                table_name TEXT NOT NULL,
+                row_key TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                PRIMARY KEY (table_name, row_key)
+            ) WITHOUT ROWID
+            ''')
+            
+            # 预构建数据库清单（由 --build-db 写入，本地加载修改资源后清空）
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS db_manifest (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+            ''')
+            
+            self._migrate_load_records(cursor)
+            self._init_table_stats(cursor)
+            
             conn.commit()
             logger.info("资源表初始化完成")
             
@@ -234,8 +419,39 @@ class DataLoader:
         finally:
             conn.close()
     
-    def load_all_resources(self, force_reload: bool = False) -> Dict:
-        """加载所有资源"""
+    def _migrate_load_records(self, cursor):
+        """迁移加载记录表（文件大小/修改时间用于解析前的快速判断，load_duration 为加载耗时秒数）"""
+        cursor.execute("PRAGMA table_info(data_load_records)")
+        columns = [row[1] for row in cursor.fetchall()]
+        
+        for col_name, col_type in [('file_size', 'INTEGER'), ('file_mtime_ns', 'INTEGER'),
+                                  ('load_duration', 'REAL')]:
+            if col_name not in columns:
+                logger.info(f"添加字段: data_load_records.{col_name}")
+                cursor.execute(f"ALTER TABLE data_load_records ADD COLUMN {col_name} {col_type}")
+        
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_data_load_records_resource
+        ON data_load_records(resource_name, load_time)
+        ''')
+    
+    def load_all_resources(self, force_reload: bool = False, bulk: bool = False,
+                           workers: int = 1) -> Dict:
+        """
+        加载所有资源
+        :param force_reload: 忽略文件未修改的判断，强制比对导入
+        :param bulk: 批量加载模式（放宽 synchronous/journal_mode、导入期间不维护二级索引，结束后 ANALYZE）
+        :param workers: 大于 1 时在进程池中并行解析/验证各资源，由当前进程单连接依次写入
+        """
+        if bulk:
+            self.bulk_mode = True
+            self._drop_secondary_indexes()
+            try:
+                return self.load_all_resources(force_reload, workers=workers)
+            finally:
+                self.bulk_mode = False
+                self._rebuild_secondary_indexes()
+        
         result = {
             'success': True,
             'loaded': [],
@@ -244,21 +460,8 @@ class DataLoader:
             'errors': []
         }
         
-        resources = [
-            ('kangxi', 'kangxi.json'),
-            ('ziyi', 'ziyi.json'),
-            ('nayin', 'nayin.json'),
-            ('shuli', 'shuli_wuxing.json'),
-            ('sancai', 'sancai.json'),
-            ('shengxiao', 'shengxiao.json'),
-            ('chenggu', 'chenggu.json'),
-            ('wannianli', 'wannianli.json'),
-            # 以下为公司版行业字库，作为外部资源登记加载记录，不入库
-            ('industry_wuxing', 'industry_wuxing.json'),
-            ('industry_lucky_chars', 'industry_lucky_chars.json')
-        ]
-        
-        for resource_name, filename in resources:
+        pending = []
+        for resource_name, filename in RESOURCE_FILES:
             file_path = self.data_dir / filename
             
             if not file_path.exists():
@@ -266,25 +469,29 @@ class DataLoader:
                 result['failed'].append(resource_name)
                 result['errors'].append(f"{resource_name}: 文件不存在")
                 continue
-            
-            try:
-                load_result = self.load_resource(resource_name, str(file_path), force_reload)
-                
-                if load_result['success']:
-                    result['loaded'].append(resource_name)
-                    result['statistics'][resource_name] = {
-                        'total': load_result['total'],
-                        'success': load_result['success_count'],
-                        'failed': load_result['failed_count']
-                    }
-                else:
-                    result['failed'].append(resource_name)
-                    result['errors'].extend(load_result.get('errors', []))
-                    
-            except Exception as e:
-                logger.error(f"加载资源 {resource_name} 失败: {e}")
+            pending.append((resource_name, str(file_path)))
+        
+        if workers > 1 and len(pending) > 1:
+            load_results = self._load_parallel(pending, force_reload, workers)
+        else:
+            load_results = (
+                (name, path, self.load_resource(name, path, force_reload)) for name, path in pending
+            )
+        
+        for resource_name, file_path, load_result in load_results:
+            if load_result['success']:
+                result['loaded'].append(resource_name)
+                result['statistics'][resource_name] = {
+                    'total': load_result['total'],
+                    'success': load_result['success_count'],
+                    'failed': load_result['failed_count'],
+                    'changes': load_result.get('changes', {}),
+                    'duration': load_result.get('duration', 0)
+                }
+            else:
+                logger.error(f"加载资源 {resource_name} 失败: {load_result.get('errors')}")
                 result['failed'].append(resource_name)
-                result['errors'].append(f"{resource_name}: {str(e)}")
+                result['errors'].extend(load_result.get('errors', []))
         
         result['success'] = len(result['failed']) == 0
         return result
@@ -293,82 +500,27 @@ class DataLoader:
                      force_reload: bool = False) -> Dict:
         """加载单个资源"""
         logger.info(f"开始加载资源: {resource_name}")
+        started = time.time()
         
         try:
-            # 读取文件
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            file_state = self._check_file_state(resource_name, file_path, force_reload)
+            if file_state is None:
+                return self._skipped_result()
             
-            # 计算文件哈希
-            file_hash = self._calculate_file_hash(file_path)
-            
-            # 检查是否需要重新加载
-            if not force_reload and self._is_loaded(resource_name, file_hash):
-                logger.info(f"资源 {resource_name} 已是最新版本，跳过加载")
-                return {
-                    'success': True,
-                    'total': 0,
-                    'success_count': 0,
-                    'failed_count': 0
-                }
-            
-            # 公司版行业资源：特殊处理（导入到行业表）
-            if resource_name in ('industry_wuxing', 'industry_lucky_chars'):
+            if resource_name in WHOLE_FILE_RESOURCES:
+                # 称骨、行业资源为嵌套对象且体积小，整体读取后直接导入
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                validation = None
                 import_result = self._import_data(resource_name, data)
-                validation = {
-                    'valid': True,
-                    'total': import_result.get('count', 0),
-                    'passed': import_result.get('count', 0),
-                    'failed': 0
-                }
-                # 记录加载历史
-                self._record_load_history(
-                    resource_name, file_path, file_hash,
-                    import_result['count'], 'success' if import_result['success'] else 'failed'
-                )
-                return {
-                    'success': import_result['success'],
-                    'total': validation['total'],
-                    'success_count': import_result['count'],
-                    'failed_count': validation['failed']
-                }
-
-            # 称骨数据特殊处理
-            if resource_name == 'chenggu':
-                # 称骨数据直接传递整个对象
-                import_result = self._import_data(resource_name, data)
-                validation = {
-                    'valid': True,
-                    'total': import_result.get('count', 0),
-                    'passed': import_result.get('count', 0),
-                    'failed': 0
-                }
             else:
-                # 验证数据
-                validation = self.validate_resource_data(resource_name, data.get('data', []))
-                
-                if not validation['valid']:
-                    logger.error(f"资源 {resource_name} 验证失败")
-                    return {
-                        'success': False,
-                        'errors': validation['errors']
-                    }
-                
-                # 导入数据
-                import_result = self._import_data(resource_name, data.get('data', []))
+                # 流式读取 data 数组：边解析、边验证、边导入，验证失败时整体回滚
+                validation = self._new_validation_result()
+                items = self._validated_items(resource_name, iter_json_array(file_path, 'data'), validation)
+                import_result = self._import_data(resource_name, items, validation)
             
-            # 记录加载历史
-            self._record_load_history(
-                resource_name, file_path, file_hash,
-                import_result['count'], 'success' if import_result['success'] else 'failed'
-            )
-            
-            return {
-                'success': import_result['success'],
-                'total': validation['total'],
-                'success_count': import_result['count'],
-                'failed_count': validation['failed']
-            }
+            return self._finish_load(resource_name, file_path, file_state, import_result,
+                                     validation, time.time() - started)
             
         except Exception as e:
             logger.exception(f"加载资源 {resource_name} 出错: {e}")
@@ -377,371 +529,602 @@ class DataLoader:
                 'errors': [str(e)]
             }
     
-    def validate_resource_data(self, resource_name: str, data: List) -> Dict:
-        """验证资源数据"""
+    def _load_parallel(self, pending: List[Tuple[str, str]], force_reload: bool,
+                       workers: int) -> Iterator[Tuple[str, str, Dict]]:
+        """
+        并行加载：子进程负责解析、验证、生成行与指纹，通过各自的有界队列送回；
+        当前进程按提交顺序逐个资源消费队列，用同一个连接写入（每个资源一个事务）
+        """
+        to_load = []
+        for resource_name, file_path in pending:
+            try:
+                file_state = self._check_file_state(resource_name, file_path, force_reload)
+            except Exception as e:
+                yield resource_name, file_path, {'success': False, 'errors': [str(e)]}
+                continue
+            if file_state is None:
+                yield resource_name, file_path, self._skipped_result()
+            else:
+                to_load.append((resource_name, file_path, file_state))
+        if not to_load:
+            return
+        
+        queues = [multiprocessing.Queue(maxsize=PARALLEL_QUEUE_CHUNKS) for _ in to_load]
+        conn = sqlite3.connect(self.db_path)
+        if self.bulk_mode:
+            self._apply_bulk_pragmas(conn)
+        
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(to_load)),
+                                       initializer=_init_loader_worker, initargs=(queues,))
+        futures = []
+        try:
+            # 任务按提交顺序执行，写入方等待的资源一定已开始解析，不会因队列满而互相等待
+            for index, (resource_name, file_path, _) in enumerate(to_load):
+                futures.append(executor.submit(_prepare_resource_rows, resource_name, file_path, index))
+            
+            for (resource_name, file_path, file_state), out_queue, future in zip(to_load, queues, futures):
+                logger.info(f"开始写入资源: {resource_name}")
+                state = {'validation': self._new_validation_result(), 'started': time.time(), 'error': None}
+                rows = _drain_row_queue(out_queue, state, future)
+                import_result = self._apply_rows(conn, resource_name, rows, state['validation'])
+                # 写入中途失败时子进程可能阻塞在已满的队列上，读完剩余的行让它结束，不占住进程池
+                _discard_rows(rows)
+                if state['error']:
+                    yield resource_name, file_path, {'success': False, 'errors': [state['error']]}
+                    continue
+                validation = None if resource_name in WHOLE_FILE_RESOURCES else state['validation']
+                yield resource_name, file_path, self._finish_load(
+                    resource_name, file_path, file_state, import_result,
+                    validation, time.time() - state['started']
+                )
+        finally:
+            _stop_loader_workers(executor, futures, queues)
+            conn.close()
+    
+    def _check_file_state(self, resource_name: str, file_path: str,
+                          force_reload: bool) -> Optional[Dict]:
+        """
+        解析前判断资源是否需要重新加载：大小和修改时间未变时只需一次 stat，
+        变化时再比对内容哈希（例如文件只是被 touch 过）
+        :return: 无需加载时返回 None，否则返回 {'file_hash', 'file_size', 'file_mtime_ns'}
+        """
+        stat = Path(file_path).stat()
+        file_size, file_mtime_ns = stat.st_size, stat.st_mtime_ns
+        last_load = None if force_reload else self._last_successful_load(resource_name)
+        
+        if last_load and (last_load['file_size'], last_load['file_mtime_ns']) == (file_size, file_mtime_ns):
+            logger.info(f"资源 {resource_name} 未修改，跳过加载")
+            return None
+        
+        file_hash = self._calculate_file_hash(file_path)
+        if last_load and last_load['file_hash'] == file_hash:
+            self._refresh_load_stat(last_load['id'], file_size, file_mtime_ns)
+            logger.info(f"资源 {resource_name} 内容未变化，跳过加载")
+            return None
+        
+        return {'file_hash': file_hash, 'file_size': file_size, 'file_mtime_ns': file_mtime_ns}
+    
+    def _finish_load(self, resource_name: str, file_path: str, file_state: Dict,
+                     import_result: Dict, validation: Optional[Dict], duration: float) -> Dict:
+        """记录加载历史并生成单个资源的加载结果"""
+        if validation is None:
+            # 整体读取的资源不做逐条验证
+            validation = {
+                'valid': True,
+                'total': import_result.get('count', 0),
+                'passed': import_result.get('count', 0),
+                'failed': 0
+            }
+        elif not validation['valid']:
+            logger.error(f"资源 {resource_name} 验证失败")
+            return {
+                'success': False,
+                'errors': validation['errors']
+            }
+        
+        # 记录加载历史
+        self._record_load_history(
+            resource_name, file_path, file_state['file_hash'],
+            import_result['count'], 'success' if import_result['success'] else 'failed',
+            file_state['file_size'], file_state['file_mtime_ns'], duration
+        )
+        
         result = {
+            'success': import_result['success'],
+            'total': validation['total'],
+            'success_count': import_result['count'],
+            'failed_count': validation['failed'],
+            'changes': import_result.get('changes', {}),
+            'duration': round(duration, 3)
+        }
+        if not import_result['success']:
+            result['errors'] = [import_result.get('error', f"{resource_name}: 导入数据失败")]
+        return result
+    
+    def validate_resource_data(self, resource_name: str, data: Iterable) -> Dict:
+        """
+        验证资源数据
+        :return: {'valid', 'total', 'passed', 'failed', 'errors', 'error_counts'}，
+                 errors 为 [{'index', 'field', 'value', 'reason'}]（index 为数据行序号，从 0 开始）
+        """
+        result = self._new_validation_result()
+        for _ in self._validated_items(resource_name, data, result):
+            pass
+        return result
+    
+    @staticmethod
+    def _new_validation_result() -> Dict:
+        return {
             'valid': True,
-            'total': len(data),
+            'total': 0,
             'passed': 0,
             'failed': 0,
-            'errors': []
+            'errors': [],
+            'error_counts': {}
         }
+    
+    @classmethod
+    def _validated_items(cls, resource_name: str, data: Iterable, result: Dict) -> Iterator[Dict]:
+        """
+        按块（IMPORT_BATCH_SIZE 条）做列式验证并产出通过验证的记录，验证结果累计到 result
+        迭代结束时 result['valid'] 才是最终结果
+        """
+        rules = VALIDATION_RULES.get(resource_name)
+        chunk = []
+        for item in data:
+            chunk.append(item)
+            if len(chunk) >= IMPORT_BATCH_SIZE:
+                yield from cls._validate_chunk(rules, chunk, result)
+                chunk = []
+        if chunk:
+            yield from cls._validate_chunk(rules, chunk, result)
         
-        for idx, item in enumerate(data):
-            try:
-                if resource_name == 'kangxi':
-                    self._validate_kangxi(item)
-                elif resource_name == 'ziyi':
-                    self._validate_ziyi(item)
-                elif resource_name == 'wannianli':
-                    self._validate_wannianli(item)
-                # 添加其他资源的验证...
-                
-                result['passed'] += 1
-                
-            except ValueError as e:
-                result['failed'] += 1
+        result['valid'] = result['failed'] == 0
+    
+    @staticmethod
+    def _validate_chunk(rules: Optional[List[Tuple]], chunk: List, result: Dict) -> List:
+        """
+        对一块记录按列逐条规则检查，返回通过验证的记录
+        每条规则对整列做一次推导式扫描，出错行与字段记入 result
+        """
+        offset = result['total']
+        result['total'] += len(chunk)
+        if not rules:
+            result['passed'] += len(chunk)
+            return chunk
+        
+        rows = [item if item.__class__ is dict else {} for item in chunk]
+        bad_rows = set()
+        
+        def report(field: str, indexes: List[int], column: List, reason: str):
+            if not indexes:
+                return
+            bad_rows.update(indexes)
+            result['error_counts'][field] = result['error_counts'].get(field, 0) + len(indexes)
+            room = MAX_VALIDATION_ERRORS - len(result['errors'])
+            for i in indexes[:max(room, 0)]:
                 result['errors'].append({
-                    'index': idx,
-                    'reason': str(e)
+                    'index': offset + i,
+                    'field': field,
+                    'value': column[i],
+                    'reason': reason
                 })
         
-        result['valid'] = result['failed'] == 0
-        return result
-    
-    def _validate_kangxi(self, item: Dict):
-        """验证康熙字典数据"""
-        if 'character' not in item or len(item['character']) != 1:
-            raise ValueError("字符必须为单个汉字")
-        if 'strokes' not in item or not (1 <= item['strokes'] <= 64):
-            raise ValueError("笔画数范围: 1-64")
-        if 'pinyin' not in item or not item['pinyin']:
-            raise ValueError("拼音不能为空")
-    
-    def _validate_ziyi(self, item: Dict):
-        """验证字义数据"""
-        if 'character' not in item or len(item['character']) != 1:
-            raise ValueError("字符必须为单个汉字")
-        if 'pinyin' not in item or not item['pinyin']:
-            raise ValueError("拼音不能为空")
-        if 'meaning' not in item or not item['meaning']:
-            raise ValueError("字义不能为空")
+        not_dict = [i for i, item in enumerate(chunk) if item.__class__ is not dict]
+        not_dict_set = set(not_dict)
+        report('*', not_dict, chunk, "记录必须为对象")
+        
+        for field, kind, arg, reason in rules:
+            column = [row.get(field) for row in rows]
+            if kind == 'required':
+                bad = [i for i, v in enumerate(column) if not v]
+            elif kind == 'char':
+                bad = [i for i, v in enumerate(column) if v.__class__ is not str or len(v) != 1]
+            elif kind == 'int_range':
+                low, high = arg
+                bad = [i for i, v in enumerate(column) if v.__class__ is not int or not low <= v <= high]
+            elif kind == 'choice':
+                bad = [i for i, v in enumerate(column) if v.__class__ is not str or v not in arg]
+            elif kind == 'pattern':
+                match = arg.match
+                bad = [i for i, v in enumerate(column) if v.__class__ is not str or not match(v)]
+            else:
+                raise ValueError(f"未知的验证规则: {kind}")
+            if not_dict:
+                bad = [i for i in bad if i not in not_dict_set]
+            report(field, bad, column, reason)
+        
+        result['failed'] += len(bad_rows)
+        result['passed'] += len(chunk) - len(bad_rows)
+        if not bad_rows:
+            return chunk
+        return [item for i, item in enumerate(chunk) if i not in bad_rows]
     
-    def _validate_wannianli(self, item: Dict):
-        """验证万年历数据"""
-        if 'gregorian_date' not in item or not item['gregorian_date']:
-            raise ValueError("公历日期不能为空")
-        if 'year_ganzhi' not in item or not item['year_ganzhi']:
-            raise ValueError("年干支不能为空")
-        if 'month_ganzhi' not in item or not item['month_ganzhi']:
-            raise ValueError("月干支不能为空")
-        if 'day_ganzhi' not in item or not item['day_ganzhi']:
-            raise ValueError("日干支不能为空")
+    def import_records(self, resource_name: str, records: Iterable[Dict]) -> Dict:
+        """
+        导入外部转换工具流式产生的记录（边验证边导入，验证失败时整体回滚）
+        :return: {'success', 'count', 'changes', 'validation'}
+        """
+        validation = self._new_validation_result()
+        result = self._import_data(
+            resource_name, self._validated_items(resource_name, records, validation), validation
+        )
+        result['validation'] = validation
+        return result
     
-    def _import_data(self, resource_name: str, data) -> Dict:
-        """导入数据到数据库"""
+    def _import_data(self, resource_name: str, data, validation: Optional[Dict] = None) -> Dict:
+        """
+        导入数据到数据库（按行比对指纹，只写入新增/修改/删除的行）
+        指纹表为空或与资源表行数不一致时，整表重建；写入统一按批 executemany
+        :param data: 资源数据，可以是流式读取的迭代器
+        :param validation: 边读边验证时的验证结果，数据读完后若验证未通过则回滚
+        """
         conn = sqlite3.connect(self.db_path)
+        if self.bulk_mode:
+            self._apply_bulk_pragmas(conn)
+        
+        try:
+            rows = (
+                (table, row, *self._row_fingerprint(resource_name, table, row))
+                for table, row in self._iter_rows(resource_name, data)
+            )
+            return self._apply_rows(conn, resource_name, rows, validation)
+        finally:
+            conn.close()
+    
+    def _apply_rows(self, conn, resource_name: str, rows: Iterable[Tuple[str, tuple, str, str]],
+                    validation: Optional[Dict] = None) -> Dict:
+        """
+        在一个事务中按指纹差异写入 (表名, 行, 行键, 内容哈希) 序列
+        """
         cursor = conn.cursor()
         count = 0
+        changes = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
         
         try:
-            if resource_name == 'kangxi':
-                for item in data:
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO kangxi_strokes 
-                    (character, traditional, strokes, pinyin, radical, bs_strokes, ch_strokes, luck, wuxing)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        item['character'],
-                        item.get('traditional', item['character']),
-                        item['strokes'],
-                        item.get('pinyin', ''),
-                        item.get('radical', ''),
-                        item.get('bs_strokes', 0),
-                        item.get('ch_strokes', 0),
-                        item.get('luck', ''),
-                        item.get('wuxing', '')
-                    ))
-                    count += 1
-            
-            elif resource_name == 'ziyi':
-                for item in data:
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO character_meanings
-                    (character, pinyin, meaning, tone, structure, radical)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        item['character'],
-                        item['pinyin'],
-                        item['meaning'],
-                        item.get('tones', [0])[0] if item.get('tones') else 0,
-                        item.get('structure', ''),
-                        item.get('bushou', '')
-                    ))
-                    count += 1
-            
-            elif resource_name == 'nayin':
-                for item in data:
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO wuxing_nayin
-                    (ganzhi, nayin, wuxing)
-                    VALUES (?, ?, ?)
-                    ''', (
-                        item['ganzhi'],
-                        item['nayin'],
-                        item['wuxing']
-                    ))
-                    count += 1
-            
-            elif resource_name == 'shuli':
-                for item in data:
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO shuli_wuxing
-                    (number, wuxing, jixiong, comment)
-                    VALUES (?, ?, ?, ?)
-                    ''', (
-                        item['number'],
-                        item['wuxing'],
-                        item.get('jixiong', ''),
-                        item.get('comment', '')
-                    ))
-                    count += 1
-            
-            elif resource_name == 'sancai':
-                for item in data:
-                    # 从 "木木木" 格式拆分出天人地三才
-                    sancai_str = item.get('sancai', '')
-                    if len(sancai_str) == 3:
-                        tian, ren, di = sancai_str[0], sancai_str[1], sancai_str[2]
-                    else:
-                        tian = item.get('tian', '')
-                        ren = item.get('ren', '')
-                        di = item.get('di', '')
-                    
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO sancai_jixiong
-                    (tian_wuxing, ren_wuxing, di_wuxing, jixiong, comment, score)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        tian,
-                        ren,
-                        di,
-                        item['jixiong'],
-                        item.get('comment', ''),
-                        item.get('score', 50)
-                    ))
-                    count += 1
-            
-            elif resource_name == 'shengxiao':
-                for item in data:
-                    # 将列表转换为逗号分隔的字符串
-                    xi_zigen = item.get('xi_zigen', [])
-                    ji_zigen = item.get('ji_zigen', [])
-                    xi_pianpang = item.get('xi_pianpang', [])
-                    ji_pianpang = item.get('ji_pianpang', [])
-                    
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO shengxiao_xiji
-                    (shengxiao, xi_zigen, ji_zigen, xi_pianpang, ji_pianpang, comment)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        item['shengxiao'],
-                        ','.join(xi_zigen) if isinstance(xi_zigen, list) else xi_zigen,
-                        ','.join(ji_zigen) if isinstance(ji_zigen, list) else ji_zigen,
-                        ','.join(xi_pianpang) if isinstance(xi_pianpang, list) else xi_pianpang,
-                        ','.join(ji_pianpang) if isinstance(ji_pianpang, list) else ji_pianpang,
-                        item.get('comment', '')
-                    ))
-                    count += 1
-            
-            elif resource_name == 'chenggu':
-                # 处理骨重数据
-                if 'weights' in data:
-                    weights = data['weights']
-                    # 处理年份骨重
-                    if 'year' in weights:
-                        for year_str, weight in weights['year'].items():
-                            cursor.execute('''
-                            INSERT OR REPLACE INTO chenggu_weights
-                            (type, value, weight)
-                            VALUES (?, ?, ?)
-                            ''', ('year', int(year_str), float(weight)))
-                            count += 1
-                    
-                    # 处理月份骨重
-                    if 'month' in weights:
-                        for month_str, weight in weights['month'].items():
-                            cursor.execute('''
-                            INSERT OR REPLACE INTO chenggu_weights
-                            (type, value, weight)
-                            VALUES (?, ?, ?)
-                            ''', ('month', int(month_str), float(weight)))
-                            count += 1
-                    
-                    # 处理日期骨重
-                    if 'day' in weights:
-                        for day_str, weight in weights['day'].items():
-                            cursor.execute('''
-                            INSERT OR REPLACE INTO chenggu_weights
-                            (type, value, weight)
-                            VALUES (?, ?, ?)
-                            ''', ('day', int(day_str), float(weight)))
-                            count += 1
-                    
-                    # 处理时辰骨重（需要转换时辰名称为序号）
-                    if 'hour' in weights:
-                        shichen_map = {
-                            '子': 0, '丑': 1, '寅': 2, '卯': 3,
-                            '辰': 4, '巳': 5, '午': 6, '未': 7,
-                            '申': 8, '酉': 9, '戌': 10, '亥': 11
-                        }
-                        for shichen_name, weight in weights['hour'].items():
-                            if shichen_name in shichen_map:
-                                cursor.execute('''
-                                INSERT OR REPLACE INTO chenggu_weights
-                                (type, value, weight)
-                                VALUES (?, ?, ?)
-                                ''', ('hour', shichen_map[shichen_name], float(weight)))
-                                count += 1
+            tables = RESOURCE_TABLES.get(resource_name, {})
+            old_hashes = {table: self._load_fingerprints(cursor, table) for table in tables}
+            seen_hashes = {table: {} for table in tables}
+            pending = {table: {'insert': [], 'update': [], 'fingerprint': []} for table in tables}
+            existing = 0
+            
+            for table in tables:
+                cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                table_count = cursor.fetchone()[0]
+                existing += table_count
+                if not old_hashes[table] or table_count != len(old_hashes[table]):
+                    logger.info(f"{table}: 无可用指纹，整表重建")
+                    cursor.execute(f'DELETE FROM {table}')
+                    cursor.execute('DELETE FROM resource_row_fingerprints WHERE table_name=?', (table,))
+                    old_hashes[table] = {}
+            
+            for table, row, key, row_hash in rows:
+                count += 1
                 
-                # 处理命格数据
-                if 'fortunes' in data:
-                    for fortune in data['fortunes']:
-                        # 使用平均值作为骨重
-                        avg_weight = (fortune['min_weight'] + fortune['max_weight']) / 2
-                        cursor.execute('''
-                        INSERT OR REPLACE INTO chenggu_fortune
-                        (weight, fortune_text)
-                        VALUES (?, ?)
-                        ''', (avg_weight, fortune['text']))
-                        count += 1
-            
-            elif resource_name == 'wannianli':
-                # 批量导入万年历数据以提高性能
-                batch_size = 1000
-                batch_data = []
+                # 同一批数据中键重复时以最后一条为准（与原 INSERT OR REPLACE 行为一致）
+                previous = seen_hashes[table].get(key, old_hashes[table].get(key))
+                seen_hashes[table][key] = row_hash
+                if previous == row_hash:
+                    changes['unchanged'] += 1
+                    continue
                 
-                for item in data:
-                    # 提取日期（去掉时间部分）
-                    gregorian_date = item['gregorian_date'].split(' ')[0] if ' ' in item['gregorian_date'] else item['gregorian_date']
-                    lunar_date = item.get('lunar_date', '').split(' ')[0] if item.get('lunar_date') and ' ' in item.get('lunar_date', '') else item.get('lunar_date', '')
-                    
-                    batch_data.append((
-                        gregorian_date,
-                        lunar_date,
-                        item.get('lunar_show', ''),
-                        item.get('is_holiday', False),
-                        item.get('lunar_festival', ''),
-                        item.get('gregorian_festival', ''),
-                        item.get('yi', ''),
-                        item.get('ji', ''),
-                        item.get('shen_wei', ''),
-                        item.get('tai_shen', ''),
-                        item.get('chong', ''),
-                        item.get('sui_sha', ''),
-                        item.get('wuxing_jiazi', ''),
-                        item.get('wuxing_year', ''),
-                        item.get('wuxing_month', ''),
-                        item.get('wuxing_day', ''),
-                        item.get('moon_phase', ''),
-                        item.get('star_east', ''),
-                        item.get('star_west', ''),
-                        item.get('peng_zu', ''),
-                        item.get('jian_shen', ''),
-                        item['year_ganzhi'],
-                        item['month_ganzhi'],
-                        item['day_ganzhi'],
-                        item.get('lunar_month_name', ''),
-                        item.get('zodiac', ''),
-                        item.get('lunar_month', ''),
-                        item.get('lunar_day', ''),
-                        item.get('solar_term', '')
-                    ))
-                    
-                    count += 1
-                    
-                    # 每批次提交一次
-                    if len(batch_data) >= batch_size:
-                        cursor.executemany('''
-                        INSERT OR REPLACE INTO wannianli (
-                            gregorian_date, lunar_date, lunar_show, is_holiday,
-                            lunar_festival, gregorian_festival, yi, ji,
-                            shen_wei, tai_shen, chong, sui_sha,
-                            wuxing_jiazi, wuxing_year, wuxing_month, wuxing_day,
-                            moon_phase, star_east, star_west, peng_zu, jian_shen,
-                            year_ganzhi, month_ganzhi, day_ganzhi,
-                            lunar_month_name, zodiac, lunar_month, lunar_day, solar_term
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', batch_data)
-                        conn.commit()
-                        logger.info(f"已导入 {count} 条万年历记录...")
-                        batch_data = []
+                batch = pending[table]
+                if previous is None:
+                    batch['insert'].append(row)
+                    changes['inserted'] += 1
+                else:
+                    columns, key_columns = tables[table]
+                    batch['update'].append((*row, *[row[columns.index(c)] for c in key_columns]))
+                    changes['updated'] += 1
+                batch['fingerprint'].append((table, key, row_hash))
                 
-                # 提交剩余数据
-                if batch_data:
-                    cursor.executemany('''
-                    INSERT OR REPLACE INTO wannianli (
-                        gregorian_date, lunar_date, lunar_show, is_holiday,
-                        lunar_festival, gregorian_festival, yi, ji,
-                        shen_wei, tai_shen, chong, sui_sha,
-                        wuxing_jiazi, wuxing_year, wuxing_month, wuxing_day,
-                        moon_phase, star_east, star_west, peng_zu, jian_shen,
-                        year_ganzhi, month_ganzhi, day_ganzhi,
-                        lunar_month_name, zodiac, lunar_month, lunar_day, solar_term
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', batch_data)
-            
-            elif resource_name == 'industry_wuxing':
-                # data 是 {industry_code: {industry_name, primary_wuxing, secondary_wuxing}}
-                for code, info in (data or {}).items():
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO industry_config
-                    (industry_code, industry_name, primary_wuxing, secondary_wuxing)
-                    VALUES (?, ?, ?, ?)
-                    ''', (
-                        code,
-                        info.get('industry_name', code),
-                        info.get('primary_wuxing', ''),
-                        info.get('secondary_wuxing', '')
-                    ))
-                    count += 1
-
-            elif resource_name == 'industry_lucky_chars':
-                # data 是 {industry_code: {char: {char_wuxing, frequency, score_bonus, meaning, examples}}}
-                for code, chars in (data or {}).items():
-                    for ch, meta in (chars or {}).items():
-                        examples = meta.get('examples', [])
-                        cursor.execute('''
-                        INSERT OR REPLACE INTO industry_lucky_chars
-                        (industry_code, character, char_wuxing, frequency, score_bonus, meaning, examples)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            code,
-                            ch,
-                            meta.get('char_wuxing', ''),
-                            int(meta.get('frequency', 0)) if meta.get('frequency') is not None else None,
-                            int(meta.get('score_bonus', 0)) if meta.get('score_bonus') is not None else None,
-                            meta.get('meaning', ''),
-                            json.dumps(examples, ensure_ascii=False) if isinstance(examples, list) else str(examples)
-                        ))
-                        count += 1
+                if len(batch['fingerprint']) >= IMPORT_BATCH_SIZE:
+                    self._flush_import_batch(cursor, table, tables[table], batch)
+            
+            for table in tables:
+                self._flush_import_batch(cursor, table, tables[table], pending[table])
+            
+            # 资源数据为空时不能清空已有的表（例如文件缺少 data 数组），除非显式允许
+            if count == 0 and existing and not self.allow_empty:
+                conn.rollback()
+                error = f"{resource_name}: 资源数据为空，拒绝删除已有的 {existing} 行"
+                logger.error(error)
+                return {'success': False, 'count': 0, 'changes': changes, 'error': error}
+            
+            # 源数据中已不存在的行
+            for table, (columns, key_columns) in tables.items():
+                stale = list(old_hashes[table].keys() - seen_hashes[table].keys())
+                if not stale:
+                    continue
+                where = ' AND '.join(f'{c}=?' for c in key_columns)
+                cursor.executemany(f'DELETE FROM {table} WHERE {where}', [json.loads(k) for k in stale])
+                cursor.executemany(
+                    'DELETE FROM resource_row_fingerprints WHERE table_name=? AND row_key=?',
+                    [(table, k) for k in stale]
+                )
+                changes['deleted'] += len(stale)
+            
+            if validation is not None and not validation['valid']:
+                conn.rollback()
+                return {'success': False, 'count': 0, 'changes': changes}
+            
+            if self.manifest and any(changes[k] for k in ('inserted', 'updated', 'deleted')):
+                # 资源已在本地修改，不再视为预构建数据库
+                cursor.execute('DELETE FROM db_manifest')
+                self.manifest = {}
+            
+            # 导入后表中恰好是本次出现的全部行键，行数与内容指纹可直接由内存中的指纹得出
+            for table in tables:
+                TableStats.set(cursor, table, len(seen_hashes[table]),
+                               content_hash(sorted(seen_hashes[table].items())))
             
             conn.commit()
-            logger.info(f"成功导入 {count} 条记录到 {resource_name}")
-            return {'success': True, 'count': count}
+            logger.info(
+                f"{resource_name}: 共 {count} 条，新增 {changes['inserted']}，"
+                f"修改 {changes['updated']}，删除 {changes['deleted']}，未变 {changes['unchanged']}"
+            )
+            return {'success': True, 'count': count, 'changes': changes}
             
         except Exception as e:
             conn.rollback()
             logger.error(f"导入数据失败: {e}")
-            return {'success': False, 'count': 0}
+            return {'success': False, 'count': 0, 'changes': changes, 'error': str(e)}
+    
+    @staticmethod
+    def _init_table_stats(cursor):
+        """创建统计元数据表，并为尚无统计的资源表做一次 COUNT(*) 初始化（兼容旧库）"""
+        TableStats.ensure_schema(cursor)
+        cursor.execute('SELECT table_name FROM table_stats')
+        tracked = {row[0] for row in cursor.fetchall()}
+        for spec in RESOURCE_TABLES.values():
+            for table in spec:
+                if table in tracked:
+                    continue
+                cursor.execute(
+                    'SELECT row_key, row_hash FROM resource_row_fingerprints WHERE table_name=? ORDER BY row_key',
+                    (table,)
+                )
+                rows = cursor.fetchall()
+                cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                TableStats.set(cursor, table, cursor.fetchone()[0], content_hash(rows))
+                tracked.add(table)
+    
+    @staticmethod
+    def _row_fingerprint(resource_name: str, table: str, row: tuple) -> Tuple[str, str]:
+        """计算行键（JSON 编码的键列值）与整行内容哈希"""
+        columns, key_columns = RESOURCE_TABLES[resource_name][table]
+        key = json.dumps([row[columns.index(c)] for c in key_columns], ensure_ascii=False)
+        row_hash = hashlib.md5(
+            json.dumps(row, ensure_ascii=False, default=str).encode('utf-8')
+        ).hexdigest()
+        return key, row_hash
+    
+    def _flush_import_batch(self, cursor, table: str, spec: Tuple[List[str], List[str]], batch: Dict):
+        """批量写入一个表的待插入/待更新行及其指纹"""
+        columns, key_columns = spec
+        if batch['insert']:
+            placeholders = ', '.join('?' for _ in columns)
+            cursor.executemany(
+                f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders})', batch['insert']
+            )
+        if batch['update']:
+            assignments = ', '.join(f'{c}=?' for c in columns)
+            where = ' AND '.join(f'{c}=?' for c in key_columns)
+            cursor.executemany(f'UPDATE {table} SET {assignments} WHERE {where}', batch['update'])
+        if batch['fingerprint']:
+            cursor.executemany('''
+            INSERT OR REPLACE INTO resource_row_fingerprints (table_name, row_key, row_hash)
+            VALUES (?, ?, ?)
+            ''', batch['fingerprint'])
+        for rows in batch.values():
+            rows.clear()
+    
+    @staticmethod
+    def _apply_bulk_pragmas(conn):
+        """批量加载期间放宽持久性要求（进程崩溃时需重新执行 --reload-data）"""
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('PRAGMA journal_mode = MEMORY')
+    
+    def _drop_secondary_indexes(self):
+        """批量加载前删除资源表的二级索引"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for index_name in SECONDARY_INDEXES:
+                conn.execute(f'DROP INDEX IF EXISTS {index_name}')
+            conn.commit()
         finally:
             conn.close()
     
-    def check_resource_integrity(self) -> Dict:
-        """检查资源完整性"""
+    def _rebuild_secondary_indexes(self):
+        """批量加载后重建二级索引并更新查询规划统计"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            for index_sql in SECONDARY_INDEXES.values():
+                conn.execute(index_sql)
+            conn.execute('ANALYZE')
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _load_fingerprints(self, cursor, table: str) -> Dict[str, str]:
+        """读取资源表的行指纹 {行键: 内容哈希}"""
+        cursor.execute(
+            'SELECT row_key, row_hash FROM resource_row_fingerprints WHERE table_name=?', (table,)
+        )
+        return dict(cursor.fetchall())
+    
+    @staticmethod
+    def _iter_rows(resource_name: str, data) -> Iterator[Tuple[str, tuple]]:
+        """将资源数据转换为 (表名, 行) 序列，列顺序与 RESOURCE_TABLES 一致"""
+        if resource_name == 'kangxi':
+            for item in data:
+                yield 'kangxi_strokes', (
+                    item['character'],
+                    item.get('traditional', item['character']),
+                    item['strokes'],
+                    item.get('pinyin', ''),
+                    item.get('radical', ''),
+                    item.get('bs_strokes', 0),
+                    item.get('ch_strokes', 0),
+                    item.get('luck', ''),
+                    item.get('wuxing', '')
+                )
+        
+        elif resource_name == 'ziyi':
+            for item in data:
+                yield 'character_meanings', (
+                    item['character'],
+                    item['pinyin'],
+                    item['meaning'],
+                    item.get('tones', [0])[0] if item.get('tones') else 0,
+                    item.get('structure', ''),
+                    item.get('bushou', '')
+                )
+        
+        elif resource_name == 'nayin':
+            for item in data:
+                yield 'wuxing_nayin', (
+                    item['ganzhi'],
+                    item['nayin'],
+                    item['wuxing']
+                )
+        
+        elif resource_name == 'shuli':
+            for item in data:
+                yield 'shuli_wuxing', (
+                    item['number'],
+                    item['wuxing'],
+                    item.get('jixiong', ''),
+                    item.get('comment', '')
+                )
+        
+        elif resource_name == 'sancai':
+            for item in data:
+                # 从 "木木木" 格式拆分出天人地三才
+                sancai_str = item.get('sancai', '')
+                if len(sancai_str) == 3:
+                    tian, ren, di = sancai_str[0], sancai_str[1], sancai_str[2]
+                else:
+                    tian = item.get('tian', '')
+                    ren = item.get('ren', '')
+                    di = item.get('di', '')
+                
+                yield 'sancai_jixiong', (
+                    tian,
+                    ren,
+                    di,
+                    item['jixiong'],
+                    item.get('comment', ''),
+                    item.get('score', 50)
+                )
+        
+        elif resource_name == 'shengxiao':
+            for item in data:
+                # 将列表转换为逗号分隔的字符串
+                xi_zigen = item.get('xi_zigen', [])
+                ji_zigen = item.get('ji_zigen', [])
+                xi_pianpang = item.get('xi_pianpang', [])
+                ji_pianpang = item.get('ji_pianpang', [])
+                
+                yield 'shengxiao_xiji', (
+                    item['shengxiao'],
+                    ','.join(xi_zigen) if isinstance(xi_zigen, list) else xi_zigen,
+                    ','.join(ji_zigen) if isinstance(ji_zigen, list) else ji_zigen,
+                    ','.join(xi_pianpang) if isinstance(xi_pianpang, list) else xi_pianpang,
+                    ','.join(ji_pianpang) if isinstance(ji_pianpang, list) else ji_pianpang,
+                    item.get('comment', '')
+                )
+        
+        elif resource_name == 'chenggu':
+            # 处理骨重数据
+            weights = data.get('weights', {})
+            for weight_type in ('year', 'month', 'day'):
+                for value_str, weight in weights.get(weight_type, {}).items():
+                    yield 'chenggu_weights', (weight_type, int(value_str), float(weight))
+            
+            # 处理时辰骨重（需要转换时辰名称为序号）
+            shichen_map = {
+                '子': 0, '丑': 1, '寅': 2, '卯': 3,
+                '辰': 4, '巳': 5, '午': 6, '未': 7,
+                '申': 8, '酉': 9, '戌': 10, '亥': 11
+            }
+            for shichen_name, weight in weights.get('hour', {}).items():
+                if shichen_name in shichen_map:
+                    yield 'chenggu_weights', ('hour', shichen_map[shichen_name], float(weight))
+            
+            # 处理命格数据（使用平均值作为骨重）
+            for fortune in data.get('fortunes', []):
+                avg_weight = (fortune['min_weight'] + fortune['max_weight']) / 2
+                yield 'chenggu_fortune', (avg_weight, fortune['text'])
+        
+        elif resource_name == 'wannianli':
+            for item in data:
+                # 提取日期（去掉时间部分）
+                gregorian_date = item['gregorian_date'].split(' ')[0] if ' ' in item['gregorian_date'] else item['gregorian_date']
+                lunar_date = item.get('lunar_date', '').split(' ')[0] if item.get('lunar_date') and ' ' in item.get('lunar_date', '') else item.get('lunar_date', '')
+                
+                yield 'wannianli', (
+                    gregorian_date,
+                    lunar_date,
+                    item.get('lunar_show', ''),
+                    item.get('is_holiday', False),
+                    item.get('lunar_festival', ''),
+                    item.get('gregorian_festival', ''),
+                    item.get('yi', ''),
+                    item.get('ji', ''),
+                    item.get('shen_wei', ''),
+                    item.get('tai_shen', ''),
+                    item.get('chong', ''),
+                    item.get('sui_sha', ''),
+                    item.get('wuxing_jiazi', ''),
+                    item.get('wuxing_year', ''),
+                    item.get('wuxing_month', ''),
+                    item.get('wuxing_day', ''),
+                    item.get('moon_phase', ''),
+                    item.get('star_east', ''),
+                    item.get('star_west', ''),
+                    item.get('peng_zu', ''),
+                    item.get('jian_shen', ''),
+                    item['year_ganzhi'],
+                    item['month_ganzhi'],
+                    item['day_ganzhi'],
+                    item.get('lunar_month_name', ''),
+                    item.get('zodiac', ''),
+                    item.get('lunar_month', ''),
+                    item.get('lunar_day', ''),
+                    item.get('solar_term', '')
+                )
+        
+        elif resource_name == 'industry_wuxing':
+            # data 是 {industry_code: {industry_name, primary_wuxing, secondary_wuxing}}
+            for code, info in (data or {}).items():
+                yield 'industry_config', (
+                    code,
+                    info.get('industry_name', code),
+                    info.get('primary_wuxing', ''),
+                    info.get('secondary_wuxing', '')
+                )
         
+        elif resource_name == 'industry_lucky_chars':
+            # data 是 {industry_code: {char: {char_wuxing, frequency, score_bonus, meaning, examples}}}
+            for code, chars in (data or {}).items():
+                for ch, meta in (chars or {}).items():
+                    examples = meta.get('examples', [])
+                    yield 'industry_lucky_chars', (
+                        code,
+                        ch,
+                        meta.get('char_wuxing', ''),
+                        int(meta.get('frequency', 0)) if meta.get('frequency') is not None else None,
+                        int(meta.get('score_bonus', 0)) if meta.get('score_bonus') is not None else None,
+                        meta.get('meaning', ''),
+                        json.dumps(examples, ensure_ascii=False) if isinstance(examples, list) else str(examples)
+                    )
+    
+    def check_resource_integrity(self, deep: bool = False) -> Dict:
+        """
+        检查资源完整性
+        :param deep: 为 False 时读取表统计元数据；为 True 时重新 COUNT(*) 并修正元数据
+        """
         result = {
             'complete': True,
             'missing_resources': [],
@@ -760,44 +1143,67 @@ class DataLoader:
             'wannianli'
         ]
         
-        try:
-            for table in tables:
-                cursor.execute(f'SELECT COUNT(*) FROM {table}')
-                count = cursor.fetchone()[0]
-                if count == 0:
-                    result['empty_tables'].append(table)
-                    result['complete'] = False
-        
-        finally:
-            conn.close()
+        stats = TableStats(self.db_path).get_all(deep=deep)
+        for table in tables:
+            if stats.get(table, {}).get('row_count', 0) == 0:
+                result['empty_tables'].append(table)
+                result['complete'] = False
         
         return result
     
-    def _calculate_file_hash(self, file_path: str) -> str:
-        """计算文件哈希值"""
+    def _calculate_file_hash(self, file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """分块计算文件哈希值（不将整个文件读入内存）"""
         hasher = hashlib.md5()
         with open(file_path, 'rb') as f:
-            hasher.update(f.read())
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
         return hasher.hexdigest()
     
-    def _is_loaded(self, resource_name: str, file_hash: str) -> bool:
-        """检查资源是否已加载"""
+    def _last_successful_load(self, resource_name: str) -> Optional[Dict]:
+        """查询资源最近一次成功加载的记录"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
             cursor.execute('''
-            SELECT COUNT(*) FROM data_load_records
-            WHERE resource_name=? AND file_hash=? AND load_status='success'
-            ORDER BY load_time DESC LIMIT 1
-            ''', (resource_name, file_hash))
-            
-            return cursor.fetchone()[0] > 0
+            SELECT id, file_hash, file_size, file_mtime_ns FROM data_load_records
+            WHERE resource_name=? AND load_status='success'
+            ORDER BY load_time DESC, id DESC LIMIT 1
+            ''', (resource_name,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return {'id': row[0], 'file_hash': row[1], 'file_size': row[2], 'file_mtime_ns': row[3]}
         finally:
             conn.close()
     
+    def _refresh_load_stat(self, record_id: int, file_size: int, file_mtime_ns: int):
+        """内容未变但修改时间变化时，更新加载记录中的文件状态，下次直接命中快速判断"""
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            conn.execute(
+                'UPDATE data_load_records SET file_size=?, file_mtime_ns=? WHERE id=?',
+                (file_size, file_mtime_ns, record_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _skipped_result() -> Dict:
+        """资源已是最新版本时的加载结果"""
+        return {
+            'success': True,
+            'total': 0,
+            'success_count': 0,
+            'failed_count': 0
+        }
+    
     def _record_load_history(self, resource_name: str, file_path: str,
-                            file_hash: str, record_count: int, status: str):
+                            file_hash: str, record_count: int, status: str,
+                            file_size: Optional[int] = None, file_mtime_ns: Optional[int] = None,
+                            duration: Optional[float] = None):
         """记录加载历史"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -805,9 +1211,99 @@ class DataLoader:
         try:
             cursor.execute('''
             INSERT INTO data_load_records
-            (resource_name, file_path, file_hash, record_count, load_status)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (resource_name, file_path, file_hash, record_count, status))
+            (resource_name, file_path, file_hash, record_count, load_status,
+             file_size, file_mtime_ns, load_duration)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (resource_name, file_path, file_hash, record_count, status,
+                  file_size, file_mtime_ns, duration))
             conn.commit()
         finally:
             conn.close()
+
+
+_worker_queues = None
+
+
+def _init_loader_worker(queues):
+    """
+    并行加载子进程初始化：保存各资源的行队列
+    写入方中途放弃时队列中可能留有未读的数据，子进程退出时不等待这些数据送出
+    """
+    global _worker_queues
+    _worker_queues = queues
+    for out_queue in queues:
+        out_queue.cancel_join_thread()
+
+
+def _prepare_resource_rows(resource_name: str, file_path: str, queue_index: int):
+    """
+    并行加载的子进程任务：解析、验证资源文件，按块送出 (表名, 行, 行键, 内容哈希)
+    结束时送出 ('done', {验证结果, 开始时间})，出错时送出 ('error', 错误信息)
+    """
+    started = time.time()
+    out_queue = _worker_queues[queue_index]
+    try:
+        validation = DataLoader._new_validation_result()
+        if resource_name in WHOLE_FILE_RESOURCES:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            data = DataLoader._validated_items(resource_name, iter_json_array(file_path, 'data'), validation)
+        
+        chunk = []
+        for table, row in DataLoader._iter_rows(resource_name, data):
+            chunk.append((table, row, *DataLoader._row_fingerprint(resource_name, table, row)))
+            if len(chunk) >= IMPORT_BATCH_SIZE:
+                out_queue.put(('rows', chunk))
+                chunk = []
+        if chunk:
+            out_queue.put(('rows', chunk))
+        out_queue.put(('done', {'validation': validation, 'started': started}))
+    except Exception as e:
+        out_queue.put(('error', f"{resource_name}: {e}"))
+
+
+def _drain_row_queue(out_queue, state: Dict, future) -> Iterator[Tuple[str, tuple, str, str]]:
+    """
+    写入方：逐块读取子进程送回的行，结束时把验证结果、解析开始时间或错误写入 state
+    队列按 QUEUE_POLL_SECONDS 轮询，期间子进程任务异常结束（如进程被杀死）时按错误处理，不会一直等待
+    """
+    while True:
+        try:
+            kind, payload = out_queue.get(timeout=QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            if future.done() and future.exception() is not None:
+                kind, payload = 'error', f"解析进程异常结束: {future.exception()!r}"
+            else:
+                continue
+        if kind == 'rows':
+            yield from payload
+        elif kind == 'done':
+            state['validation'].update(payload['validation'])
+            state['started'] = payload['started']
+            return
+        else:
+            state['error'] = payload
+            raise RuntimeError(payload)
+
+
+def _discard_rows(rows: Iterator):
+    """读完并丢弃写入方未消费的行（行迭代器出错时已记录在 state 中）"""
+    try:
+        for _ in rows:
+            pass
+    except Exception:
+        pass
+
+
+def _stop_loader_workers(executor: ProcessPoolExecutor, futures: List, queues: List):
+    """取消尚未开始的任务，读空仍在运行的任务的队列使其结束，再关闭进程池"""
+    for future in futures:
+        future.cancel()
+    for future, out_queue in zip(futures, queues):
+        while not future.done():
+            try:
+                out_queue.get(timeout=QUEUE_POLL_SECONDS)
+            except queue.Empty:
+                pass
+    executor.shutdown(wait=True, cancel_futures=True)
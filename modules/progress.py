@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+进度显示模块 - 批量处理的单行进度
+
+按固定间隔刷新一行：已处理条数、吞吐（条/秒）、预计剩余时间、成功/失败数，
+以及最近若干条的单条耗时 p50/p95。输出到终端时原地刷新，重定向到文件时逐行输出。
+"""
+
+import sys
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+def percentile(sorted_values, q: float) -> float:
+    """最近秩法取分位数，values 需已排序"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def format_duration(seconds: float) -> str:
+    """秒数格式化为 H:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ProgressReporter:
+    """批量处理进度行"""
+
+    def __init__(self, total_lines: Optional[int] = None, start_line: int = 0,
+                 interval: float = 1.0, window: int = 1000, stream=None):
+        """
+        :param total_lines: 输入文件总行数，用于估算剩余时间；未知时不显示
+        :param start_line: 本次开始处理的行号（续跑时为检查点行号）
+        :param interval: 刷新间隔秒数（非终端输出时至少 10 秒）
+        :param window: 计算耗时分位数的最近条数
+        """
+        self.stream = stream or sys.stdout
+        self.total_lines = total_lines
+        self.start_line = start_line
+        self.line_no = start_line
+        self.count = 0
+        self.latencies = deque(maxlen=window)
+        self._tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.interval = interval if self._tty else max(interval, 10.0)
+        self._started = time.monotonic()
+        self._next_refresh = self._started + self.interval
+        self._width = 0
+
+    def update(self, line_no: int, latency: float, stats: Dict[str, int]):
+        """
+        记录一条处理完成，到达刷新间隔时输出进度行
+        :param line_no: 该条记录的输入行号
+        :param latency: 该条记录的处理耗时（秒）
+        :param stats: 累计统计（total/success/failed）
+        """
+        self.count += 1
+        self.line_no = line_no
+        self.latencies.append(latency)
+        now = time.monotonic()
+        if now >= self._next_refresh:
+            self._next_refresh = now + self.interval
+            self._render(self.line(stats, now))
+
+    def finish(self, stats: Dict[str, int]):
+        """输出最终进度并换行"""
+        self._render(self.line(stats, time.monotonic()))
+        if self._tty:
+            self.stream.write('\n')
+            self.stream.flush()
+
+    def line(self, stats: Dict[str, int], now: Optional[float] = None) -> str:
+        """生成进度行文本"""
+        elapsed = max((now or time.monotonic()) - self._started, 1e-9)
+        rate = self.count / elapsed
+
+        eta = '--'
+        done_lines = self.line_no - self.start_line
+        if self.total_lines and done_lines > 0:
+            remaining = max(self.total_lines - self.line_no, 0) * elapsed / done_lines
+            eta = format_duration(remaining)
+
+        latencies = sorted(self.latencies)
+        return (f"已处理 {stats['total']} 条 | {rate:.1f} 条/秒 | 剩余 {eta} | "
+                f"成功 {stats['success']} 失败 {stats['failed']} | "
+                f"单条耗时 p50 {percentile(latencies, 0.5) * 1000:.0f}ms "
+                f"p95 {percentile(latencies, 0.95) * 1000:.0f}ms")
+
+    def _render(self, text: str):
+        if self._tty:
+            # 原地刷新，用空格覆盖上一行多出的部分
+            self.stream.write('\r' + text + ' ' * max(self._width - len(text), 0))
+            self._width = len(text)
+        else:
+            self.stream.write(text + '\n')
+        self.stream.flush()
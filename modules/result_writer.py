@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+结果写入模块 - 批量结果的流式落盘
+
+每条结果计算完成后立即写入输出文件并定期刷新，内存占用与批量大小无关。
+汇总信息（总数、成功数等）在结束时单独写出。
+"""
+
+import csv
+import json
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 输出格式 -> 文件扩展名
+OUTPUT_FORMATS = {
+    'json': '.json',
+    'jsonl': '.jsonl',
+    'csv': '.csv',
+    'sqlite': '.db'
+}
+
+
+class ResultWriter(ABC):
+    """流式结果写入基类，子类实现 _write / _finish / _offset"""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        """
+        :param path: 输出文件路径
+        :param flush_every: 每写入多少条刷新一次磁盘
+        """
+        self.path = Path(path)
+        self.flush_every = max(1, int(flush_every))
+        self.count = 0
+        self._closed = False
+
+    def write(self, item: Dict):
+        """写入一条结果"""
+        self._write(item)
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.flush()
+
+    def flush(self):
+        """刷新缓冲区到磁盘"""
+
+    def checkpoint(self) -> Dict[str, int]:
+        """
+        刷新并返回当前写入位置，作为 resume 参数传给新的写入器即可从此处续写
+        :return: {'offset': 文件字节位置（SQLite 为已写条数）, 'count': 已写条数}
+        """
+        self.flush()
+        return {'offset': self._offset(), 'count': self.count}
+
+    def close(self, summary: Optional[Dict] = None):
+        """结束写入；summary 为汇总信息，写在结果之后或单独的汇总文件中"""
+        if self._closed:
+            return
+        self._closed = True
+        self._finish(summary or {})
+
+    @property
+    def summary_path(self) -> Path:
+        """单独存放汇总信息的文件路径"""
+        return self.path.with_name(f"{self.path.stem}_summary.json")
+
+    @abstractmethod
+    def _write(self, item: Dict):
+        """写入一条结果（计数由 write 维护）"""
+
+    @abstractmethod
+    def _finish(self, summary: Dict):
+        """写出汇总并关闭输出文件"""
+
+    @abstractmethod
+    def _offset(self) -> int:
+        """检查点位置，见 checkpoint"""
+
+    def _write_summary_file(self, summary: Dict):
+        """将汇总信息写到单独的 JSON 文件"""
+        with open(self.summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class FileResultWriter(ResultWriter):
+    """文本文件写入器基类：子类在 __init__ 中用 _open 打开 self._file，检查点为文件字节位置"""
+
+    def flush(self):
+        self._file.flush()
+
+    def _offset(self) -> int:
+        return self._file.tell()
+
+    def _open(self, resume: Optional[Dict[str, int]], encoding: str = 'utf-8', newline: Optional[str] = None):
+        """打开输出文件；续写时截断到检查点位置，丢弃其后未确认的内容"""
+        if resume is None:
+            return open(self.path, 'w', encoding=encoding, newline=newline)
+        f = open(self.path, 'r+', encoding=encoding, newline=newline)
+        f.seek(resume['offset'])
+        f.truncate()
+        self.count = resume['count']
+        return f
+
+
+class JsonResultWriter(FileResultWriter):
+    """
+    JSON 写入器
+    - 提供 header 时输出对象：{header..., "results": [...], summary...}，汇总字段写在末尾
+    - 不提供 header 时输出数组：[...]，汇总写入单独文件
+    """
+
+    def __init__(self, path: str, header: Optional[Dict] = None,
+                 items_key: str = 'results', flush_every: int = 100,
+                 resume: Optional[Dict[str, int]] = None):
+        super().__init__(path, flush_every)
+        self.header = header
+        self._file = self._open(resume)
+
+        if resume is not None:
+            return
+        if header is None:
+            self._file.write('[')
+        else:
+            self._file.write('{\n')
+            for key, value in header.items():
+                self._file.write(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n')
+            self._file.write(f'  {json.dumps(items_key)}: [')
+
+    def _write(self, item: Dict):
+        indent = '  ' if self.header is None else '    '
+        body = json.dumps(item, ensure_ascii=False, indent=2).replace('\n', '\n' + indent)
+        self._file.write((',\n' if self.count else '\n') + indent + body)
+
+    def _finish(self, summary: Dict):
+        try:
+            if self.header is None:
+                self._file.write('\n]\n' if self.count else ']\n')
+                if summary:
+                    self._write_summary_file(summary)
+            else:
+                self._file.write('\n  ]' if self.count else ']')
+                for key, value in summary.items():
+                    self._file.write(f',\n  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}')
+                self._file.write('\n}\n')
+        finally:
+            self._file.close()
+
+
+class JsonLinesResultWriter(FileResultWriter):
+    """JSON Lines 写入器：每行一条结果，汇总写入单独文件"""
+
+    def __init__(self, path: str, flush_every: int = 100, resume: Optional[Dict[str, int]] = None):
+        super().__init__(path, flush_every)
+        self._file = self._open(resume)
+
+    def _write(self, item: Dict):
+        self._file.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+    def _finish(self, summary: Dict):
+        self._file.close()
+        if summary:
+            self._write_summary_file(summary)
+
+
+class CsvResultWriter(FileResultWriter):
+    """CSV 写入器：只输出扁平的评分列，汇总写入单独文件"""
+
+    def __init__(self, path: str, columns: List[str],
+                 row_builder: Callable[[Dict], Dict[str, Any]], flush_every: int = 100,
+                 resume: Optional[Dict[str, int]] = None):
+        super().__init__(path, flush_every)
+        self.row_builder = row_builder
+        # utf-8-sig 便于 Excel 直接打开（续写时不会重复写入 BOM）
+        self._file = self._open(resume, encoding='utf-8-sig', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction='ignore')
+        if resume is None:
+            self._writer.writeheader()
+
+    def _write(self, item: Dict):
+        self._writer.writerow(self.row_builder(item))
+
+    def _finish(self, summary: Dict):
+        self._file.close()
+        if summary:
+            self._write_summary_file(summary)
+
+
+class SqliteResultWriter(ResultWriter):
+    """
+    SQLite 写入器：结果写入独立的数据库文件
+    results 表包含扁平评分列和完整结果 JSON，summary 表存放汇总键值
+    """
+
+    def __init__(self, path: str, columns: List[str],
+                 row_builder: Callable[[Dict], Dict[str, Any]], flush_every: int = 100,
+                 resume: Optional[Dict[str, int]] = None):
+        super().__init__(path, flush_every)
+        self.columns = columns
+        self.row_builder = row_builder
+        if resume is None and self.path.exists():
+            self.path.unlink()
+        self._conn = sqlite3.connect(str(self.path))
+        if resume is None:
+            column_defs = ', '.join(f'"{c}"' for c in columns)
+            self._conn.execute(f'''
+            CREATE TABLE results (
+                seq INTEGER PRIMARY KEY,
+                {column_defs},
+                result_json TEXT
+            )
+            ''')
+            self._conn.execute('CREATE TABLE summary (key TEXT PRIMARY KEY, value TEXT)')
+        else:
+            # 续写：丢弃检查点之后已提交的结果，汇总在结束时重新写入
+            self.count = resume['count']
+            self._conn.execute('DELETE FROM results WHERE seq > ?', (self.count,))
+            self._conn.execute('DELETE FROM summary')
+            self._conn.commit()
+        placeholders = ', '.join('?' for _ in columns)
+        self._insert_sql = f'INSERT INTO results VALUES (?, {placeholders}, ?)'
+
+    def _write(self, item: Dict):
+        row = self.row_builder(item)
+        self._conn.execute(self._insert_sql, (
+            self.count + 1,
+            *[row.get(c) for c in self.columns],
+            json.dumps(item, ensure_ascii=False)
+        ))
+
+    def flush(self):
+        self._conn.commit()
+
+    def _offset(self) -> int:
+        return self.count
+
+    def _finish(self, summary: Dict):
+        try:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO summary (key, value) VALUES (?, ?)',
+                [(k, json.dumps(v, ensure_ascii=False)) for k, v in summary.items()]
+            )
+            self._conn.commit()
+        finally:
+            self._conn.close()
+
+
+def open_result_writer(output_format: str, path: str, header: Optional[Dict] = None,
+                       columns: Optional[List[str]] = None,
+                       row_builder: Optional[Callable[[Dict], Dict[str, Any]]] = None,
+                       flush_every: int = 100, resume: Optional[Dict[str, int]] = None) -> ResultWriter:
+    """
+    按格式创建写入器
+    :param output_format: json / jsonl / csv / sqlite
+    :param header: 仅 json 格式使用，见 JsonResultWriter
+    :param columns: csv / sqlite 格式的扁平列
+    :param row_builder: 将结果转换为扁平列字典的函数
+    :param resume: 写入器 checkpoint() 的返回值，提供时在已有输出文件上续写
+    """
+    if output_format == 'json':
+        return JsonResultWriter(path, header=header, flush_every=flush_every, resume=resume)
+    if output_format == 'jsonl':
+        return JsonLinesResultWriter(path, flush_every=flush_every, resume=resume)
+    if output_format in ('csv', 'sqlite'):
+        if not columns or row_builder is None:
+            raise ValueError(f"{output_format} 格式需要提供 columns 和 row_builder")
+        writer_class = CsvResultWriter if output_format == 'csv' else SqliteResultWriter
+        return writer_class(path, columns, row_builder, flush_every=flush_every, resume=resume)
+    raise ValueError(f"不支持的输出格式: {output_format}")
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+历史记录保留策略模块 - 按策略清理历史记录并回收数据库空间
+
+删除分块进行，每块一个短事务，避免长时间锁库；
+空间回收使用 auto_vacuum=INCREMENTAL + incremental_vacuum。
+"""
+
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 个人版：主表与各明细表（外键列均为 record_id）
+PERSON_DETAIL_TABLES = ['wuge_results', 'bazi_results', 'ziyi_results',
+                        'shengxiao_results', 'chenggu_results']
+
+# 公司版：明细表及其外键列
+COMPANY_DETAIL_TABLES = [
+    ('company_wuge_results', 'test_id'),
+    ('company_industry_analysis', 'test_id'),
+    ('company_shengxiao_analysis', 'test_id'),
+    ('company_ziyi_analysis', 'test_id'),
+    ('company_industry_detail', 'record_id'),
+    ('company_scores', 'record_id'),
+]
+
+
+class HistoryRetention:
+    """历史记录保留策略执行类"""
+
+    def __init__(self, storage, chunk_size: int = 500):
+        """
+        :param storage: Storage 实例（用于同步维护统计表）
+        :param chunk_size: 每个删除事务处理的主记录数
+        """
+        self.storage = storage
+        self.db_path = storage.db_path
+        self.chunk_size = max(1, int(chunk_size))
+
+    def apply(self, max_age_days: Optional[int] = None, max_rows: Optional[int] = None,
+              keep_latest_per_name: Optional[int] = None) -> Dict[str, int]:
+        """
+        按策略清理个人版与公司版历史记录（多个策略取并集）
+        :param max_age_days: 删除早于 N 天的记录
+        :param max_rows: 每类历史最多保留最新的 N 条
+        :param keep_latest_per_name: 同一姓名/公司全称只保留最新的 N 条
+        :return: 各类删除的主记录数与清理的孤立明细数
+        """
+        result = {'person_deleted': 0, 'company_deleted': 0, 'orphans_deleted': 0}
+
+        if any(v is not None for v in (max_age_days, max_rows, keep_latest_per_name)):
+            result['person_deleted'] = self._purge(
+                'test_records', 'name', max_age_days, max_rows, keep_latest_per_name,
+                self._delete_person_chunk
+            )
+            if self._table_exists('company_test_records'):
+                result['company_deleted'] = self._purge(
+                    'company_test_records', 'full_name', max_age_days, max_rows, keep_latest_per_name,
+                    self._delete_company_chunk
+                )
+
+        result['orphans_deleted'] = self.purge_orphans()
+        logger.info(f"历史记录保留策略执行完成: {result}")
+        return result
+
+    def purge_orphans(self) -> int:
+        """分块删除主记录已不存在的明细行（旧版本覆盖保存时遗留）"""
+        targets = [(t, 'record_id', 'test_records') for t in PERSON_DETAIL_TABLES]
+        if self._table_exists('company_test_records'):
+            targets += [(t, key, 'company_test_records') for t, key in COMPANY_DETAIL_TABLES]
+
+        total = 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for table, key, parent in targets:
+                while True:
+                    cursor = conn.execute(f'''
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT c.id FROM {table} c
+                        WHERE NOT EXISTS (SELECT 1 FROM {parent} p WHERE p.id = c.{key})
+                        LIMIT ?
+                    )
+                    ''', (self.chunk_size,))
+                    conn.commit()
+                    total += cursor.rowcount
+                    if cursor.rowcount < self.chunk_size:
+                        break
+        finally:
+            conn.close()
+        return total
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        将数据库切换为 auto_vacuum=INCREMENTAL
+        已有数据的库需要一次完整 VACUUM 才能生效，返回是否执行了该 VACUUM
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            if mode == 2:
+                return False
+            logger.info("切换 auto_vacuum=INCREMENTAL，执行一次完整 VACUUM...")
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+            return True
+        finally:
+            conn.close()
+
+    def incremental_vacuum(self, step_pages: int = 1000) -> int:
+        """
+        分步回收空闲页，每步一个短事务
+        :return: 回收的页数
+        """
+        conn = sqlite3.connect(self.db_path)
+        freed = 0
+        try:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                return 0
+            while True:
+                before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if before == 0:
+                    break
+                conn.execute(f'PRAGMA incremental_vacuum({int(step_pages)})').fetchall()
+                conn.commit()
+                after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                freed += before - after
+                if after >= before:
+                    break
+        finally:
+            conn.close()
+        return freed
+
+    def _purge(self, table: str, name_col: str, max_age_days: Optional[int],
+               max_rows: Optional[int], keep_latest_per_name: Optional[int], delete_chunk) -> int:
+        """先在临时表中收集待删 id（只读），再分块删除"""
+        selects = []
+        params: List = []
+        if max_age_days is not None:
+            selects.append(f"SELECT id FROM {table} WHERE created_at < datetime('now', ?)")
+            params.append(f'-{int(max_age_days)} days')
+        if max_rows is not None:
+            selects.append(f'SELECT id FROM {table} ORDER BY created_at DESC, id DESC LIMIT -1 OFFSET ?')
+            params.append(int(max_rows))
+        if keep_latest_per_name is not None:
+            selects.append(f'''
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY {name_col} ORDER BY created_at DESC, id DESC
+                ) AS rn
+                FROM {table}
+            ) WHERE rn > ?
+            ''')
+            params.append(int(keep_latest_per_name))
+
+        conn = sqlite3.connect(self.db_path)
+        deleted = 0
+        try:
+            conn.execute('DROP TABLE IF EXISTS temp.retention_doomed')
+            conn.execute('CREATE TEMP TABLE retention_doomed (id INTEGER PRIMARY KEY)')
+            union = ' UNION '.join(f'SELECT id FROM ({sql})' for sql in selects)
+            conn.execute(f'INSERT OR IGNORE INTO temp.retention_doomed {union}', params)
+            conn.commit()
+
+            while True:
+                ids = [row[0] for row in conn.execute(
+                    'SELECT id FROM temp.retention_doomed LIMIT ?', (self.chunk_size,)
+                )]
+                if not ids:
+                    break
+                cursor = conn.cursor()
+                try:
+                    delete_chunk(cursor, ids)
+                    cursor.executemany('DELETE FROM temp.retention_doomed WHERE id = ?',
+                                       [(i,) for i in ids])
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                deleted += len(ids)
+                logger.info(f"{table}: 已删除 {deleted} 条")
+        finally:
+            conn.close()
+        return deleted
+
+    def _delete_person_chunk(self, cursor, ids: List[int]):
+        """删除一块个人版记录（统计、明细、主记录）"""
+        for record_id in ids:
+            self.storage.analytics.apply_person(cursor, record_id, -1)
+        self.storage._delete_result_details(cursor, ids)
+        cursor.executemany('DELETE FROM test_records WHERE id = ?', [(i,) for i in ids])
+
+    def _delete_company_chunk(self, cursor, ids: List[int]):
+        """删除一块公司版记录（统计、明细、主记录）"""
+        for record_id in ids:
+            self.storage.analytics.apply_company(cursor, record_id, -1)
+        params = [(i,) for i in ids]
+        for table, key in COMPANY_DETAIL_TABLES:
+            cursor.executemany(f'DELETE FROM {table} WHERE {key} = ?', params)
+        cursor.executemany('DELETE FROM company_test_records WHERE id = ?', params)
+
+    def _table_exists(self, table: str) -> bool:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+            ).fetchone() is not None
+        finally:
+            conn.close()
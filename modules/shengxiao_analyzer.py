@@ -416,12 +416,32 @@ class ShengxiaoAnalyzer:
             'ji_found': ji_found
         }
     
-    def analyze_shengxiao(self, name: str, birth_dt: datetime) -> Dict:
+    def get_shengxiao(self, birth_dt: datetime) -> str:
+        """确定出生日期对应的生肖：优先查万年历（按立春划分），查不到时用公历年推算
+        
+        Args:
+            birth_dt: 阳历出生日期
+            
+        Returns:
+            生肖名称，如 '马'
+        """
+        birth_date_str = birth_dt.strftime('%Y-%m-%d')
+        shengxiao = self._get_shengxiao_from_wannianli(birth_date_str)
+        
+        # 如果万年历查询失败，使用传统算法（公历年减4再模12）
+        if not shengxiao:
+            logger.warning(f"万年历未找到 {birth_date_str}，使用传统算法")
+            shengxiao_idx = (birth_dt.year - 4) % 12
+            shengxiao = self.SHENGXIAO[shengxiao_idx]
+        return shengxiao
+    
+    def analyze_shengxiao(self, name: str, birth_dt: datetime, shengxiao: str = '') -> Dict:
         """生肖喜忌分析
         
         Args:
             name: 姓名
             birth_dt: 阳历出生日期，本方法不会校正太阳时
+            shengxiao: 已确定的生肖（同一出生日期分析多个名称时传入，避免重复查询万年历）
             
         Returns:
             生肖分析结果字典，包含：
@@ -441,14 +461,8 @@ class ShengxiaoAnalyzer:
         logger.info(f"分析生肖喜忌: {name}, 出生日期: {birth_dt}")
         
         # 1. 从万年历确定生肖（使用公历日期查询）
-        birth_date_str = birth_dt.strftime('%Y-%m-%d')
-        shengxiao = self._get_shengxiao_from_wannianli(birth_date_str)
-        
-        # 如果万年历查询失败，使用传统算法（公历年减4再模12）
         if not shengxiao:
-            logger.warning(f"万年历未找到 {birth_date_str}，使用传统算法")
-            shengxiao_idx = (birth_dt.year - 4) % 12
-            shengxiao = self.SHENGXIAO[shengxiao_idx]
+            shengxiao = self.get_shengxiao(birth_dt)
         
         # 2. 获取生肖的五行和三合信息
         shengxiao_attrs = self.SHENGXIAO_WUXING.get(shengxiao, {
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+SQL 转储解析模块 - 流式读取 mysqldump 风格文件中 INSERT 语句的各行值
+
+VALUES 子句用预编译正则从左到右逐个匹配出全部值，支持单条 INSERT 包含多行、语句跨多行以及
+'' / \\' 两种引号转义；无法匹配的值（如多余的引号）按格式错误抛出 ValueError。
+文件可按字节范围切分，由多个进程分别解析后按原顺序合并。
+仅依赖标准库。
+"""
+
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# INSERT 语句头：INSERT [IGNORE] INTO `表名` [(列, ...)] VALUES
+_INSERT_RE = re.compile(
+    r'\s*INSERT\s+(?:IGNORE\s+)?INTO\s+[`"]?(\w+)[`"]?\s*(?:\([^)]*\)\s*)?VALUES\s*',
+    re.IGNORECASE
+)
+
+# 转储文件中 INSERT 语句的第一行（按字节匹配，与 _INSERT_RE 接受相同的语句头）
+_INSERT_LINE_RE = re.compile(rb'\s*INSERT\s+(?:IGNORE\s+)?INTO\s', re.IGNORECASE)
+
+# 一个值及其后的分隔符：',' 为下一个值，'),(' 为下一行，')' 或 ');' 位于结尾时语句结束
+# 引号内容写成展开形式 普通字符* (转义 普通字符*)*，字符串未闭合时匹配失败耗时与长度成线性
+_VALUE_RE = re.compile(
+    r"""\s*(?:
+        '([^'\\]*(?:(?:\\.|'')[^'\\]*)*)'
+      | "([^"\\]*(?:(?:\\.|"")[^"\\]*)*)"
+      | ([^,)'"]*)
+    )\s*(,|\)\s*,\s*\(|\)\s*;?\s*\Z)""",
+    re.VERBOSE | re.DOTALL
+)
+
+# 语句在某个值处被截断（字符串未闭合、分隔符不完整）时剩余的文本，用于区分"尚未读完"与格式错误
+_PARTIAL_RE = re.compile(
+    r"""\s*(?:
+        '[^'\\]*(?:(?:\\.|'')[^'\\]*)*[\\']?
+      | "[^"\\]*(?:(?:\\.|"")[^"\\]*)*[\\"]?
+      | [^,)'"]*
+    )\s*(?:\)\s*(?:,\s*)?)?\Z""",
+    re.VERBOSE | re.DOTALL
+)
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+_SINGLE_ESCAPE_RE = re.compile(r"\\(.)|''", re.DOTALL)
+_DOUBLE_ESCAPE_RE = re.compile(r'\\(.)|""', re.DOTALL)
+
+# 按字节范围并行解析时每个范围的大小
+RANGE_BYTES = 8 * 1024 * 1024
+
+
+def _unescape(match) -> str:
+    char = match.group(1)
+    if char is None:
+        return match.group(0)[0]
+    return _ESCAPES.get(char, char)
+
+
+def parse_insert(statement: str) -> Optional[Tuple[str, List[List[str]]]]:
+    """
+    解析一条完整的 INSERT 语句
+    :return: (表名, [每行的值列表])；不是 INSERT 语句或语句不完整时返回 None
+    值均为去除首尾空白的字符串，未加引号的值（如 NULL、数字）保留原文
+    """
+    header = _INSERT_RE.match(statement)
+    if not header:
+        return None
+    pos = header.end()
+    if statement[pos:pos + 1] != '(':
+        return None
+
+    rows = []
+    row = []
+    pos += 1
+    while True:
+        match = _VALUE_RE.match(statement, pos)
+        if match is None:
+            # 剩余部分是被截断的值说明语句尚未读完，否则为格式错误
+            if _PARTIAL_RE.match(statement, pos):
+                return None
+            raise ValueError(f"无法解析 INSERT 语句第 {pos} 个字符处的值: {statement[pos:pos + 40]!r}")
+
+        single, double, bare, sep = match.groups()
+        if single is not None:
+            value = _SINGLE_ESCAPE_RE.sub(_unescape, single) if ('\\' in single or "''" in single) else single
+        elif double is not None:
+            value = _DOUBLE_ESCAPE_RE.sub(_unescape, double) if ('\\' in double or '""' in double) else double
+        else:
+            value = bare
+        row.append(value.strip())
+        pos = match.end()
+        if sep != ',':
+            rows.append(row)
+            row = []
+            # 行分隔符 '),(' 之后继续下一行，结尾的 ')' / ');' 表示语句结束
+            if ',' not in sep:
+                break
+    return header.group(1), rows
+
+
+def iter_dump_rows(sql_path: str, start: int = 0, end: Optional[int] = None,
+                   table: Optional[str] = None) -> Iterator[List[str]]:
+    """
+    逐行产出转储文件中 INSERT 语句的值列表
+    :param start: 起始字节位置；不在行首时从下一行开始
+    :param end: 只解析起始位置小于 end 的语句（语句本身可以越过 end）
+    :param table: 只产出指定表的行
+    """
+    with open(sql_path, 'rb') as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        offset = f.tell()
+        line = f.readline()
+        while line and (end is None or offset < end):
+            if not _is_insert(line):
+                offset = f.tell()
+                line = f.readline()
+                continue
+
+            # 语句可能跨多行：读到以分号结尾的行再解析；分号位于字符串内导致解析失败时继续读取，
+            # 遇到文件结尾或下一条 INSERT 时按已读内容解析（最后一条语句可以没有分号）
+            statement_offset = offset
+            parts = [line]
+            parsed = None
+            while True:
+                if parts[-1].rstrip().endswith(b';'):
+                    parsed = _parse_statement(parts, statement_offset)
+                    if parsed is not None:
+                        offset = f.tell()
+                        line = f.readline()
+                        break
+                offset = f.tell()
+                line = f.readline()
+                if not line or _is_insert(line):
+                    parsed = _parse_statement(parts, statement_offset)
+                    if parsed is None:
+                        logger.warning(f"{sql_path} 第 {statement_offset} 字节处的 INSERT 语句不完整，已跳过")
+                    break
+                parts.append(line)
+
+            if parsed is not None and (table is None or parsed[0] == table):
+                yield from parsed[1]
+
+
+def _parse_statement(parts: List[bytes], offset: int) -> Optional[Tuple[str, List[List[str]]]]:
+    """解析已读取的语句行，格式错误时在异常信息中附上语句所在的字节位置"""
+    try:
+        return parse_insert(b''.join(parts).decode('utf-8'))
+    except ValueError as e:
+        raise ValueError(f"第 {offset} 字节处的 INSERT 语句格式错误: {e}") from e
+
+
+def _is_insert(line: bytes) -> bool:
+    """是否为 INSERT 语句的第一行（含 INSERT IGNORE INTO）"""
+    return _INSERT_LINE_RE.match(line) is not None
+
+
+def _parse_range(args: Tuple[str, int, int, Optional[str]]) -> List[List[str]]:
+    """进程池任务：解析一个字节范围"""
+    sql_path, start, end, table = args
+    return list(iter_dump_rows(sql_path, start, end, table))
+
+
+def iter_dump_rows_parallel(sql_path: str, workers: int = 1, table: Optional[str] = None,
+                            range_bytes: int = RANGE_BYTES) -> Iterator[List[str]]:
+    """
+    按字节范围切分文件并在进程池中解析，按文件顺序产出各行
+    同时在途的范围不超过 workers * 2 个，内存占用与文件大小无关
+    """
+    size = os.path.getsize(sql_path)
+    if workers <= 1 or size <= range_bytes:
+        yield from iter_dump_rows(sql_path, table=table)
+        return
+
+    ranges = [(sql_path, start, min(start + range_bytes, size), table)
+              for start in range(0, size, range_bytes)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for args in ranges:
+            pending.append(executor.submit(_parse_range, args))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -8,7 +8,10 @@ import json
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .analytics import ScoreAnalytics, PERSON_DIMENSIONS, COMPANY_DIMENSIONS
+from .table_stats import TableStats, HISTORY_TABLES
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,7 @@ class Storage:
         """初始化存储模块"""
         self.db_path = db_path
         self._init_database()
+        self.analytics = ScoreAnalytics(db_path)
     
     def _init_database(self):
         """初始化数据库表结构"""
@@ -27,6 +31,9 @@ class Storage:
         cursor = conn.cursor()
         
         try:
+            # 新建库直接启用增量空间回收（已有数据的库需由 --compact-history 做一次 VACUUM）
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            
             # 创建测试记录主表
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS test_records (
@@ -134,6 +141,11 @@ class Storage:
             
             # 检查并迁移表结构
             self._migrate_database(cursor)
+            
+            # 历史记录表的行数由触发器维护，统计时无需 COUNT(*)
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            existing = {row[0] for row in cursor.fetchall()}
+            TableStats.install_count_triggers(cursor, [t for t in HISTORY_TABLES if t in existing])
             conn.commit()
             
             logger.info("数据库初始化完成")
@@ -388,7 +400,25 @@ class Storage:
                 CREATE UNIQUE INDEX IF NOT EXISTS uq_company_ziyi_analysis_test
                 ON company_ziyi_analysis(test_id)
             ''')
-            
+
+            # 3) 历史查询索引：按 (created_at, id) 做游标分页，子表按 record_id 回查
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_test_records_created
+                ON test_records(created_at, id)
+            ''')
+
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_company_test_records_created
+                ON company_test_records(created_at, id)
+            ''')
+
+            for table in ['wuge_results', 'bazi_results', 'ziyi_results',
+                          'shengxiao_results', 'chenggu_results']:
+                cursor.execute(f'''
+                    CREATE INDEX IF NOT EXISTS idx_{table}_record
+                    ON {table}(record_id)
+                ''')
+
         except Exception as e:
             logger.warning(f"数据库迁移失败: {e}")
 
@@ -402,207 +432,216 @@ class Storage:
             'owner': {...}
           }
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            parsed = result.get('parsed') or {}
-            owner = result.get('owner') or {}
-            full_name = parsed.get('full_name') or result.get('full_name') or ''
-            # 插入主记录
+        return self.save_company_results([result])[0]
+
+    def save_company_results(self, results: List[Dict]) -> List[Optional[int]]:
+        """批量保存公司版结果（单个事务，单条失败只回滚该条）
+        :return: 与输入顺序一致的 record_id 列表，失败项为 None
+        """
+        return self._save_many(results, self._insert_company_result, '保存公司版结果失败')
+
+    def _insert_company_result(self, cursor, result: Dict) -> Optional[int]:
+        """在当前事务中写入一条公司版结果，返回 record_id"""
+        parsed = result.get('parsed') or {}
+        owner = result.get('owner') or {}
+        full_name = parsed.get('full_name') or result.get('full_name') or ''
+        # 插入主记录
+        cursor.execute('''
+        INSERT OR IGNORE INTO company_test_records
+        (full_name, prefix, main_name, industry_suffix, industry_code, org_form, industry_type,
+         owner_name, owner_gender, owner_birth_time, owner_longitude, owner_latitude)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            full_name,
+            parsed.get('prefix', ''),
+            parsed.get('main_name', ''),
+            parsed.get('industry_suffix', ''),
+            parsed.get('industry_code', ''),
+            parsed.get('org_form', ''),
+            parsed.get('industry_type', ''),
+            owner.get('name', ''),
+            owner.get('gender', ''),
+            owner.get('birth_time') or owner.get('birth', ''),
+            float(owner.get('longitude')) if owner.get('longitude') not in (None, '') else None,
+            float(owner.get('latitude')) if owner.get('latitude') not in (None, '') else None,
+        ))
+
+        # 获取或回查 record_id（INSERT OR IGNORE 被忽略时 lastrowid 是本连接上一次插入的行，不可用）
+        record_id = cursor.lastrowid if cursor.rowcount == 1 else None
+        if not record_id:
             cursor.execute('''
-            INSERT OR IGNORE INTO company_test_records
-            (full_name, prefix, main_name, industry_suffix, industry_code, org_form, industry_type,
-             owner_name, owner_gender, owner_birth_time, owner_longitude, owner_latitude)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            SELECT id FROM company_test_records
+            WHERE full_name=? AND owner_name=? AND (owner_birth_time=? OR owner_birth_time IS NULL)
+                  AND (owner_longitude IS ? OR owner_longitude=?) AND (owner_latitude IS ? OR owner_latitude=?)
             ''', (
                 full_name,
-                parsed.get('prefix', ''),
-                parsed.get('main_name', ''),
-                parsed.get('industry_suffix', ''),
-                parsed.get('industry_code', ''),
-                parsed.get('org_form', ''),
-                parsed.get('industry_type', ''),
                 owner.get('name', ''),
-                owner.get('gender', ''),
                 owner.get('birth_time') or owner.get('birth', ''),
                 float(owner.get('longitude')) if owner.get('longitude') not in (None, '') else None,
+                float(owner.get('longitude')) if owner.get('longitude') not in (None, '') else None,
+                float(owner.get('latitude')) if owner.get('latitude') not in (None, '') else None,
                 float(owner.get('latitude')) if owner.get('latitude') not in (None, '') else None,
             ))
+            row = cursor.fetchone()
+            record_id = row[0] if row else None
 
-            # 获取或回查 record_id（INSERT OR IGNORE 时 lastrowid 可能为0）
-            record_id = cursor.lastrowid
-            if not record_id:
-                cursor.execute('''
-                SELECT id FROM company_test_records
-                WHERE full_name=? AND owner_name=? AND (owner_birth_time=? OR owner_birth_time IS NULL)
-                      AND (owner_longitude IS ? OR owner_longitude=?) AND (owner_latitude IS ? OR owner_latitude=?)
-                ''', (
-                    full_name,
-                    owner.get('name', ''),
-                    owner.get('birth_time') or owner.get('birth', ''),
-                    float(owner.get('longitude')) if owner.get('longitude') not in (None, '') else None,
-                    float(owner.get('longitude')) if owner.get('longitude') not in (None, '') else None,
-                    float(owner.get('latitude')) if owner.get('latitude') not in (None, '') else None,
-                    float(owner.get('latitude')) if owner.get('latitude') not in (None, '') else None,
-                ))
-                row = cursor.fetchone()
-                record_id = row[0] if row else None
+        if not record_id:
+            return None
 
-            if not record_id:
-                conn.rollback()
-                return None
+        # 插入分数（覆盖旧评分前先将其移出统计）
+        scores = result.get('scores') or {}
+        self.analytics.apply_company(cursor, record_id, -1)
+        cursor.execute('''
+        INSERT OR REPLACE INTO company_scores
+        (record_id, wuge_score, industry_score, bazi_match_score, xiyong_match_score, shengxiao_score, ziyi_score, total_score, grade)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            record_id,
+            scores.get('wuge_score'),
+            scores.get('industry_score'),
+            scores.get('bazi_match_score'),
+            scores.get('xiyong_match_score'),
+            scores.get('shengxiao_score'),
+            scores.get('ziyi_score'),
+            scores.get('total_score'),
+            scores.get('grade'),
+        ))
+
+        # 插入行业详情（旧表保留）
+        detail_json = json.dumps(result.get('industry_detail', {}), ensure_ascii=False)
+        cursor.execute('''
+        INSERT OR REPLACE INTO company_industry_detail (record_id, detail_json)
+        VALUES (?, ?)
+        ''', (record_id, detail_json))
+
+        # 插入SRD-行业特性分析（新表）
+        ind = result.get('industry_detail') or {}
+        wxa = (ind.get('wuxing_analysis') or {})
+        lca = (ind.get('lucky_char_analysis') or {})
+        cursor.execute('''
+        INSERT OR REPLACE INTO company_industry_analysis (
+            test_id, industry_type, industry_wuxing, name_wuxing_dist, wuxing_match_score,
+            xiyong_match_score, lucky_chars, lucky_char_score, total_score, suggestions
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            record_id,
+            (result.get('parsed') or {}).get('industry_type', ''),
+            ind.get('industry_wuxing', ''),
+            json.dumps(wxa.get('wuxing_dist', {}), ensure_ascii=False),
+            int(wxa.get('match_score', 0)) if wxa.get('match_score') is not None else None,
+            int(ind.get('xiyong_match_score', 0)) if ind.get('xiyong_match_score') is not None else None,
+            json.dumps(lca.get('lucky_chars_found', []), ensure_ascii=False),
+            int(lca.get('lucky_char_score', 0)) if lca.get('lucky_char_score') is not None else None,
+            int(ind.get('total_score', 0)) if ind.get('total_score') is not None else None,
+            json.dumps(ind.get('suggestions', []), ensure_ascii=False)
+        ))
 
-            # 插入分数
-            scores = result.get('scores') or {}
+        # 插入五格结果（全称/主名两套方案）
+        def _insert_wuge(plan_name: str, wuge: Dict, surname: str, given_name: str):
+            if not wuge:
+                return
             cursor.execute('''
-            INSERT OR REPLACE INTO company_scores
-            (record_id, wuge_score, industry_score, bazi_match_score, xiyong_match_score, shengxiao_score, ziyi_score, total_score, grade)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT OR REPLACE INTO company_wuge_results (
+                surname, given_name, test_id,
+                tiange, tiange_element, tiange_meaning,
+                renge, renge_element, renge_meaning,
+                dige, dige_element, dige_meaning,
+                waige, waige_element, waige_meaning,
+                zongge, zongge_element, zongge_meaning,
+                sancai, sancai_meaning, wuge_score, plan
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
-                record_id,
-                scores.get('wuge_score'),
-                scores.get('industry_score'),
-                scores.get('bazi_match_score'),
-                scores.get('xiyong_match_score'),
-                scores.get('shengxiao_score'),
-                scores.get('ziyi_score'),
-                scores.get('total_score'),
-                scores.get('grade'),
+                surname, given_name, record_id,
+                wuge.get('tiange', {}).get('num'), wuge.get('tiange', {}).get('element'), wuge.get('tiange', {}).get('meaning'),
+                wuge.get('renge', {}).get('num'), wuge.get('renge', {}).get('element'), wuge.get('renge', {}).get('meaning'),
+                wuge.get('dige', {}).get('num'), wuge.get('dige', {}).get('element'), wuge.get('dige', {}).get('meaning'),
+                wuge.get('waige', {}).get('num'), wuge.get('waige', {}).get('element'), wuge.get('waige', {}).get('meaning'),
+                wuge.get('zongge', {}).get('num'), wuge.get('zongge', {}).get('element'), wuge.get('zongge', {}).get('meaning'),
+                wuge.get('sancai', ''), wuge.get('sancai_meaning', ''), wuge.get('score', 0), plan_name
             ))
 
-            # 插入行业详情（旧表保留）
-            detail_json = json.dumps(result.get('industry_detail', {}), ensure_ascii=False)
-            cursor.execute('''
-            INSERT OR REPLACE INTO company_industry_detail (record_id, detail_json)
-            VALUES (?, ?)
-            ''', (record_id, detail_json))
+        parsed = result.get('parsed') or {}
+        w_full = result.get('wuge_full')
+        w_main = result.get('wuge_main')
+        _insert_wuge('全称', w_full, parsed.get('prefix', ''), parsed.get('main_name', ''))
+        # 主名方案的 surname/given 需要由计算阶段提供以便入库，这里尝试从 result 附加字段读取
+        split = result.get('main_split') or {}
+        _insert_wuge('主名', w_main, split.get('surname', ''), split.get('given', ''))
 
-            # 插入SRD-行业特性分析（新表）
-            ind = result.get('industry_detail') or {}
-            wxa = (ind.get('wuxing_analysis') or {})
-            lca = (ind.get('lucky_char_analysis') or {})
+        # 插入生肖与字义分析（如有）
+        shengxiao = result.get('shengxiao_detail') or {}
+        if shengxiao:
             cursor.execute('''
-            INSERT OR REPLACE INTO company_industry_analysis (
-                test_id, industry_type, industry_wuxing, name_wuxing_dist, wuxing_match_score,
-                xiyong_match_score, lucky_chars, lucky_char_score, total_score, suggestions
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT OR REPLACE INTO company_shengxiao_analysis (
+                test_id, shengxiao, wuxing, sanhe, liuhe,
+                xi_found, ji_found, wuxing_details, sanhe_found,
+                score, analysis, calculation_summary, calculation_steps,
+                recommended_xi_wuxing, recommended_ji_wuxing, recommended_xi_shengxiao, recommended_ji_shengxiao
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 record_id,
-                (result.get('parsed') or {}).get('industry_type', ''),
-                ind.get('industry_wuxing', ''),
-                json.dumps(wxa.get('wuxing_dist', {}), ensure_ascii=False),
-                int(wxa.get('match_score', 0)) if wxa.get('match_score') is not None else None,
-                int(ind.get('xiyong_match_score', 0)) if ind.get('xiyong_match_score') is not None else None,
-                json.dumps(lca.get('lucky_chars_found', []), ensure_ascii=False),
-                int(lca.get('lucky_char_score', 0)) if lca.get('lucky_char_score') is not None else None,
-                int(ind.get('total_score', 0)) if ind.get('total_score') is not None else None,
-                json.dumps(ind.get('suggestions', []), ensure_ascii=False)
+                shengxiao.get('shengxiao'),
+                shengxiao.get('wuxing'),
+                json.dumps(shengxiao.get('sanhe') or [], ensure_ascii=False),
+                shengxiao.get('liuhe'),
+                json.dumps(shengxiao.get('xi_found') or [], ensure_ascii=False),
+                json.dumps(shengxiao.get('ji_found') or [], ensure_ascii=False),
+                json.dumps(shengxiao.get('wuxing_details') or [], ensure_ascii=False),
+                json.dumps(shengxiao.get('sanhe_found') or [], ensure_ascii=False),
+                int(shengxiao.get('score')) if shengxiao.get('score') is not None else None,
+                shengxiao.get('analysis'),
+                shengxiao.get('calculation_summary'),
+                json.dumps(shengxiao.get('calculation_steps') or [], ensure_ascii=False),
+                json.dumps(shengxiao.get('recommended_xi_wuxing') or [], ensure_ascii=False),
+                json.dumps(shengxiao.get('recommended_ji_wuxing') or [], ensure_ascii=False),
+                json.dumps(shengxiao.get('recommended_xi_shengxiao') or [], ensure_ascii=False),
+                json.dumps(shengxiao.get('recommended_ji_shengxiao') or [], ensure_ascii=False),
             ))
 
-            # 插入五格结果（全称/主名两套方案）
-            def _insert_wuge(plan_name: str, wuge: Dict, surname: str, given_name: str):
-                if not wuge:
-                    return
-                cursor.execute('''
-                INSERT OR REPLACE INTO company_wuge_results (
-                    surname, given_name, test_id,
-                    tiange, tiange_element, tiange_meaning,
-                    renge, renge_element, renge_meaning,
-                    dige, dige_element, dige_meaning,
-                    waige, waige_element, waige_meaning,
-                    zongge, zongge_element, zongge_meaning,
-                    sancai, sancai_meaning, wuge_score, plan
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    surname, given_name, record_id,
-                    wuge.get('tiange', {}).get('num'), wuge.get('tiange', {}).get('element'), wuge.get('tiange', {}).get('meaning'),
-                    wuge.get('renge', {}).get('num'), wuge.get('renge', {}).get('element'), wuge.get('renge', {}).get('meaning'),
-                    wuge.get('dige', {}).get('num'), wuge.get('dige', {}).get('element'), wuge.get('dige', {}).get('meaning'),
-                    wuge.get('waige', {}).get('num'), wuge.get('waige', {}).get('element'), wuge.get('waige', {}).get('meaning'),
-                    wuge.get('zongge', {}).get('num'), wuge.get('zongge', {}).get('element'), wuge.get('zongge', {}).get('meaning'),
-                    wuge.get('sancai', ''), wuge.get('sancai_meaning', ''), wuge.get('score', 0), plan_name
-                ))
-
-            parsed = result.get('parsed') or {}
-            w_full = result.get('wuge_full')
-            w_main = result.get('wuge_main')
-            _insert_wuge('全称', w_full, parsed.get('prefix', ''), parsed.get('main_name', ''))
-            # 主名方案的 surname/given 需要由计算阶段提供以便入库，这里尝试从 result 附加字段读取
-            split = result.get('main_split') or {}
-            _insert_wuge('主名', w_main, split.get('surname', ''), split.get('given', ''))
-
-            # 插入生肖与字义分析（如有）
-            shengxiao = result.get('shengxiao_detail') or {}
-            if shengxiao:
-                cursor.execute('''
-                INSERT OR REPLACE INTO company_shengxiao_analysis (
-                    test_id, shengxiao, wuxing, sanhe, liuhe,
-                    xi_found, ji_found, wuxing_details, sanhe_found,
-                    score, analysis, calculation_summary, calculation_steps,
-                    recommended_xi_wuxing, recommended_ji_wuxing, recommended_xi_shengxiao, recommended_ji_shengxiao
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    record_id,
-                    shengxiao.get('shengxiao'),
-                    shengxiao.get('wuxing'),
-                    json.dumps(shengxiao.get('sanhe') or [], ensure_ascii=False),
-                    shengxiao.get('liuhe'),
-                    json.dumps(shengxiao.get('xi_found') or [], ensure_ascii=False),
-                    json.dumps(shengxiao.get('ji_found') or [], ensure_ascii=False),
-                    json.dumps(shengxiao.get('wuxing_details') or [], ensure_ascii=False),
-                    json.dumps(shengxiao.get('sanhe_found') or [], ensure_ascii=False),
-                    int(shengxiao.get('score')) if shengxiao.get('score') is not None else None,
-                    shengxiao.get('analysis'),
-                    shengxiao.get('calculation_summary'),
-                    json.dumps(shengxiao.get('calculation_steps') or [], ensure_ascii=False),
-                    json.dumps(shengxiao.get('recommended_xi_wuxing') or [], ensure_ascii=False),
-                    json.dumps(shengxiao.get('recommended_ji_wuxing') or [], ensure_ascii=False),
-                    json.dumps(shengxiao.get('recommended_xi_shengxiao') or [], ensure_ascii=False),
-                    json.dumps(shengxiao.get('recommended_ji_shengxiao') or [], ensure_ascii=False),
-                ))
+        ziyi = result.get('ziyi_detail') or {}
+        if ziyi:
+            luck = ziyi.get('luck_analysis') or {}
+            tone = ziyi.get('tone_analysis') or {}
+            cursor.execute('''
+            INSERT OR REPLACE INTO company_ziyi_analysis (
+                test_id, luck_details, luck_score, luck_comment,
+                tone_pattern, tones, tone_score, tone_comment,
+                total_score, analysis, chars_detail
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                record_id,
+                json.dumps(luck.get('details') or [], ensure_ascii=False),
+                int(luck.get('score')) if luck.get('score') is not None else None,
+                luck.get('comment'),
+                tone.get('pattern'),
+                json.dumps(tone.get('tones') or [], ensure_ascii=False),
+                int(tone.get('score')) if tone.get('score') is not None else None,
+                tone.get('comment'),
+                int(ziyi.get('score')) if ziyi.get('score') is not None else None,
+                ziyi.get('analysis'),
+                json.dumps(ziyi.get('chars_detail') or [], ensure_ascii=False)
+            ))
 
-            ziyi = result.get('ziyi_detail') or {}
-            if ziyi:
-                luck = ziyi.get('luck_analysis') or {}
-                tone = ziyi.get('tone_analysis') or {}
-                cursor.execute('''
-                INSERT OR REPLACE INTO company_ziyi_analysis (
-                    test_id, luck_details, luck_score, luck_comment,
-                    tone_pattern, tones, tone_score, tone_comment,
-                    total_score, analysis, chars_detail
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    record_id,
-                    json.dumps(luck.get('details') or [], ensure_ascii=False),
-                    int(luck.get('score')) if luck.get('score') is not None else None,
-                    luck.get('comment'),
-                    tone.get('pattern'),
-                    json.dumps(tone.get('tones') or [], ensure_ascii=False),
-                    int(tone.get('score')) if tone.get('score') is not None else None,
-                    tone.get('comment'),
-                    int(ziyi.get('score')) if ziyi.get('score') is not None else None,
-                    ziyi.get('analysis'),
-                    json.dumps(ziyi.get('chars_detail') or [], ensure_ascii=False)
-                ))
+        self.analytics.apply_company(cursor, record_id, 1)
+        return record_id
 
-            conn.commit()
-            return record_id
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"保存公司版结果失败: {e}")
-            return None
-        finally:
-            conn.close()
-
-    def get_company_history(self, limit: int = 20) -> List[Dict]:
-        """查询公司版历史记录，按时间倒序返回最近N条
+    def get_company_history(self, limit: int = 20, cursor: Optional[Tuple[str, int]] = None,
+                            name_prefix: Optional[str] = None,
+                            min_score: Optional[int] = None, max_score: Optional[int] = None,
+                            start_time: Optional[str] = None, end_time: Optional[str] = None) -> List[Dict]:
+        """查询公司版历史记录，按 (created_at, id) 倒序游标分页
+        过滤参数与 query_history 相同，评分过滤作用于 company_scores.total_score
         返回字段：id, full_name, industry_type, owner_name, owner_birth_time, created_at,
                  total_score, grade, wuge_score, industry_score, bazi_match_score, xiyong_match_score
         """
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
         try:
-            cursor.execute('''
+            where, params = _history_filters(
+                't.created_at', 't.id', 't.full_name', 's.total_score',
+                cursor, name_prefix, min_score, max_score, start_time, end_time
+            )
+            db_cursor.execute(f'''
                 SELECT t.id,
                        t.full_name,
                        t.industry_type,
@@ -617,10 +656,11 @@ class Storage:
                        s.xiyong_match_score
                 FROM company_test_records t
                 LEFT JOIN company_scores s ON s.record_id = t.id
-                ORDER BY t.id DESC
+                {where}
+                ORDER BY t.created_at DESC, t.id DESC
                 LIMIT ?
-            ''', (int(limit),))
-            rows = cursor.fetchall()
+            ''', params + [int(limit)])
+            rows = db_cursor.fetchall()
             cols = [
                 'id','full_name','industry_type','owner_name','owner_birth_time','created_at',
                 'total_score','grade','wuge_score','industry_score','bazi_match_score','xiyong_match_score'
@@ -629,6 +669,18 @@ class Storage:
         finally:
             conn.close()
 
+    def iter_company_history(self, page_size: int = 500, **filters) -> Iterator[Dict]:
+        """逐页遍历公司版历史记录（用于导出）"""
+        cursor = None
+        while True:
+            page = self.get_company_history(limit=page_size, cursor=cursor, **filters)
+            if not page:
+                return
+            yield from page
+            if len(page) < page_size:
+                return
+            cursor = (page[-1]['created_at'], page[-1]['id'])
+
     def clear_company_history(self) -> int:
         """清空公司版历史记录，返回删除的主记录条数"""
         conn = sqlite3.connect(self.db_path)
@@ -644,6 +696,7 @@ class Storage:
                 ('company_scores', 'record_id'),
             ]:
                 cursor.execute(f'DELETE FROM {table}')
+            self.analytics.reset(cursor, COMPANY_DIMENSIONS)
             cursor.execute('SELECT COUNT(*) FROM company_test_records')
             count = cursor.fetchone()[0] or 0
             cursor.execute('DELETE FROM company_test_records')
@@ -661,124 +714,182 @@ class Storage:
         :param result_dict: 计算模块返回的结果字典
         :return: 成功返回record_id，失败返回None
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        record_id = self.save_test_results([result_dict])[0]
+        if record_id:
+            logger.info(f"测试结果保存成功，记录ID: {record_id}")
+        return record_id
+    
+    def save_test_results(self, results: List[Dict]) -> List[Optional[int]]:
+        """
+        批量保存测试结果（单个事务，单条失败只回滚该条）
+        :param results: 计算模块返回的结果字典列表
+        :return: 与输入顺序一致的 record_id 列表，失败项为 None
+        """
+        return self._save_many(results, self._insert_test_result, '保存测试结果失败')
+    
+    def _insert_test_result(self, cursor, result_dict: Dict) -> int:
+        """在当前事务中写入一条测试结果，返回 record_id"""
+        # 同一测试已存在时：先移出统计并删除旧明细，再覆盖主记录
+        cursor.execute('''
+        SELECT id FROM test_records
+        WHERE name=? AND birth_time=? AND longitude=? AND latitude=?
+        ''', (
+            result_dict['name'],
+            result_dict['birth_time'],
+            result_dict['longitude'],
+            result_dict['latitude']
+        ))
+        existing = cursor.fetchone()
+        if existing:
+            self.analytics.apply_person(cursor, existing[0], -1)
+            self._delete_result_details(cursor, [existing[0]])
         
-        try:
-            # 插入主记录
+        # 插入主记录
+        cursor.execute('''
+        INSERT OR REPLACE INTO test_records 
+        (name, gender, birth_time, longitude, latitude, comprehensive_score)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            result_dict['name'],
+            result_dict['gender'],
+            result_dict['birth_time'],
+            result_dict['longitude'],
+            result_dict['latitude'],
+            result_dict['comprehensive_score']
+        ))
+        
+        record_id = cursor.lastrowid
+        
+        # 插入五格结果
+        if 'wuge' in result_dict:
+            wuge = result_dict['wuge']
             cursor.execute('''
-            INSERT OR REPLACE INTO test_records 
-            (name, gender, birth_time, longitude, latitude, comprehensive_score)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO wuge_results 
+            (record_id, tiange_num, tiange_element, tiange_fortune,
+             renge_num, renge_element, renge_fortune,
+             dige_num, dige_element, dige_fortune,
+             waige_num, waige_element, waige_fortune,
+             zongge_num, zongge_element, zongge_fortune,
+             sancai, score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
-                result_dict['name'],
-                result_dict['gender'],
-                result_dict['birth_time'],
-                result_dict['longitude'],
-                result_dict['latitude'],
-                result_dict['comprehensive_score']
+                record_id,
+                wuge['tiange']['num'], wuge['tiange']['element'], wuge['tiange']['fortune'],
+                wuge['renge']['num'], wuge['renge']['element'], wuge['renge']['fortune'],
+                wuge['dige']['num'], wuge['dige']['element'], wuge['dige']['fortune'],
+                wuge['waige']['num'], wuge['waige']['element'], wuge['waige']['fortune'],
+                wuge['zongge']['num'], wuge['zongge']['element'], wuge['zongge']['fortune'],
+                wuge['sancai'], wuge['score']
             ))
-            
-            record_id = cursor.lastrowid
-            
-            # 插入五格结果
-            if 'wuge' in result_dict:
-                wuge = result_dict['wuge']
-                cursor.execute('''
-                INSERT INTO wuge_results 
-                (record_id, tiange_num, tiange_element, tiange_fortune,
-                 renge_num, renge_element, renge_fortune,
-                 dige_num, dige_element, dige_fortune,
-                 waige_num, waige_element, waige_fortune,
-                 zongge_num, zongge_element, zongge_fortune,
-                 sancai, score)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    record_id,
-                    wuge['tiange']['num'], wuge['tiange']['element'], wuge['tiange']['fortune'],
-                    wuge['renge']['num'], wuge['renge']['element'], wuge['renge']['fortune'],
-                    wuge['dige']['num'], wuge['dige']['element'], wuge['dige']['fortune'],
-                    wuge['waige']['num'], wuge['waige']['element'], wuge['waige']['fortune'],
-                    wuge['zongge']['num'], wuge['zongge']['element'], wuge['zongge']['fortune'],
-                    wuge['sancai'], wuge['score']
-                ))
-            
-            # 插入八字结果
-            if 'bazi' in result_dict:
-                bazi = result_dict['bazi']
-                cursor.execute('''
-                INSERT INTO bazi_results 
-                (record_id, bazi_str, wuxing, nayin, wuxing_geshu, wuxing_strength,
-                 tongyi_elements, tongyi_strength, tongyi_percent,
-                 yilei_elements, yilei_strength, yilei_percent,
-                 rizhu_qiangruo, siji_yongshen, xiyong_shen, ji_shen, jixiang_color, score)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    record_id,
-                    bazi['bazi_str'],
-                    bazi['wuxing'],
-                    bazi['nayin'],
-                    json.dumps(bazi.get('geshu', {}), ensure_ascii=False),
-                    json.dumps(bazi.get('wuxing_strength', {}), ensure_ascii=False),
-                    json.dumps(bazi.get('tongyi', {}).get('elements', []), ensure_ascii=False),
-                    bazi.get('tongyi', {}).get('strength', 0),
-                    bazi.get('tongyi', {}).get('percent', 0),
-                    json.dumps(bazi.get('yilei', {}).get('elements', []), ensure_ascii=False),
-                    bazi.get('yilei', {}).get('strength', 0),
-                    bazi.get('yilei', {}).get('percent', 0),
-                    bazi.get('rizhu', ''),
-                    bazi.get('siji', ''),
-                    json.dumps(bazi.get('xiyong_shen', []), ensure_ascii=False),
-                    json.dumps(bazi.get('ji_shen', []), ensure_ascii=False),
-                    bazi.get('color', ''),
-                    bazi['score']
-                ))
-            
-            # 插入字义结果
-            if 'ziyi' in result_dict:
-                ziyi = result_dict['ziyi']
-                cursor.execute('''
-                INSERT INTO ziyi_results (record_id, analysis, score)
-                VALUES (?, ?, ?)
-                ''', (record_id, ziyi['analysis'], ziyi['score']))
-            
-            # 插入生肖结果
-            if 'shengxiao' in result_dict:
-                sx = result_dict['shengxiao']
-                cursor.execute('''
-                INSERT INTO shengxiao_results 
-                (record_id, shengxiao, xi_zigen, ji_zigen, score)
-                VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    record_id,
-                    sx['shengxiao'],
-                    json.dumps(sx.get('xi_zigen', []), ensure_ascii=False),
-                    json.dumps(sx.get('ji_zigen', []), ensure_ascii=False),
-                    sx['score']
-                ))
-            
-            # 插入称骨结果
-            if 'chenggu' in result_dict:
-                cg = result_dict['chenggu']
-                cursor.execute('''
-                INSERT INTO chenggu_results 
-                (record_id, bone_weight, fortune_text, comment)
-                VALUES (?, ?, ?, ?)
-                ''', (
-                    record_id,
-                    cg['weight'],
-                    cg.get('fortune_text', ''),
-                    cg.get('comment', '')
-                ))
+        
+        # 插入八字结果
+        if 'bazi' in result_dict:
+            bazi = result_dict['bazi']
+            cursor.execute('''
+            INSERT INTO bazi_results 
+            (record_id, bazi_str, wuxing, nayin, wuxing_geshu, wuxing_strength,
+             tongyi_elements, tongyi_strength, tongyi_percent,
+             yilei_elements, yilei_strength, yilei_percent,
+             rizhu_qiangruo, siji_yongshen, xiyong_shen, ji_shen, jixiang_color, score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                record_id,
+                bazi['bazi_str'],
+                bazi['wuxing'],
+                bazi['nayin'],
+                json.dumps(bazi.get('geshu', {}), ensure_ascii=False),
+                json.dumps(bazi.get('wuxing_strength', {}), ensure_ascii=False),
+                json.dumps(bazi.get('tongyi', {}).get('elements', []), ensure_ascii=False),
+                bazi.get('tongyi', {}).get('strength', 0),
+                bazi.get('tongyi', {}).get('percent', 0),
+                json.dumps(bazi.get('yilei', {}).get('elements', []), ensure_ascii=False),
+                bazi.get('yilei', {}).get('strength', 0),
+                bazi.get('yilei', {}).get('percent', 0),
+                bazi.get('rizhu', ''),
+                bazi.get('siji', ''),
+                json.dumps(bazi.get('xiyong_shen', []), ensure_ascii=False),
+                json.dumps(bazi.get('ji_shen', []), ensure_ascii=False),
+                bazi.get('color', ''),
+                bazi['score']
+            ))
+        
+        # 插入字义结果
+        if 'ziyi' in result_dict:
+            ziyi = result_dict['ziyi']
+            cursor.execute('''
+            INSERT INTO ziyi_results (record_id, analysis, score)
+            VALUES (?, ?, ?)
+            ''', (record_id, ziyi['analysis'], ziyi['score']))
+        
+        # 插入生肖结果
+        if 'shengxiao' in result_dict:
+            sx = result_dict['shengxiao']
+            cursor.execute('''
+            INSERT INTO shengxiao_results 
+            (record_id, shengxiao, xi_zigen, ji_zigen, score)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (
+                record_id,
+                sx['shengxiao'],
+                json.dumps(sx.get('xi_zigen', []), ensure_ascii=False),
+                json.dumps(sx.get('ji_zigen', []), ensure_ascii=False),
+                sx['score']
+            ))
+        
+        # 插入称骨结果
+        if 'chenggu' in result_dict:
+            cg = result_dict['chenggu']
+            cursor.execute('''
+            INSERT INTO chenggu_results 
+            (record_id, bone_weight, fortune_text, comment)
+            VALUES (?, ?, ?, ?)
+            ''', (
+                record_id,
+                cg['weight'],
+                cg.get('fortune_text', ''),
+                cg.get('comment', '')
+            ))
+        
+        self.analytics.apply_person(cursor, record_id, 1)
+        return record_id
+    
+    def _save_many(self, results: List[Dict], insert_func, error_label: str) -> List[Optional[int]]:
+        """
+        在一个事务中逐条写入结果，每条使用保存点隔离
+        :param insert_func: 单条写入函数 (cursor, result) -> record_id
+        :return: record_id 列表，失败项为 None
+        """
+        if not results:
+            return []
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        record_ids = []
+        
+        try:
+            # INSERT OR REPLACE 覆盖旧行时需要触发删除触发器，保持行数统计准确
+            cursor.execute('PRAGMA recursive_triggers = ON')
+            cursor.execute('BEGIN')
+            for result in results:
+                cursor.execute('SAVEPOINT save_result')
+                try:
+                    record_id = insert_func(cursor, result)
+                except Exception as e:
+                    logger.error(f"{error_label}: {e}")
+                    record_id = None
+                
+                if not record_id:
+                    cursor.execute('ROLLBACK TO SAVEPOINT save_result')
+                cursor.execute('RELEASE SAVEPOINT save_result')
+                record_ids.append(record_id)
             
             conn.commit()
-            logger.info(f"测试结果保存成功，记录ID: {record_id}")
-            return record_id
+            return record_ids
             
         except Exception as e:
             conn.rollback()
-            logger.error(f"保存测试结果失败: {e}")
-            return None
+            logger.error(f"{error_label}: {e}")
+            return [None] * len(results)
         finally:
             conn.close()
     
@@ -902,27 +1013,46 @@ class Storage:
         finally:
             conn.close()
     
-    def query_history(self, limit: int = 10) -> List[Dict]:
-        """查询历史记录"""
+    def query_history(self, limit: int = 10, cursor: Optional[Tuple[str, int]] = None,
+                      name_prefix: Optional[str] = None,
+                      min_score: Optional[int] = None, max_score: Optional[int] = None,
+                      start_time: Optional[str] = None, end_time: Optional[str] = None) -> List[Dict]:
+        """
+        查询历史记录（按 created_at, id 倒序的游标分页）
+        :param limit: 每页条数
+        :param cursor: 上一页最后一条的 (created_at, id)，为空则从最新开始
+        :param name_prefix: 姓名前缀过滤
+        :param min_score: 综合评分下限（含）
+        :param max_score: 综合评分上限（含）
+        :param start_time: 创建时间下限（含），格式 YYYY-MM-DD[ HH:MM:SS]
+        :param end_time: 创建时间上限（含），只给日期时包含当天
+        :return: 记录列表，每条含 id/created_at 可用于构造下一页游标
+        """
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-            SELECT name, gender, birth_time, comprehensive_score, created_at
+            where, params = _history_filters(
+                'created_at', 'id', 'name', 'comprehensive_score',
+                cursor, name_prefix, min_score, max_score, start_time, end_time
+            )
+            db_cursor.execute(f'''
+            SELECT id, name, gender, birth_time, comprehensive_score, created_at
             FROM test_records
-            ORDER BY created_at DESC
+            {where}
+            ORDER BY created_at DESC, id DESC
             LIMIT ?
-            ''', (limit,))
+            ''', params + [int(limit)])
             
             records = []
-            for row in cursor.fetchall():
+            for row in db_cursor.fetchall():
                 records.append({
-                    'name': row[0],
-                    'gender': row[1],
-                    'birth_time': row[2],
-                    'score': row[3],
-                    'created_at': row[4]
+                    'id': row[0],
+                    'name': row[1],
+                    'gender': row[2],
+                    'birth_time': row[3],
+                    'score': row[4],
+                    'created_at': row[5]
                 })
             
             return records
@@ -932,6 +1062,37 @@ class Storage:
             return []
         finally:
             conn.close()
+
+    def iter_history(self, page_size: int = 500, **filters) -> Iterator[Dict]:
+        """
+        逐页遍历全部历史记录（用于导出），内存占用与页大小相关
+        :param page_size: 每页条数
+        :param filters: 与 query_history 相同的过滤参数（cursor 除外）
+        """
+        cursor = None
+        while True:
+            page = self.query_history(limit=page_size, cursor=cursor, **filters)
+            if not page:
+                return
+            yield from page
+            if len(page) < page_size:
+                return
+            cursor = (page[-1]['created_at'], page[-1]['id'])
+
+    @staticmethod
+    def encode_cursor(record: Dict) -> str:
+        """将记录的 (created_at, id) 编码为命令行可传递的游标字符串"""
+        return f"{record['created_at']}|{record['id']}"
+
+    @staticmethod
+    def decode_cursor(token: Optional[str]) -> Optional[Tuple[str, int]]:
+        """解析 encode_cursor 生成的游标字符串"""
+        if not token:
+            return None
+        created_at, _, record_id = token.rpartition('|')
+        if not created_at or not record_id.isdigit():
+            raise ValueError(f"无效的分页游标: {token}")
+        return created_at, int(record_id)
     
     def delete_record(self, record_id: int) -> bool:
         """删除记录"""
@@ -939,6 +1100,8 @@ class Storage:
         cursor = conn.cursor()
         
         try:
+            self.analytics.apply_person(cursor, record_id, -1)
+            self._delete_result_details(cursor, [record_id])
             cursor.execute('DELETE FROM test_records WHERE id=?', (record_id,))
             conn.commit()
             return True
@@ -949,6 +1112,13 @@ class Storage:
         finally:
             conn.close()
     
+    def _delete_result_details(self, cursor, record_ids: List[int]):
+        """删除个人版记录的各项明细结果（不含主记录）"""
+        params = [(rid,) for rid in record_ids]
+        for table in ['chenggu_results', 'shengxiao_results', 'ziyi_results',
+                      'bazi_results', 'wuge_results']:
+            cursor.executemany(f'DELETE FROM {table} WHERE record_id=?', params)
+    
     def clear_all_records(self) -> bool:
         """清空所有历史记录"""
         conn = sqlite3.connect(self.db_path)
@@ -962,6 +1132,7 @@ class Storage:
             cursor.execute('DELETE FROM bazi_results')
             cursor.execute('DELETE FROM wuge_results')
             cursor.execute('DELETE FROM test_records')
+            self.analytics.reset(cursor, PERSON_DIMENSIONS)
             
             conn.commit()
             logger.info("历史记录已清空")
@@ -1001,12 +1172,13 @@ class Storage:
             # 清空所有表
             for table in tables:
                 table_name = table[0]
-                if table_name != 'sqlite_sequence':  # 跳过系统表
+                if table_name not in ('sqlite_sequence', 'table_stats'):  # 跳过系统表和统计元数据
                     cursor.execute(f'DELETE FROM {table_name}')
                     logger.info(f"已清空表: {table_name}")
             
-            # 重置自增ID
+            # 重置自增ID与行数统计
             cursor.execute("DELETE FROM sqlite_sequence")
+            TableStats.reset(cursor)
             
             conn.commit()
             logger.info("所有数据表已清空")
@@ -1018,26 +1190,43 @@ class Storage:
         finally:
             conn.close()
     
-    def get_all_tables_info(self) -> Dict[str, int]:
-        """获取所有表的记录数统计"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            # 获取所有表名
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
-            tables = cursor.fetchall()
-            
-            info = {}
-            for table in tables:
-                table_name = table[0]
-                cursor.execute(f'SELECT COUNT(*) FROM {table_name}')
-                count = cursor.fetchone()[0]
-                info[table_name] = count
-            
-            return info
-        except Exception as e:
-            logger.error(f"获取表信息失败: {e}")
-            return {}
-        finally:
-            conn.close()
+    def get_all_tables_info(self, deep: bool = False) -> Dict[str, int]:
+        """
+        获取所有表的记录数统计
+        :param deep: 为 False 时直接读取统计元数据（不含未跟踪行数的表）；为 True 时重新 COUNT(*) 全部表并修正元数据
+        """
+        stats = TableStats(self.db_path).get_all(deep=deep)
+        return {table: info['row_count'] for table, info in stats.items() if info['row_count'] is not None}
+
+def _history_filters(created_col: str, id_col: str, name_col: str, score_col: str,
+                     cursor: Optional[Tuple[str, int]], name_prefix: Optional[str],
+                     min_score: Optional[int], max_score: Optional[int],
+                     start_time: Optional[str], end_time: Optional[str]) -> Tuple[str, List]:
+    """构造历史查询的 WHERE 子句与参数
+
+    游标使用行值比较 (created_at, id) < (?, ?)，可直接走 (created_at, id) 索引；
+    姓名前缀转换为区间条件，以便利用姓名所在的唯一索引。
+    """
+    clauses = []
+    params: List = []
+    if cursor:
+        clauses.append(f'({created_col}, {id_col}) < (?, ?)')
+        params.extend([cursor[0], int(cursor[1])])
+    if name_prefix:
+        clauses.append(f'{name_col} >= ? AND {name_col} < ?')
+        params.extend([name_prefix, name_prefix + '\U0010ffff'])
+    if min_score is not None:
+        clauses.append(f'{score_col} >= ?')
+        params.append(int(min_score))
+    if max_score is not None:
+        clauses.append(f'{score_col} <= ?')
+        params.append(int(max_score))
+    if start_time:
+        clauses.append(f'{created_col} >= ?')
+        params.append(start_time)
+    if end_time:
+        # 只给日期时包含当天全部记录
+        clauses.append(f'{created_col} <= ?')
+        params.append(end_time + ' 23:59:59' if len(end_time) == 10 else end_time)
+    where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    return where, params
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+表统计元数据模块 - 维护各数据表的行数与内容指纹
+
+资源表的统计由 DataLoader 在导入事务中写入；历史记录表由触发器随 Storage 的写入/删除增量更新。
+统计报表和完整性检查直接读取元数据，deep 模式下才重新 COUNT(*)；
+其他表（如行指纹表，行数与资源表总行数相当）不维护统计，只在 deep 模式下计数。
+"""
+
+import hashlib
+import sqlite3
+import logging
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 由触发器维护行数的历史记录表
+HISTORY_TABLES = [
+    'test_records', 'wuge_results', 'bazi_results', 'ziyi_results',
+    'shengxiao_results', 'chenggu_results',
+    'company_test_records', 'company_scores', 'company_industry_detail',
+    'company_wuge_results', 'company_industry_analysis',
+    'company_shengxiao_analysis', 'company_ziyi_analysis'
+]
+
+
+class TableStats:
+    """表统计元数据类"""
+
+    def __init__(self, db_path: str = 'local.db'):
+        self.db_path = db_path
+
+    @staticmethod
+    def ensure_schema(cursor):
+        """创建统计元数据表"""
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_stats (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            content_hash TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+
+    @classmethod
+    def install_count_triggers(cls, cursor, tables: Iterable[str]):
+        """
+        为表创建行数触发器，首次创建时用 COUNT(*) 初始化一次行数
+        注意：INSERT OR REPLACE 覆盖旧行时，只有连接开启 recursive_triggers 才会触发删除计数
+        """
+        cls.ensure_schema(cursor)
+        for table in tables:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name=?", (f'trg_stats_{table}_insert',)
+            )
+            if cursor.fetchone():
+                continue
+
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            cls.set(cursor, table, cursor.fetchone()[0])
+            for event, delta in (('insert', 1), ('delete', -1)):
+                cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_{event}
+                AFTER {event.upper()} ON {table}
+                BEGIN
+                    INSERT INTO table_stats (table_name, row_count) VALUES ('{table}', {delta})
+                    ON CONFLICT(table_name) DO UPDATE SET
+                        row_count = row_count + ({delta}),
+                        updated_at = CURRENT_TIMESTAMP;
+                END
+                ''')
+
+    @staticmethod
+    def set(cursor, table: str, row_count: int, content_hash: Optional[str] = None):
+        """写入一个表的行数与内容指纹（需在修改该表的同一事务中调用）"""
+        cursor.execute('''
+        INSERT INTO table_stats (table_name, row_count, content_hash, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(table_name) DO UPDATE SET
+            row_count = excluded.row_count,
+            content_hash = excluded.content_hash,
+            updated_at = excluded.updated_at
+        ''', (table, row_count, content_hash))
+
+    @staticmethod
+    def reset(cursor):
+        """清空所有数据表后，将统计归零"""
+        cursor.execute('UPDATE table_stats SET row_count = 0, content_hash = NULL, updated_at = CURRENT_TIMESTAMP')
+
+    def get_all(self, deep: bool = False) -> Dict[str, Dict]:
+        """
+        获取所有数据表的统计
+        :param deep: 为 True 时重新 COUNT(*) 每个表并修正元数据
+        :return: {表名: {'row_count', 'content_hash', 'updated_at'}}；
+                 非 deep 模式下未跟踪的表 row_count 为 None
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            self.ensure_schema(cursor)
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+            tables = [row[0] for row in cursor.fetchall()
+                      if row[0] not in ('sqlite_sequence', 'table_stats') and not row[0].startswith('sqlite_stat')]
+
+            cursor.execute('SELECT table_name, row_count, content_hash, updated_at FROM table_stats')
+            stats = {row[0]: {'row_count': row[1], 'content_hash': row[2], 'updated_at': row[3]}
+                     for row in cursor.fetchall()}
+
+            result = {}
+            for table in tables:
+                tracked = table in stats
+                if not tracked:
+                    # 未跟踪的表（行指纹、加载记录、统计聚合等）可能很大，只在 deep 模式下现场计数，不写入元数据
+                    row_count = None
+                    if deep:
+                        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                        row_count = cursor.fetchone()[0]
+                    result[table] = {'row_count': row_count, 'content_hash': None, 'updated_at': None}
+                    continue
+                if deep:
+                    cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                    row_count = cursor.fetchone()[0]
+                    if stats[table]['row_count'] != row_count:
+                        logger.warning(f"表统计与实际行数不一致: {table} "
+                                       f"{stats[table]['row_count']} -> {row_count}")
+                    fingerprint = self._fingerprint_hash(cursor, table) or stats[table]['content_hash']
+                    self.set(cursor, table, row_count, fingerprint)
+                    stats[table].update(row_count=row_count, content_hash=fingerprint)
+                result[table] = stats[table]
+
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"获取表统计失败: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _fingerprint_hash(cursor, table: str) -> Optional[str]:
+        """由资源行指纹重新计算表内容指纹（非资源表返回 None）"""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='resource_row_fingerprints'"
+        )
+        if not cursor.fetchone():
+            return None
+        cursor.execute(
+            'SELECT row_key, row_hash FROM resource_row_fingerprints WHERE table_name=? ORDER BY row_key',
+            (table,)
+        )
+        return content_hash(cursor)
+
+
+def content_hash(rows: Iterable) -> Optional[str]:
+    """按行键排序后的 (行键, 行哈希) 序列计算表内容指纹，空表返回 None"""
+    hasher = hashlib.md5()
+    empty = True
+    for row_key, row_hash in rows:
+        hasher.update(f'{row_key}\t{row_hash}\n'.encode('utf-8'))
+        empty = False
+    return None if empty else hasher.hexdigest()
@@ -10,6 +10,7 @@ from typing import Optional, Tuple, List, Dict
 
 from .calculator import Calculator
 from .storage import Storage
+from .write_behind import WriteBehindQueue
 
 logger = logging.getLogger(__name__)
 
@@ -21,11 +22,25 @@ class UserInterface:
         """初始化用户界面"""
         self.calculator = calculator
         self.storage = storage
+        self.persister: Optional[WriteBehindQueue] = None
     
     def run(self):
         """主运行循环"""
         self._show_welcome()
         
+        # 结果由后台线程保存，显示结果不等待磁盘写入
+        self.persister = WriteBehindQueue(self.storage)
+        try:
+            self._run_loop()
+        finally:
+            persist_stats = self.persister.close()
+            if persist_stats['failed']:
+                print(f"\n警告: {persist_stats['failed']} 条结果保存失败，请查看日志")
+        
+        print("\n感谢使用！再见！")
+    
+    def _run_loop(self):
+        """交互循环"""
         while True:
             try:
                 # 获取用户输入
@@ -68,8 +83,8 @@ class UserInterface:
                         surname, given_name, gender, birth_time, longitude, latitude
                     )
                     
-                    # 保存结果
-                    self.storage.save_test_result(result)
+                    # 保存结果（后台写入）
+                    self.persister.save_test_result(result)
                 
                 # 显示结果
                 self._display_result(result)
@@ -84,8 +99,6 @@ class UserInterface:
             except Exception as e:
                 print(f"\n处理出错: {e}")
                 logger.exception(f"运行时错误: {e}")
-        
-        print("\n感谢使用！再见！")
     
     def _show_welcome(self):
         """显示欢迎信息"""
@@ -437,6 +450,9 @@ class UserInterface:
     
     def _handle_clear_history(self):
         """处理清空历史记录"""
+        # 先写完待保存的结果，避免清空后又被写回
+        if self.persister:
+            self.persister.flush()
         count = self.storage.get_records_count()
         if count == 0:
             print("\n当前没有历史记录\n")
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Unihan 数据读取模块 - 一次扫描提取转换所需的全部字段，并缓存为二进制文件
+
+每个 Unihan 文本文件只读取一遍，保留所需字段的原始值（笔画、拼音、简繁变体、IRG 来源），
+取第一个值、转小写等规则在读取后再应用，因此调整转换规则不需要重新解析。
+解析结果以 pickle 保存，缓存键由各源文件内容哈希和字段集合计算，源文件变化后自动失效。
+"""
+
+import os
+import pickle
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 缓存格式版本，修改缓存结构时递增
+CACHE_VERSION = 1
+
+# 需要保留的字段；IRG 来源字段（kIRG_GSource 等）按前缀匹配
+UNIHAN_FIELDS = ('kTotalStrokes', 'kMandarin', 'kSimplifiedVariant', 'kTraditionalVariant')
+UNIHAN_FIELD_PREFIXES = ('kIRG_',)
+
+
+def read_unihan(paths: Iterable[str], fields: Iterable[str] = UNIHAN_FIELDS,
+                prefixes: Iterable[str] = UNIHAN_FIELD_PREFIXES) -> Dict[str, Dict[str, str]]:
+    """
+    逐行扫描 Unihan 文本文件，提取所需字段
+    :param paths: Unihan_*.txt 文件路径，不存在的文件跳过
+    :return: {字段名: {U+XXXX: 原始值}}
+    """
+    fields = frozenset(fields)
+    prefixes = tuple(prefixes)
+    result: Dict[str, Dict[str, str]] = {}
+
+    for path in paths:
+        if not Path(path).exists():
+            logger.warning(f"Unihan 文件不存在: {path}")
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.startswith('U+'):
+                    # 注释、空行
+                    continue
+                parts = line.rstrip('\n').split('\t', 2)
+                if len(parts) < 3:
+                    continue
+                unicode_str, field, value = parts
+                if field in fields or field.startswith(prefixes):
+                    result.setdefault(field, {})[unicode_str] = value.strip()
+
+    return result
+
+
+class UnihanStore:
+    """带缓存的 Unihan 字段存储"""
+
+    def __init__(self, paths: List[str], cache_path: Optional[str] = None):
+        """
+        :param paths: Unihan_*.txt 文件路径
+        :param cache_path: 缓存文件路径，默认放在第一个源文件所在目录
+        """
+        self.paths = [str(p) for p in paths]
+        self.cache_path = Path(cache_path) if cache_path else Path(self.paths[0]).parent / 'unihan_cache.pickle'
+        self.from_cache = False
+
+    def cache_key(self) -> str:
+        """由缓存版本、字段集合与各源文件内容哈希计算缓存键"""
+        hasher = hashlib.md5(f'{CACHE_VERSION}|{UNIHAN_FIELDS}|{UNIHAN_FIELD_PREFIXES}'.encode('utf-8'))
+        for path in self.paths:
+            hasher.update(f'\n{Path(path).name}:'.encode('utf-8'))
+            if not Path(path).exists():
+                continue
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def load(self) -> Dict[str, Dict[str, str]]:
+        """读取字段数据：缓存有效时直接加载，否则解析源文件并写入缓存"""
+        key = self.cache_key()
+        cached = self._read_cache(key)
+        if cached is not None:
+            self.from_cache = True
+            return cached
+
+        self.from_cache = False
+        data = read_unihan(self.paths)
+        self._write_cache(key, data)
+        return data
+
+    def _read_cache(self, key: str) -> Optional[Dict[str, Dict[str, str]]]:
+        """缓存存在且键一致时返回缓存数据"""
+        if not self.cache_path.exists():
+            return None
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('key') == key:
+                return cached['data']
+        except Exception as e:
+            logger.warning(f"读取 Unihan 缓存失败，将重新解析: {e}")
+        return None
+
+    def _write_cache(self, key: str, data: Dict[str, Dict[str, str]]):
+        """先写临时文件再替换，避免中断时留下损坏的缓存"""
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'key': key, 'data': data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"写入 Unihan 缓存失败: {e}")
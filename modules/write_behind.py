@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+后台写入模块 - 将结果持久化与计算解耦
+
+计算线程只负责把结果放入有界队列，后台线程按批次合并为单个事务写入数据库。
+队列满时 submit 阻塞（背压），close 保证退出前全部写完。
+"""
+
+import atexit
+import queue
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+_STOP = object()
+
+# 写入失败时最多保留的错误明细条数（failed_count 统计全部失败）
+MAX_ERRORS = 100
+
+
+class WriteBehindQueue:
+    """后台批量写入队列"""
+
+    def __init__(self, storage, max_pending: int = 1000, batch_size: int = 200,
+                 flush_interval: float = 0.5):
+        """
+        :param storage: Storage 实例（需提供 save_test_results / save_company_results）
+        :param max_pending: 队列上限，超过时 submit 阻塞等待
+        :param batch_size: 每个事务最多写入的结果数
+        :param flush_interval: 凑批等待的最长秒数
+        """
+        self.storage = storage
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.saved_count = 0
+        self.failed_count = 0
+        # 只保留前 MAX_ERRORS 条失败明细
+        self.errors: List[str] = []
+
+        self._queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        # 进程退出前确保队列中的结果全部落库
+        atexit.register(self.close)
+
+    def save_test_result(self, result: Dict, callback: Optional[Callable] = None):
+        """提交个人版结果（与 Storage.save_test_result 用法一致，但不等待写入）"""
+        self.submit('person', result, callback)
+
+    def save_company_result(self, result: Dict, callback: Optional[Callable] = None):
+        """提交公司版结果"""
+        self.submit('company', result, callback)
+
+    def submit(self, kind: str, result: Dict, callback: Optional[Callable] = None):
+        """
+        提交一条待写入结果
+        :param kind: 'person' 或 'company'
+        :param callback: 写入后在后台线程中调用 callback(record_id)，失败时 record_id 为 None
+        """
+        if self._closed:
+            raise RuntimeError("写入队列已关闭")
+        if kind not in ('person', 'company'):
+            raise ValueError(f"未知的结果类型: {kind}")
+        self._queue.put((kind, result, callback))
+
+    def flush(self):
+        """阻塞直到已提交的结果全部写入"""
+        self._queue.join()
+
+    def close(self) -> Dict:
+        """
+        写完剩余结果并停止后台线程，返回写入统计（可重复调用）
+        :return: {'saved', 'failed', 'errors'}，errors 为前 MAX_ERRORS 条失败明细
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+            atexit.unregister(self.close)
+            if self.failed_count:
+                logger.error(f"后台写入完成，失败 {self.failed_count} 条: {self.errors[:5]}")
+            else:
+                logger.info(f"后台写入完成，共 {self.saved_count} 条")
+        return {
+            'saved': self.saved_count,
+            'failed': self.failed_count,
+            'errors': list(self.errors)
+        }
+
+    def _run(self):
+        """后台线程：凑批 -> 单事务写入"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List):
+        """按结果类型分组写入，每组一个事务"""
+        for kind, save_many in (('person', self.storage.save_test_results),
+                                ('company', self.storage.save_company_results)):
+            group = [(result, callback) for k, result, callback in batch if k == kind]
+            if not group:
+                continue
+
+            try:
+                record_ids = save_many([result for result, _ in group])
+            except Exception as e:
+                logger.exception(f"后台写入失败: {e}")
+                record_ids = [None] * len(group)
+
+            for (result, callback), record_id in zip(group, record_ids):
+                if record_id:
+                    self.saved_count += 1
+                else:
+                    self.failed_count += 1
+                    if len(self.errors) < MAX_ERRORS:
+                        name = result.get('name') or (result.get('parsed') or {}).get('full_name', '未知')
+                        self.errors.append(f"{kind}: {name}")
+                if callback:
+                    try:
+                        callback(record_id)
+                    except Exception as e:
+                        logger.error(f"写入回调出错: {e}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量输入去重测试 - 验证相同输入只计算、保存一次，结果按原顺序输出到每一行
+"""
+
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.batch_dedup import DuplicateIndex, record_key
+from modules.batch_processor import BatchProcessor
+
+INPUT = """name,gender,birth_date,birth_time,longitude,latitude
+张三,男,1990-01-01,08:00,116.4074,39.9042
+李四,女,1992-05-20,,,
+张三,男,1990-1-1,8:00,116.41,39.90
+张三,女,1990-01-01,08:00,116.4074,39.9042
+王,男,1985-03-15,,,
+李四,女,1992-05-20,12:00,116.4074,39.9042
+王,男,1985-03-15,,,
+"""
+
+
+class CountingCalculator:
+    def __init__(self):
+        self.calls = []
+
+    def calculate_name(self, surname, given_name, gender, birth_time, **kwargs):
+        self.calls.append((surname + given_name, gender, birth_time))
+        return {'surname': surname, 'given_name': given_name, 'gender': gender,
+                'birth_time': birth_time, 'comprehensive_score': len(self.calls)}
+
+
+class FakeStorage:
+    def __init__(self):
+        self.saved = []
+
+    def save_test_results(self, results):
+        self.saved.extend(results)
+        return list(range(1, len(results) + 1))
+
+    def save_company_results(self, results):
+        return []
+
+
+def test_duplicate_index():
+    """测试键规整，以及只缓存最近的结果（超过上限时淘汰最久未用的）"""
+    a = {'name': '张三', 'gender': '男', 'birth_date': '1990-01-01', 'birth_time': '08:00'}
+    b = {'name': '张三', 'gender': '男', 'birth_date': '1990-1-1', 'birth_time': '8:00',
+         'longitude': 116.4074, 'latitude': 39.9042}
+    c = {'name': '张三', 'gender': '男', 'birth_date': '1990-01-01', 'birth_time': '08:00', 'longitude': 120.0}
+    d = {'name': '李四', 'gender': '女', 'birth_date': '1992-05-20'}
+    assert record_key(a) == record_key(b) != record_key(c)
+
+    index = DuplicateIndex(max_size=2)
+    assert index.take(record_key(a)) is None  # 第一次出现需要计算
+    index.store(record_key(a), {'score': 1})
+    index.store(record_key(c), {'score': 2})
+    assert index.take(record_key(b)) == {'score': 1}  # a 成为最近使用
+    index.store(record_key(d), {'score': 3})  # 超过上限，淘汰最久未用的 c
+    assert index.take(record_key(c)) is None
+    assert index.take(record_key(a)) == {'score': 1}
+    assert index.take(record_key(d)) == {'score': 3}
+    assert index.collapsed == 3
+
+
+def test_batch_dedup():
+    """测试批量处理只计算唯一输入，输出行数与输入一致并记录合并条数"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            input_file = Path(tmp) / 'names.csv'
+            input_file.write_text(INPUT, encoding='utf-8')
+
+            calculator, storage = CountingCalculator(), FakeStorage()
+            result = BatchProcessor(calculator, storage, 'json', dedup=True).process_file(str(input_file))
+            output = json.loads((Path(tmp) / 'names_result.json').read_text(encoding='utf-8'))
+
+            print(f"计算: {calculator.calls}")
+            print(f"汇总: total={output['total']} duplicates={output['duplicates']}")
+            assert len(calculator.calls) == 3  # 张三(男)、李四、张三(女)；"王" 计算前即失败
+            assert len(storage.saved) == 3
+            assert result['duplicate_count'] == output['duplicates'] == 3
+            assert result['success_count'] == 5 and result['failed_count'] == 2
+
+            rows = output['results']
+            assert [r['name'] for r in rows] == ['张三', '李四', '张三', '张三', '王', '李四', '王']
+            assert rows[0] == rows[2] and rows[1] == rows[5] and rows[4] == rows[6]
+            assert rows[0] != rows[3]
+
+            calculator = CountingCalculator()
+            BatchProcessor(calculator, FakeStorage(), 'json').process_file(str(input_file))
+            assert len(calculator.calls) == 5
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    test_duplicate_index()
+    test_batch_dedup()
+    print("✓ 测试通过")
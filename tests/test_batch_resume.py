@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量断点续跑测试 - 验证中断后 --resume 只处理剩余的行，且续写后的结果与一次跑完一致
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.batch_processor import BatchProcessor
+from modules.checkpoint import checkpoint_path_for
+
+ROWS = 12
+
+
+class FakeCalculator:
+    """按姓名生成固定结果，处理到指定姓名时模拟中断"""
+
+    def __init__(self, interrupt_at=None):
+        self.interrupt_at = interrupt_at
+        self.calls = []
+
+    def calculate_name(self, surname, given_name, **kwargs):
+        name = surname + given_name
+        if name == self.interrupt_at:
+            raise KeyboardInterrupt
+        self.calls.append(name)
+        return {'surname': surname, 'given_name': given_name,
+                'comprehensive_score': 60 + int(given_name[1:]), 'gender': kwargs['gender']}
+
+
+class FakeStorage:
+    def __init__(self):
+        self.saved = []
+
+    def save_test_results(self, results):
+        self.saved.extend(r['surname'] + r['given_name'] for r in results)
+        return list(range(1, len(results) + 1))
+
+    def save_company_results(self, results):
+        return []
+
+
+def _read_output(path: Path, output_format: str):
+    if output_format == 'json':
+        data = json.loads(path.read_text(encoding='utf-8'))
+        return data['results'], data['total']
+    if output_format == 'jsonl':
+        return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()], None
+    if output_format == 'csv':
+        return path.read_text(encoding='utf-8-sig').splitlines(), None
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute('SELECT * FROM results ORDER BY seq').fetchall(), \
+            conn.execute("SELECT value FROM summary WHERE key='total'").fetchone()
+    finally:
+        conn.close()
+
+
+def test_batch_resume():
+    """测试各输出格式中断续跑的结果与一次跑完一致，已完成的行不重算"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            names = [f'张名{i}' for i in range(ROWS)]
+            input_file = Path(tmp) / 'names.txt'
+            input_file.write_text('# 姓名 性别 出生日期\n' + ''.join(f'{n} 男 1990-01-01\n' for n in names),
+                                  encoding='utf-8')
+
+            for output_format in ('json', 'jsonl', 'csv', 'sqlite'):
+                output_file = Path(tmp) / f"names_result{'.db' if output_format == 'sqlite' else '.' + output_format}"
+                processor = BatchProcessor(FakeCalculator(), FakeStorage(), output_format, checkpoint_every=4)
+                assert processor.process_file(str(input_file))['success']
+                expected = _read_output(output_file, output_format)
+                assert not checkpoint_path_for(str(output_file)).exists()
+
+                storage = FakeStorage()
+                processor = BatchProcessor(FakeCalculator(interrupt_at='张名7'), storage, output_format,
+                                           checkpoint_every=4)
+                try:
+                    processor.process_file(str(input_file))
+                    assert False, "应当中断"
+                except KeyboardInterrupt:
+                    pass
+                assert checkpoint_path_for(str(output_file)).exists()
+                if output_format in ('jsonl', 'csv'):
+                    # 模拟检查点之后尚未确认的写入
+                    with open(output_file, 'a', encoding='utf-8') as f:
+                        f.write('未确认的内容\n')
+
+                calculator = FakeCalculator()
+                result = BatchProcessor(calculator, storage, output_format).process_file(str(input_file), resume=True)
+                print(f"{output_format}: 续跑处理 {calculator.calls}")
+                assert result['success'] and result['success_count'] == ROWS
+                assert calculator.calls == names[7:]
+                assert storage.saved == names
+                assert _read_output(output_file, output_format) == expected
+                assert not checkpoint_path_for(str(output_file)).exists()
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    test_batch_resume()
+    print("✓ 测试通过")
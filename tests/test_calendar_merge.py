@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+万年历合并测试 - 验证按列转换农历日期与逐行转换一致、Excel 行转换为万年历记录，以及重叠日期的冲突统计
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from convert_tools import CALENDAR_EXCEL_COLUMNS, CalendarMerger
+
+# 覆盖闰月、初/十/廿/三十、缺失的 time_str；神位列只有 xi_desc、cai_desc
+EXCEL_ROWS = pd.DataFrame({
+    'id': [19230101, 19230216, 19230417, 19230510, 19231231, 19240101],
+    'time_str': ['一九二二年冬月十五', '一九二三年正月初一', '一九二三年闰二月初十',
+                 '一九二三年三月廿五', '一九二三年冬月廿四', None],
+    'chong': ['冲鼠', '冲牛', None, '冲兔', '冲龙', '冲蛇'],
+    'xi_desc': ['东北', None, '西南', '正南', None, '东南'],
+    'cai_desc': ['正北', '正东', None, '正西', None, '正南'],
+    'day_gz': ['甲子', '乙丑', '丙寅', '丁卯', '戊辰', '己巳'],
+})
+
+
+def test_lunar_dates_to_numeric():
+    """测试按列转换与 convert_lunar_date_to_numeric 逐行转换的结果一致"""
+    merger = CalendarMerger()
+    lunar = pd.Series(['二〇二四年正月初一', '二〇二三年闰二月初十', '一九〇〇年冬月十一', '二〇二四年腊月三十',
+                       '二〇二四年三月廿', '二〇二四年四月二十', '二〇二四年五月十', '二〇二四年六月',
+                       '不是日期', '', None, float('nan')])
+    numeric = merger.lunar_dates_to_numeric(lunar)
+    print(f"按列转换: {numeric.tolist()}")
+
+    expected = [merger.convert_lunar_date_to_numeric(v, '') for v in lunar]
+    assert numeric.tolist() == expected
+    assert expected[:4] == ['2024-01-01', '2023-02-10', '1900-11-11', '2024-12-30']
+    assert expected[-4:] == ['', '', '', '']
+
+
+def test_calendar_frame():
+    """测试 Excel 行转换为万年历记录：字段顺序、农历日期、缺失的神位列与空值"""
+    merger = CalendarMerger()
+    frame = merger.calendar_frame(EXCEL_ROWS)
+
+    assert list(frame.columns) == [field for field, _ in CALENDAR_EXCEL_COLUMNS]
+    assert frame['gregorian_date'].tolist() == ['1923-01-01', '1923-02-16', '1923-04-17', '1923-05-10',
+                                                '1923-12-31', '1924-01-01']
+    assert frame['lunar_date'].tolist() == [merger.convert_lunar_date_to_numeric(v, '')
+                                            for v in EXCEL_ROWS['time_str']]
+    assert frame['lunar_date'].tolist()[-1] == ''
+    assert frame['lunar_show'].tolist()[-1] == ''
+    assert frame['shen_wei'].tolist() == ['喜神：东北 财神：正北', '财神：正东', '喜神：西南',
+                                          '喜神：正南 财神：正西', '', '喜神：东南 财神：正南']
+    assert frame['sui_sha'].tolist() == [''] * len(frame)  # 缺失的列
+    assert frame['chong'].tolist()[2] == ''
+    assert not frame['is_holiday'].any()
+
+
+def test_conflict_report():
+    """测试只统计重叠的日期，同一日期取最后一条，并按字段统计取值不同的日期数"""
+    merger = CalendarMerger()
+    new = merger.calendar_frame(EXCEL_ROWS)
+    existing = pd.DataFrame([
+        {'gregorian_date': '1923-01-01', 'lunar_date': '1922-11-15', 'chong': '冲马', 'day_ganzhi': '甲子'},
+        {'gregorian_date': '1923-02-16', 'lunar_date': '1923-01-01', 'chong': '冲牛', 'day_ganzhi': '乙丑'},
+        {'gregorian_date': '1923-04-17', 'lunar_date': '1923-02-09', 'chong': '冲羊', 'day_ganzhi': '丙寅'},
+        {'gregorian_date': '1923-04-17', 'lunar_date': '1923-02-10', 'chong': None, 'day_ganzhi': '丙寅'},
+        {'gregorian_date': '1969-12-31', 'lunar_date': '1969-11-23', 'chong': '冲狗', 'day_ganzhi': '癸酉'},
+    ])
+    report = CalendarMerger.conflict_report(existing, new)
+    print(f"冲突统计: {report}")
+
+    # 1923-04-17 取最后一条已有记录，与新记录一致（空值按 '' 比较）
+    assert report == {'overlap': 3, 'changed': 1, 'fields': {'chong': 1}}
+    assert CalendarMerger.conflict_report(existing.iloc[:0], new) == {'overlap': 0, 'changed': 0, 'fields': {}}
+    assert CalendarMerger.conflict_report(existing.iloc[4:], new)['overlap'] == 0
+
+
+if __name__ == '__main__':
+    test_lunar_dates_to_numeric()
+    test_calendar_frame()
+    test_conflict_report()
+    print("✓ 测试通过")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+公司版批量处理测试 - 验证输入逐条读取、负责人八字缓存，以及结果按输入顺序逐条写出
+"""
+
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules import company_batch
+from modules.company_batch import CompanyBatchProcessor, iter_company_rows
+from modules.company_calculator import CompanyCalculator
+
+CSV_INPUT = """公司全称,字号(主名),行业类型,负责人姓名,负责人性别,出生时间,经度,纬度
+北京泽腾科技有限公司,泽腾,科技,张三,男,1990-01-01 08:00,116.4,39.9
+,华兴,贸易,张三,男,1990-01-01 08:00,116.4,39.9
+,,,,,,,
+深圳金鼎餐饮有限公司,金鼎,餐饮,李四,女,1985-05-05 12:00,114.0,22.5
+"""
+
+
+class CountingBazi:
+    def __init__(self):
+        self.calls = 0
+
+    def _get_ganzhi_from_wannianli(self, dt):
+        return None
+
+    def calculate_bazi(self, dt, wannianli_data=None, longitude=None, latitude=None):
+        self.calls += 1
+        return {'xiyong_shen': ['木'], 'ji_shen': ['金'], 'score': 80}
+
+
+class StubSession:
+    def __init__(self, bazi_info, industry):
+        self.bazi_info = bazi_info
+        self.industry = industry
+
+    def analyze(self, prefix, main_name, suffix, form_org, full_name):
+        if main_name == '失败':
+            raise ValueError('测试失败')
+        return {'parsed': {'full_name': full_name, 'main_name': main_name},
+                'scores': {'total_score': len(full_name), 'grade': '及格'},
+                'bazi': self.bazi_info}
+
+
+class StubCalculator:
+    sessions = 0
+
+    def __init__(self, db_path='local.db'):
+        self.owners = []
+
+    def build_bazi_info(self, birth_time, longitude, latitude):
+        self.owners.append(birth_time)
+        return {'xiyong_shen': ['木'], 'ji_shen': ['金'], 'birth_time': birth_time}
+
+    def session(self, bazi_info, industry, fallback_industry=''):
+        StubCalculator.sessions += 1
+        return StubSession(bazi_info, industry)
+
+
+class FakeStorage:
+    def __init__(self):
+        self.saved = []
+
+    def save_test_results(self, results):
+        return []
+
+    def save_company_results(self, results):
+        self.saved.extend(results)
+        return list(range(1, len(results) + 1))
+
+
+def test_company_rows():
+    """测试 CSV 全称回退拼接、空行跳过，TXT 每行一个全称并可附加行业类型"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = Path(tmp) / 'companies.csv'
+        csv_file.write_text(CSV_INPUT, encoding='utf-8')
+        rows = list(iter_company_rows(str(csv_file)))
+        assert [line_no for line_no, _ in rows] == [2, 3, 5]
+        assert rows[1][1]['full_name'] == '华兴'
+        assert rows[0][1]['industry_type'] == '科技'
+        assert rows[2][1]['owner']['longitude'] == '114.0'
+
+        txt_file = Path(tmp) / 'companies.txt'
+        txt_file.write_text("# 注释\n泽腾科技有限公司 科技\n\n华兴贸易有限公司\n", encoding='utf-8')
+        rows = list(iter_company_rows(str(txt_file)))
+        assert [(line_no, row['full_name'], row['industry_type']) for line_no, row in rows] == [
+            (2, '泽腾科技有限公司', '科技'), (4, '华兴贸易有限公司', '')]
+
+
+def test_bazi_cache():
+    """测试相同负责人只计算一次八字，返回副本不影响缓存"""
+    calc = CompanyCalculator(db_path='local.db')
+    calc._bazi_calc = CountingBazi()
+    a = calc.build_bazi_info('1990-01-01 08:00', 116.4, 39.9)
+    a['birth_time'] = '修改'
+    b = calc.build_bazi_info('1990-01-01 08:00', '116.4', 39.9)
+    calc.build_bazi_info('1990-01-01 08:00', 120.0, 39.9)
+    assert calc._bazi_calc.calls == 2
+    assert b['birth_time'] == '1990-01-01 08:00'
+
+
+def test_company_batch():
+    """测试结果按输入顺序写出、失败行计数、同一行业共用会话，历史记录批量落库"""
+    original = company_batch.CompanyCalculator
+    company_batch.CompanyCalculator = StubCalculator
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = Path(tmp) / 'companies.txt'
+            names = [f"公司{i:03d}" for i in range(120)]
+            names[7] = '失败'
+            lines = [name + (' 餐饮' if i % 2 else '') for i, name in enumerate(names)]
+            input_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+            storage = FakeStorage()
+            output_file = Path(tmp) / 'out.jsonl'
+            result = CompanyBatchProcessor(storage, output_format='jsonl').process_file(
+                str(input_file), str(output_file))
+
+            print(f"汇总: {result['success_count']} 成功 / {result['failed_count']} 失败")
+            assert result['total'] == 120
+            assert result['success_count'] == 119 and result['failed_count'] == 1
+            assert len(storage.saved) == 119
+            assert StubCalculator.sessions == 2  # 无行业 / 餐饮
+
+            lines = output_file.read_text(encoding='utf-8').splitlines()
+            written = [json.loads(line)['parsed']['full_name'] for line in lines]
+            assert written == [name for name in names if name != '失败']
+            assert len(result['top']) == company_batch.SUMMARY_TOP_N
+            assert result['top'][0][0] == '公司000'
+    finally:
+        company_batch.CompanyCalculator = original
+
+
+if __name__ == '__main__':
+    test_company_rows()
+    test_bazi_cache()
+    test_company_batch()
+    print("✓ 测试通过")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+公司名称解析测试 - 验证多模式自动机匹配、名称分段的最长匹配规则，以及行业词到行业代码的内存映射
+"""
+
+import sys
+import random
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.company_parser import CompanyParser, KeywordAutomaton
+
+
+def test_keyword_automaton():
+    """测试自动机一次扫描找出的重叠匹配与逐位置暴力匹配一致"""
+    rng = random.Random(0)
+    words = {''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))): i for i in range(30)}
+    automaton = KeywordAutomaton(words)
+    for _ in range(300):
+        text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 20)))
+        found = sorted((start, end, word) for start, end, word, _ in automaton.iter_matches(text))
+        expected = sorted((i, i + len(word), word) for word in words
+                          for i in range(len(text)) if text.startswith(word, i))
+        assert found == expected, text
+
+
+def test_parse_segments():
+    """测试区划/字号/行业/组织形式分段，组织形式与行业取最长匹配"""
+    parser = CompanyParser()
+    parsed = parser.parse('上海华兴贸易股份有限公司')
+    print(parsed)
+    assert (parsed['prefix'], parsed['main_name'], parsed['industry_suffix'], parsed['org_form']) == \
+        ('上海', '华兴', '贸易', '股份有限公司')
+    assert parsed['industry_code'] == 'trade'
+
+    parsed = parser.parse('成都资本管理有限合伙')
+    assert (parsed['main_name'], parsed['industry_code'], parsed['org_form']) == ('', 'finance', '有限合伙')
+
+    # 行业词不在结尾（组织形式之前）时不拆分
+    parsed = parser.parse('北京科技园泽腾有限公司')
+    assert (parsed['prefix'], parsed['main_name'], parsed['industry_suffix']) == ('北京', '科技园泽腾', '')
+
+    parsed = parser.parse('泽腾')
+    assert (parsed['prefix'], parsed['main_name'], parsed['org_form']) == ('', '泽腾', '')
+
+
+def test_industry_code():
+    """测试行业名/代码/包含行业词的文本映射到行业代码，数据库行业名优先于内置行业词"""
+    parser = CompanyParser({'科技': 'tech', '文化娱乐': 'culture', '医疗健康': 'medical', '房地产': 'realestate'})
+    assert parser.industry_code('科技') == 'tech'
+    assert parser.industry_code('realestate') == 'realestate'
+    assert parser.industry_code('文化传媒') == 'culture'      # 包含内置行业词“文化”
+    assert parser.industry_code('健康') == 'medical'          # 为行业名“医疗健康”的一部分
+    assert parser.industry_code('地产开发') is None
+    assert parser.industry_code('贸易') is None               # 内置行业词的代码不在数据库中
+    assert parser.industry_code('') is None
+
+
+if __name__ == '__main__':
+    test_keyword_automaton()
+    test_parse_segments()
+    test_industry_code()
+    print("✓ 测试通过")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+公司名称分析会话测试 - 验证会话结果与逐条分析一致，负责人与行业数据只解析一次，以及多名称对比排名
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.company_calculator import CompanyCalculator
+from modules.loader import DataLoader
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+OWNER_BAZI = {
+    'xiyong_shen': ['木', '水'], 'ji_shen': ['土'], 'bazi_match_score': 75,
+    'birth_time': '1990-01-01 08:00'
+}
+
+
+def _counting(obj, name: str, calls: list):
+    original = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(name)
+        return original(*args, **kwargs)
+    setattr(obj, name, wrapper)
+
+
+def _company_calculator(tmp: str) -> CompanyCalculator:
+    """在临时数据库中加载行业资源并创建计算器"""
+    db_path = str(Path(tmp) / 'company.db')
+    loader = DataLoader(db_path, str(DATA_DIR))
+    for resource in ('industry_wuxing', 'industry_lucky_chars'):
+        assert loader.load_resource(resource, str(DATA_DIR / f'{resource}.json'))['success']
+    return CompanyCalculator(db_path=db_path)
+
+
+def test_company_session():
+    """测试会话与 analyze_single 结果一致，且行业代码、行业五行、吉祥字、生肖只查询一次"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calc = _company_calculator(tmp)
+        names = ['泽腾', '华兴', '金鼎', '云帆']
+        expected = [calc.analyze_single('', name, '', '', name, '科技', OWNER_BAZI) for name in names]
+
+        calls = []
+        _counting(calc, '_resolve_industry_code', calls)
+        _counting(calc.industry_analyzer, '_get_industry_wuxing', calls)
+        _counting(calc.industry_analyzer, '_get_lucky_chars', calls)
+        _counting(calc.sx_analyzer, 'get_shengxiao', calls)
+
+        session = calc.session(OWNER_BAZI, '科技')
+        assert session.industry_code == 'tech'
+        results = [session.analyze_name(name) for name in names]
+        print(f"查询: {calls}")
+        assert results == expected
+        assert sorted(calls) == ['_get_industry_wuxing', '_get_lucky_chars', '_resolve_industry_code', 'get_shengxiao']
+
+        # 行业类型无法解析时回退到行业/经营特点
+        fallback = calc.analyze_single('北京', '泽腾', '科技', '有限公司', '北京泽腾科技有限公司', '', OWNER_BAZI)
+        assert fallback['industry_detail']['industry_wuxing'] == session.industry_wuxing
+
+        # 没有行业/经营特点（如 TXT 输入）时报告行业类型本身的错误，而不是空回退值的错误
+        for industry, fallback_industry, message in [('不存在行业', '', '无法解析行业名称或代码: 不存在行业'),
+                                                     ('不存在行业', '也不存在', '无法解析行业名称或代码: 不存在行业'),
+                                                     ('', ' ', '行业名称或代码不能为空')]:
+            try:
+                calc.session(OWNER_BAZI, industry, fallback_industry)
+            except Exception as e:
+                assert str(e) == message, e
+            else:
+                raise AssertionError(industry)
+
+        compared = calc.compare('泽腾', '华兴', '科技', OWNER_BAZI)
+        assert compared['a'] == expected[0] and compared['b'] == expected[1]
+        same = calc.compare('泽腾', '泽腾', '科技', OWNER_BAZI)
+        assert same['a'] == same['b'] == expected[0] and same['better'] == 'tie'
+        assert calc.batch_analyze(names, '科技', OWNER_BAZI) == expected
+
+
+def test_compare_names():
+    """测试多名称对比：排名顺序、与第一名的分差、重复名称只分析一次"""
+    with tempfile.TemporaryDirectory() as tmp:
+        calc = _company_calculator(tmp)
+        names = ['泽腾', '华兴', '金鼎', '云帆', '华兴']
+        comparison = calc.compare_names(names, '科技', OWNER_BAZI)
+        ranking = comparison['ranking']
+        for item in ranking:
+            print(item['rank'], item['name'], item['scores']['total_score'], item['deltas'])
+
+        assert comparison['industry_code'] == 'tech'
+        assert sorted(item['name'] for item in ranking) == ['云帆', '华兴', '泽腾', '金鼎']
+        assert [item['rank'] for item in ranking] == [1, 2, 3, 4]
+        totals = [(item['scores']['total_score'], item['scores']['industry_score']) for item in ranking]
+        assert totals == sorted(totals, reverse=True)
+        best = ranking[0]['scores']
+        assert all(v == 0 for v in ranking[0]['deltas'].values())
+        for item in ranking:
+            assert item['deltas']['ziyi_score'] == item['scores']['ziyi_score'] - best['ziyi_score']
+            assert item['result']['parsed']['full_name'] == item['name']
+
+        pair = calc.compare('华兴', '泽腾', '科技', OWNER_BAZI)
+        assert pair['a']['parsed']['full_name'] == '华兴'
+        expected = 'A' if [i['name'] for i in ranking].index('华兴') < [i['name'] for i in ranking].index('泽腾') else 'B'
+        assert pair['better'] == expected
+
+
+if __name__ == '__main__':
+    test_company_session()
+    test_compare_names()
+    print("✓ 测试通过")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+预构建数据库测试 - 验证构建结果可重现、清单校验以及加载器识别预构建数据库
+"""
+
+import sys
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.db_builder import DatabaseBuilder
+from modules.loader import DataLoader, SCHEMA_VERSION
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+
+def _prepare_data(data_dir: Path):
+    """复制仓库内的资源文件，并补充最小化的字库与万年历"""
+    shutil.copytree(DATA_DIR, data_dir)
+    resources = {
+        'kangxi.json': [{'character': '木', 'strokes': 4, 'pinyin': 'mù'},
+                        {'character': '林', 'strokes': 8, 'pinyin': 'lín'}],
+        'ziyi.json': [{'character': '木', 'pinyin': 'mù', 'meaning': '树木'}],
+        'wannianli.json': [{'gregorian_date': '2025-01-01', 'year_ganzhi': '甲辰',
+                            'month_ganzhi': '丙子', 'day_ganzhi': '甲子'}],
+    }
+    for filename, data in resources.items():
+        with open(data_dir / filename, 'w', encoding='utf-8') as f:
+            json.dump({'version': '1.0', 'data': data}, f, ensure_ascii=False)
+
+
+def test_db_builder():
+    """测试两次构建字节一致、校验可发现篡改，且加载器跳过初始化"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / 'data'
+        _prepare_data(data_dir)
+        builder = DatabaseBuilder(str(data_dir))
+
+        first = builder.build(str(Path(tmp) / 'a' / 'local.db'))
+        second = builder.build(str(Path(tmp) / 'b' / 'local.db'))
+        print(f"构建结果: {first['manifest']['size']:,} 字节, SHA-256 {first['manifest']['sha256'][:16]}...")
+        assert first['success'] and second['success']
+        assert first['manifest'] == second['manifest']
+
+        db_path = first['path']
+        assert builder.verify(db_path)['valid']
+
+        loader = DataLoader(db_path, str(data_dir))
+        assert loader.manifest['schema_version'] == str(SCHEMA_VERSION)
+        assert loader.check_resource_integrity()['complete']
+
+        with open(db_path, 'r+b') as f:
+            f.seek(-1, 2)
+            last = f.read(1)
+            f.seek(-1, 2)
+            f.write(bytes([last[0] ^ 0xFF]))
+        report = builder.verify(db_path)
+        print(f"篡改后校验: {report['errors']}")
+        assert not report['valid']
+
+
+if __name__ == '__main__':
+    test_db_builder()
+    print("✓ 测试通过")
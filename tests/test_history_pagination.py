@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+历史记录游标分页测试 - 验证 query_history 的游标与过滤条件
+"""
+
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.storage import Storage
+
+
+def _seed(db_path: str, count: int):
+    """直接写入主表记录（同一秒内的记录依靠 id 区分先后）"""
+    conn = sqlite3.connect(db_path)
+    for i in range(count):
+        conn.execute('''
+        INSERT INTO test_records (name, gender, birth_time, longitude, latitude, comprehensive_score, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (('张' if i % 2 else '李') + str(i), '男', '1990-01-01 10:00', 116.4, 39.9,
+              60 + i % 40, f'2025-01-{1 + i // 10:02d} 12:00:00'))
+    conn.commit()
+    conn.close()
+
+
+def test_history_pagination():
+    """测试游标分页不重不漏，且过滤条件生效"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'history.db')
+        storage = Storage(db_path)
+        _seed(db_path, 95)
+
+        seen = []
+        cursor = None
+        while True:
+            page = storage.query_history(limit=20, cursor=cursor)
+            if not page:
+                break
+            seen.extend(r['id'] for r in page)
+            cursor = Storage.decode_cursor(Storage.encode_cursor(page[-1]))
+        print(f"分页遍历: {len(seen)} 条")
+        assert len(seen) == 95 and len(set(seen)) == 95
+
+        exported = list(storage.iter_history(page_size=7, name_prefix='张', min_score=70))
+        print(f"过滤导出: {len(exported)} 条")
+        assert exported and all(r['name'].startswith('张') and r['score'] >= 70 for r in exported)
+
+        ranged = storage.query_history(limit=100, start_time='2025-01-02', end_time='2025-01-02')
+        assert len(ranged) == 10
+
+        conn = sqlite3.connect(db_path)
+        plan = conn.execute('''
+        EXPLAIN QUERY PLAN SELECT id FROM test_records
+        WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 20
+        ''', ('2025-01-05 12:00:00', 50)).fetchall()
+        conn.close()
+        print(f"查询计划: {plan}")
+        assert any('idx_test_records_created' in str(row) for row in plan)
+
+
+if __name__ == '__main__':
+    test_history_pagination()
+    print("✓ 测试通过")
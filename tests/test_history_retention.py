@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+历史记录保留策略测试 - 验证分块删除、统计同步与增量空间回收
+"""
+
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.storage import Storage
+from modules.retention import HistoryRetention
+
+
+def _result(name: str, birth_time: str, score: int) -> dict:
+    """构造最小化的计算结果"""
+    wuge = {k: {'num': 1, 'element': '木', 'fortune': '吉'}
+            for k in ['tiange', 'renge', 'dige', 'waige', 'zongge']}
+    wuge.update({'sancai': '木火土', 'score': 80})
+    return {
+        'name': name, 'gender': '男', 'birth_time': birth_time,
+        'longitude': 116.4, 'latitude': 39.9, 'comprehensive_score': score,
+        'wuge': wuge,
+        'shengxiao': {'shengxiao': '马', 'score': 70},
+        'chenggu': {'weight': 4.2}
+    }
+
+
+def test_history_retention():
+    """测试保留策略删除主记录及明细，且统计与剩余记录一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'retention.db')
+        storage = Storage(db_path)
+
+        # 张三 5 条、李四 3 条，其中 2 条创建于一年前
+        for i in range(5):
+            storage.save_test_result(_result('张三', f'1990-01-0{i + 1} 10:00', 80 + i))
+        for i in range(3):
+            storage.save_test_result(_result('李四', f'1991-01-0{i + 1} 10:00', 70 + i))
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE test_records SET created_at = datetime('now', '-400 days') WHERE id IN (1, 6)")
+        conn.commit()
+        conn.close()
+
+        retention = HistoryRetention(storage, chunk_size=2)
+        assert retention.enable_incremental_vacuum() is False  # 新建库已是增量模式
+
+        result = retention.apply(max_age_days=365, keep_latest_per_name=2)
+        print(f"清理结果: {result}")
+        assert result['person_deleted'] == 4
+        assert storage.get_records_count() == 4
+
+        conn = sqlite3.connect(db_path)
+        orphans = conn.execute(
+            'SELECT COUNT(*) FROM wuge_results WHERE record_id NOT IN (SELECT id FROM test_records)'
+        ).fetchone()[0]
+        conn.close()
+        assert orphans == 0
+
+        incremental = storage.analytics.summary()
+        assert storage.analytics.rebuild()
+        assert storage.analytics.summary() == incremental
+
+        retention.apply(max_rows=1)
+        assert storage.get_records_count() == 1
+        print(f"回收页数: {retention.incremental_vacuum()}")
+
+
+if __name__ == '__main__':
+    test_history_retention()
+    print("✓ 测试通过")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+JSON 流式解析测试 - 验证逐条读取结果与 json.load 一致，缺少数组字段时报错
+"""
+
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.json_stream import iter_json_array
+
+
+def test_json_stream():
+    """测试小缓冲区下跨块的记录、字符串中的括号和数字均能正确解析"""
+    document = {
+        'version': '1.0',
+        'meta': {'note': '含有 ] 和 } 的字符串', 'list': [1, [2, 3]]},
+        'data': [{'gregorian_date': f'2025-01-{i % 28 + 1:02d}', 'text': '宜：祭祀]' * (i % 5), 'n': i * 1000}
+                 for i in range(200)]
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'data.json'
+        for indent in (None, 2):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, ensure_ascii=False, indent=indent)
+
+            for chunk_size in (1, 13, 64 * 1024):
+                header = {}
+                items = list(iter_json_array(str(path), header=header, chunk_size=chunk_size))
+                assert items == document['data']
+                assert header == {'version': '1.0', 'meta': document['meta']}
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([10, 200, 3000], f)
+        assert list(iter_json_array(str(path), key=None, chunk_size=2)) == [10, 200, 3000]
+
+        # 缺少 data 字段不能当作空数组
+        for missing in ({'version': '1.0'}, {}):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(missing, f)
+            try:
+                list(iter_json_array(str(path)))
+            except ValueError as e:
+                assert "'data'" in str(e)
+            else:
+                raise AssertionError(f"缺少 data 字段未报错: {missing}")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': '1.0', 'data': []}, f)
+        assert list(iter_json_array(str(path))) == []
+
+    print(f"解析记录数: {len(document['data'])}")
+
+
+if __name__ == '__main__':
+    test_json_stream()
+    print("✓ 测试通过")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+康熙字典导入数据库测试 - 验证新增/修改/未变条数、重复字符以最后一条为准，以及更新时保留 id 与 created_at
+"""
+
+import sys
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from convert_tools import KangxiMdbMerger
+from modules.loader import DataLoader
+
+OLD_CREATED_AT = '2000-01-01 00:00:00'
+
+
+def _char(character: str, strokes: int, **fields) -> dict:
+    record = {'character': character, 'traditional': character, 'strokes': strokes, 'pinyin': 'mu',
+              'radical': '', 'bs_strokes': 0, 'ch_strokes': 0, 'luck': '', 'wuxing': ''}
+    record.update(fields)
+    return record
+
+
+def _rows(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0]: row[1:] for row in conn.execute(
+            'SELECT character, id, created_at, strokes, wuxing FROM kangxi_strokes')}
+    finally:
+        conn.close()
+
+
+def test_export_to_database():
+    """测试一个新字、一个内容变化的字、一个相同的字，以及输入中重复出现的字"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'kangxi.db')
+        loader = DataLoader(db_path, tmp)
+        assert loader.import_records('kangxi', [_char('木', 4, wuxing='木'), _char('林', 8, wuxing='木')])['success']
+        conn = sqlite3.connect(db_path)
+        conn.execute('UPDATE kangxi_strokes SET created_at = ?', (OLD_CREATED_AT,))
+        conn.commit()
+        conn.close()
+        before = _rows(db_path)
+
+        json_path = Path(tmp) / 'kangxi.json'
+        records = [
+            _char('木', 4, wuxing='木'),          # 相同
+            _char('林', 8, wuxing='火'),          # 内容变化
+            _char('森', 10, wuxing='水'),         # 新字，随后重复出现
+            _char('森', 12, wuxing='木'),         # 以最后一条为准
+        ]
+        json_path.write_text(json.dumps({'data': records}, ensure_ascii=False), encoding='utf-8')
+
+        stats = KangxiMdbMerger().export_to_database(str(json_path), db_path)
+        print(f"导入统计: {stats}")
+        assert stats == {'total': 3, 'inserted': 1, 'updated': 1, 'unchanged': 1}
+
+        after = _rows(db_path)
+        assert after['木'] == before['木']
+        assert after['林'][:2] == before['林'][:2] == (before['林'][0], OLD_CREATED_AT)
+        assert after['林'][2:] == (8, '火')
+        assert after['森'][2:] == (12, '木')
+
+        # 再次导入时全部未变
+        assert KangxiMdbMerger().export_to_database(str(json_path), db_path)['unchanged'] == 3
+
+        # 写入中途失败（笔画数为空违反 NOT NULL）时返回 False，事务回滚且连接已关闭，数据库不被锁住
+        records = [_char('水', 4, wuxing='水'), _char('火', None)]
+        json_path.write_text(json.dumps({'data': records}, ensure_ascii=False), encoding='utf-8')
+        assert KangxiMdbMerger().export_to_database(str(json_path), db_path) is False
+        assert '水' not in _rows(db_path)
+        conn = sqlite3.connect(db_path, timeout=0)
+        conn.execute('DELETE FROM kangxi_strokes WHERE character = ?', ('森',))
+        conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    test_export_to_database()
+    print("✓ 测试通过")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+资源并行加载测试 - 验证多进程加载、批量加载结果与顺序加载一致，子进程退出、写入中途失败时不会卡住，
+以及批量加载成功或失败后二级索引都已重建
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules import loader as loader_module
+from modules.loader import DataLoader, RESOURCE_TABLES, SECONDARY_INDEXES
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+
+def _table_rows(db_path: str) -> dict:
+    """各资源表的数据列（不含 created_at 等写入时间）"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: sorted(conn.execute(f'SELECT {", ".join(columns)} FROM {table}').fetchall())
+                for spec in RESOURCE_TABLES.values() for table, (columns, _) in spec.items()}
+    finally:
+        conn.close()
+
+
+def _index_names(db_path: str) -> set:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    finally:
+        conn.close()
+
+
+def _dying_worker(resource_name, file_path, queue_index):
+    """模拟解析进程被杀死"""
+    os._exit(1)
+
+
+def test_parallel_matches_sequential():
+    """测试 2 个进程加载仓库数据文件的结果与顺序加载完全一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        sequential_db = str(Path(tmp) / 'sequential.db')
+        parallel_db = str(Path(tmp) / 'parallel.db')
+        sequential = DataLoader(sequential_db, str(DATA_DIR)).load_all_resources(force_reload=True)
+        parallel = DataLoader(parallel_db, str(DATA_DIR)).load_all_resources(force_reload=True, workers=2)
+        print(f"已加载: {parallel['loaded']}")
+
+        assert parallel['loaded'] == sequential['loaded'] and len(parallel['loaded']) > 1
+        assert parallel['failed'] == sequential['failed']
+        for name, stats in sequential['statistics'].items():
+            assert parallel['statistics'][name]['success'] == stats['success']
+            assert parallel['statistics'][name]['changes'] == stats['changes']
+        assert _table_rows(parallel_db) == _table_rows(sequential_db)
+
+
+def test_bulk_load():
+    """测试批量加载结果与普通加载一致，加载成功或中途抛出异常后二级索引都已重建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        normal_db = str(Path(tmp) / 'normal.db')
+        bulk_db = str(Path(tmp) / 'bulk.db')
+        normal = DataLoader(normal_db, str(DATA_DIR)).load_all_resources(force_reload=True)
+        loader = DataLoader(bulk_db, str(DATA_DIR))
+        bulk = loader.load_all_resources(force_reload=True, bulk=True)
+
+        assert bulk['loaded'] == normal['loaded'] and bulk['failed'] == normal['failed']
+        assert _table_rows(bulk_db) == _table_rows(normal_db)
+        assert set(SECONDARY_INDEXES) <= _index_names(bulk_db)
+        assert not loader.bulk_mode
+
+        failing_db = str(Path(tmp) / 'failing.db')
+        loader = DataLoader(failing_db, str(DATA_DIR))
+        load_resource = loader.load_resource
+
+        def failing_load(resource_name, file_path, force_reload=False):
+            if resource_name == 'sancai':
+                raise RuntimeError('模拟加载失败')
+            return load_resource(resource_name, file_path, force_reload)
+        loader.load_resource = failing_load
+        try:
+            loader.load_all_resources(force_reload=True, bulk=True)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError('加载异常未抛出')
+        assert set(SECONDARY_INDEXES) <= _index_names(failing_db)
+        assert not loader.bulk_mode
+
+
+def test_parallel_failures():
+    """测试解析进程异常退出时各资源报告失败，写入中途失败时读完剩余的行，均不会一直等待"""
+    with tempfile.TemporaryDirectory() as tmp:
+        original = loader_module._prepare_resource_rows
+        loader_module._prepare_resource_rows = _dying_worker
+        try:
+            result = DataLoader(str(Path(tmp) / 'dead.db'), str(DATA_DIR)).load_all_resources(workers=2)
+        finally:
+            loader_module._prepare_resource_rows = original
+        print(f"进程退出: {result['errors'][-1]}")
+        assert not result['success'] and not result['loaded']
+
+        # 每行一块、队列只容一块：写入方只读一行就失败时，子进程必然阻塞在已满的队列上
+        saved = loader_module.IMPORT_BATCH_SIZE, loader_module.PARALLEL_QUEUE_CHUNKS
+        loader_module.IMPORT_BATCH_SIZE, loader_module.PARALLEL_QUEUE_CHUNKS = 1, 1
+        try:
+            loader = DataLoader(str(Path(tmp) / 'partial.db'), str(DATA_DIR))
+
+            def failing_apply(conn, resource_name, rows, validation=None):
+                next(iter(rows))
+                return {'success': False, 'count': 0, 'changes': {}, 'error': f"{resource_name}: 写入失败"}
+            loader._apply_rows = failing_apply
+            result = loader.load_all_resources(workers=2)
+        finally:
+            loader_module.IMPORT_BATCH_SIZE, loader_module.PARALLEL_QUEUE_CHUNKS = saved
+        assert not result['loaded'] and '写入失败' in result['errors'][-1]
+
+
+if __name__ == '__main__':
+    test_parallel_matches_sequential()
+    test_bulk_load()
+    test_parallel_failures()
+    print("✓ 测试通过")
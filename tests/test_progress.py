@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量进度行测试 - 验证吞吐、剩余时间与耗时分位数的计算，以及非终端输出时按间隔逐行输出
+"""
+
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.progress import ProgressReporter, percentile
+
+
+def test_progress_line():
+    """测试进度行内容与刷新频率"""
+    assert percentile([], 0.5) == 0.0
+    assert percentile(list(range(1, 101)), 0.5) == 51
+    assert percentile(list(range(1, 101)), 0.95) == 95
+
+    stream = io.StringIO()
+    progress = ProgressReporter(total_lines=1001, start_line=1, stream=stream)
+    stats = {'total': 0, 'success': 0, 'failed': 0}
+    for i in range(250):
+        stats['total'] += 1
+        stats['success' if i % 50 else 'failed'] += 1
+        progress.update(i + 2, 0.010 if i % 20 else 0.100, stats)
+
+    # 非终端输出时 10 秒内不刷新
+    assert stream.getvalue() == ''
+
+    line = progress.line(stats, progress._started + 5.0)
+    print(line)
+    assert '已处理 250 条 | 50.0 条/秒 | 剩余 0:00:15' in line
+    assert '成功 245 失败 5' in line
+    assert 'p50 10ms p95 100ms' in line
+
+    progress.finish(stats)
+    assert stream.getvalue().count('\n') == 1
+
+
+if __name__ == '__main__':
+    test_progress_line()
+    print("✓ 测试通过")
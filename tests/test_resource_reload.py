@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+资源增量加载测试 - 验证未修改文件跳过解析、修改后只写入变化的行、空数据不清空已有的表，以及验证报告
+"""
+
+import sys
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.loader import DataLoader
+
+
+def _write_nayin(path: Path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'data': [{'ganzhi': g, 'nayin': n, 'wuxing': w} for g, n, w in rows]},
+                  f, ensure_ascii=False)
+
+
+def test_resource_reload():
+    """测试文件状态快速判断与按行增量导入"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'resource.db')
+        file_path = Path(tmp) / 'nayin.json'
+        loader = DataLoader(db_path, tmp)
+
+        rows = [('甲子', '海中金', '金'), ('乙丑', '海中金', '金'), ('丙寅', '炉中火', '火')]
+        _write_nayin(file_path, rows)
+        first = loader.load_resource('nayin', str(file_path))
+        print(f"首次加载: {first}")
+        assert first['changes']['inserted'] == 3
+
+        # 文件未修改：不解析、不导入
+        assert loader.load_resource('nayin', str(file_path))['total'] == 0
+
+        # 修改一行、删除一行、新增一行
+        _write_nayin(file_path, [('甲子', '海中金', '金'), ('乙丑', '海中金X', '金'), ('丁卯', '炉中火', '火')])
+        second = loader.load_resource('nayin', str(file_path))
+        print(f"增量加载: {second['changes']}")
+        assert second['changes'] == {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1}
+
+        conn = sqlite3.connect(db_path)
+        table = dict(conn.execute('SELECT ganzhi, nayin FROM wuxing_nayin').fetchall())
+        conn.close()
+        assert table == {'甲子': '海中金', '乙丑': '海中金X', '丁卯': '炉中火'}
+
+
+def _nayin_rows(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    count = conn.execute('SELECT COUNT(*) FROM wuxing_nayin').fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_empty_resource():
+    """测试文件缺少 data 数组或数组为空时加载失败且保留已有的行，显式允许时才清空"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'resource.db')
+        file_path = Path(tmp) / 'nayin.json'
+        loader = DataLoader(db_path, tmp)
+        _write_nayin(file_path, [('甲子', '海中金', '金'), ('乙丑', '海中金', '金')])
+        assert loader.load_resource('nayin', str(file_path))['success']
+
+        file_path.write_text('{"version": "1.0"}', encoding='utf-8')
+        missing = loader.load_resource('nayin', str(file_path))
+        print(f"缺少 data: {missing}")
+        assert not missing['success'] and 'data' in missing['errors'][0]
+        assert _nayin_rows(db_path) == 2
+
+        _write_nayin(file_path, [])
+        empty = loader.load_resource('nayin', str(file_path), force_reload=True)
+        print(f"空数组: {empty}")
+        assert not empty['success'] and empty['changes']['deleted'] == 0
+        assert _nayin_rows(db_path) == 2
+
+        forced = DataLoader(db_path, tmp, allow_empty=True).load_resource('nayin', str(file_path), force_reload=True)
+        assert forced['success'] and forced['changes']['deleted'] == 2
+        assert _nayin_rows(db_path) == 0
+
+
+def test_resource_validation():
+    """测试列式验证报告出错行号与字段，且验证失败时不导入"""
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = DataLoader(str(Path(tmp) / 'resource.db'), tmp)
+        rows = [('甲子', '海中金', '金'), ('甲丑', '海中金', '金'), ('丙寅', '', '风')]
+        report = loader.validate_resource_data(
+            'nayin', [{'ganzhi': g, 'nayin': n, 'wuxing': w} for g, n, w in rows] + ['bad']
+        )
+        print(f"验证报告: {report['error_counts']}")
+        assert (report['total'], report['passed'], report['failed']) == (4, 1, 3)
+        assert [(e['index'], e['field']) for e in report['errors']] == \
+            [(3, '*'), (1, 'ganzhi'), (2, 'nayin'), (2, 'wuxing')]
+
+        file_path = Path(tmp) / 'nayin.json'
+        _write_nayin(file_path, rows)
+        assert not loader.load_resource('nayin', str(file_path))['success']
+        assert loader.check_resource_integrity()['complete'] is False
+
+
+if __name__ == '__main__':
+    test_resource_reload()
+    test_empty_resource()
+    test_resource_validation()
+    print("✓ 测试通过")
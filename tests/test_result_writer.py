@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+结果写入器测试 - 验证 json / jsonl / csv / sqlite 各格式的输出与汇总、上下文管理器，以及检查点续写
+"""
+
+import sys
+import csv
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.result_writer import OUTPUT_FORMATS, FileResultWriter, ResultWriter, open_result_writer
+
+COLUMNS = ['name', 'score']
+ITEMS = [{'name': f'张{i}', 'score': i * 10, 'detail': {'n': i}} for i in range(7)]
+SUMMARY = {'total': len(ITEMS), 'failed': 0}
+
+
+def _row(item):
+    return {'name': item['name'], 'score': item['score']}
+
+
+def _open(output_format, path, resume=None):
+    return open_result_writer(output_format, str(path), columns=COLUMNS, row_builder=_row,
+                              flush_every=2, resume=resume)
+
+
+def _read(output_format, path):
+    """读出 (结果, 汇总)"""
+    path = Path(path)
+    if output_format == 'sqlite':
+        conn = sqlite3.connect(str(path))
+        try:
+            rows = conn.execute('SELECT seq, name, score, result_json FROM results ORDER BY seq').fetchall()
+            assert [seq for seq, _, _, _ in rows] == list(range(1, len(rows) + 1))
+            assert all(json.loads(data)['name'] == name for _, name, _, data in rows)
+            items = [json.loads(data) for _, _, _, data in rows]
+            summary = {k: json.loads(v) for k, v in conn.execute('SELECT key, value FROM summary')}
+        finally:
+            conn.close()
+        return items, summary
+
+    summary_path = path.with_name(f"{path.stem}_summary.json")
+    summary = json.loads(summary_path.read_text(encoding='utf-8')) if summary_path.exists() else {}
+    if output_format == 'json':
+        return json.loads(path.read_text(encoding='utf-8')), summary
+    if output_format == 'jsonl':
+        return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()], summary
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return [{'name': r['name'], 'score': int(r['score'])} for r in csv.DictReader(f)], summary
+
+
+def _expected(output_format, items):
+    return [_row(item) for item in items] if output_format == 'csv' else items
+
+
+def test_abstract_writer():
+    """测试基类不能直接实例化，子类必须实现 _write / _finish / _offset"""
+    for writer_class in (ResultWriter, FileResultWriter):
+        try:
+            writer_class('out.json')
+        except TypeError:
+            pass
+        else:
+            raise AssertionError(f'{writer_class.__name__} 可以直接实例化')
+
+    class NoOffsetWriter(ResultWriter):
+        def _write(self, item):
+            pass
+
+        def _finish(self, summary):
+            pass
+    try:
+        NoOffsetWriter('out.json')
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('未实现 _offset 的写入器可以实例化')
+
+
+def test_write_and_close():
+    """测试各格式写入后 close(summary) 的输出，以及上下文管理器退出时关闭"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for output_format, suffix in OUTPUT_FORMATS.items():
+            path = Path(tmp) / f'out{suffix}'
+            writer = _open(output_format, path)
+            for item in ITEMS:
+                writer.write(item)
+            writer.close(SUMMARY)
+            writer.close({'ignored': True})  # 重复关闭无效
+            assert writer.count == len(ITEMS)
+            assert _read(output_format, path) == (_expected(output_format, ITEMS), SUMMARY), output_format
+
+            path = Path(tmp) / f'ctx{suffix}'
+            with _open(output_format, path) as writer:
+                writer.write(ITEMS[0])
+            assert _read(output_format, path) == (_expected(output_format, ITEMS[:1]), {}), output_format
+
+            path = Path(tmp) / f'empty{suffix}'
+            with _open(output_format, path):
+                pass
+            assert _read(output_format, path) == ([], {}), output_format
+
+        # 带 header 的 JSON：结果在 items 字段中，汇总写在末尾
+        path = Path(tmp) / 'header.json'
+        with open_result_writer('json', str(path), header={'version': '1.0'}) as writer:
+            writer.write(ITEMS[0])
+            writer.write(ITEMS[1])
+            writer.close(SUMMARY)
+        assert json.loads(path.read_text(encoding='utf-8')) == {'version': '1.0', 'results': ITEMS[:2], **SUMMARY}
+        assert not path.with_name('header_summary.json').exists()
+
+
+def test_checkpoint_resume():
+    """测试从检查点续写：丢弃检查点之后已落盘的内容，结果与一次写完相同"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for output_format, suffix in OUTPUT_FORMATS.items():
+            path = Path(tmp) / f'resume{suffix}'
+            writer = _open(output_format, path)
+            for item in ITEMS[:3]:
+                writer.write(item)
+            checkpoint = writer.checkpoint()
+            assert checkpoint['count'] == 3
+            if output_format == 'sqlite':
+                assert checkpoint['offset'] == 3
+            else:
+                assert checkpoint['offset'] == path.stat().st_size
+            print(f"{output_format} 检查点: {checkpoint}")
+
+            # 检查点之后又写入并落盘了两条，随后进程中断（不调用 close）
+            writer.write({'name': '作废', 'score': -1})
+            writer.write({'name': '作废', 'score': -2})
+            writer.flush()
+            if output_format == 'sqlite':
+                writer._conn.close()
+            else:
+                writer._file.close()
+
+            writer = _open(output_format, path, resume=checkpoint)
+            assert writer.count == 3
+            for item in ITEMS[3:]:
+                writer.write(item)
+            writer.close(SUMMARY)
+            assert _read(output_format, path) == (_expected(output_format, ITEMS), SUMMARY), output_format
+
+
+if __name__ == '__main__':
+    test_abstract_writer()
+    test_write_and_close()
+    test_checkpoint_resume()
+    print("✓ 测试通过")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+评分分布统计测试 - 验证聚合表随写入/覆盖/删除增量更新
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.storage import Storage
+from modules.analytics import ScoreAnalytics
+
+
+def _result(name: str, score: int, shengxiao: str, sancai: str) -> dict:
+    """构造最小化的计算结果"""
+    wuge = {k: {'num': 1, 'element': '木', 'fortune': '吉'}
+            for k in ['tiange', 'renge', 'dige', 'waige', 'zongge']}
+    wuge.update({'sancai': sancai, 'score': 80})
+    return {
+        'name': name, 'gender': '男', 'birth_time': '1990-01-01 10:00',
+        'longitude': 116.4, 'latitude': 39.9, 'comprehensive_score': score,
+        'wuge': wuge,
+        'shengxiao': {'shengxiao': shengxiao, 'score': 70},
+        'chenggu': {'weight': 4.2}
+    }
+
+
+def test_score_analytics():
+    """测试增量统计与全量重建结果一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(str(Path(tmp) / 'analytics.db'))
+
+        storage.save_test_result(_result('张三', 85, '马', '木火土'))
+        storage.save_test_result(_result('李四', 72, '马', '木木木'))
+        # 同一测试再次保存时覆盖旧记录，旧统计需移出
+        storage.save_test_result(_result('张三', 65, '羊', '木火土'))
+
+        summary = storage.analytics.summary()
+        zodiac = {item['bucket']: item['count'] for item in summary['zodiac']}
+        print(f"生肖分布: {zodiac}")
+        assert zodiac == {'马': 1, '羊': 1}
+
+        storage.save_company_result({
+            'parsed': {'full_name': '泽腾科技有限公司', 'industry_type': '科技'},
+            'scores': {'total_score': 88, 'grade': '优秀'},
+            'owner': {'name': '王五', 'birth_time': '1980-01-01 10:00',
+                      'longitude': 116.4, 'latitude': 39.9}
+        })
+        grades = storage.analytics.summary()['industry_grade']
+        print(f"行业评级: {grades}")
+        assert grades[0]['bucket'] == '科技' and grades[0]['sub_bucket'] == '优秀'
+
+        incremental = storage.analytics.summary()
+        analytics = ScoreAnalytics(storage.db_path)
+        assert analytics.rebuild()
+        assert analytics.summary() == incremental
+
+        storage.clear_all_records()
+        assert storage.analytics.summary()['zodiac'] == []
+
+
+if __name__ == '__main__':
+    test_score_analytics()
+    print("✓ 测试通过")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SQL 转储解析测试 - 验证转义、多行 INSERT、跨行语句、未闭合与多余引号的处理，按字节范围切分后结果不变，
+以及万年历转换出错时不覆盖原有的 JSON
+"""
+
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.sql_dump import parse_insert, iter_dump_rows
+
+DUMP = """-- MySQL dump
+SET NAMES utf8mb4;
+CREATE TABLE `lunar` (`a` varchar(32), `b` varchar(32), `c` int);
+INSERT INTO `lunar` VALUES ('2025-01-01', '宜：祭祀, 祈福', 1);
+INSERT INTO `lunar` (`a`, `b`, `c`) VALUES ('it''s', 'a\\nb\\'c', NULL),('x)', "双""引", 2),
+  ('跨行', '分号;
+在字符串内', 3);
+INSERT IGNORE INTO `other` VALUES ('skip', '', 0);
+INSERT INTO `lunar` VALUES ( ' pad ' ,,4)
+"""
+
+
+def test_sql_dump():
+    """测试值的解析与转义，且任意切分字节范围拼接后与整体解析一致"""
+    assert parse_insert("INSERT INTO t VALUES ('a', 1),('b', 2);") == ('t', [['a', '1'], ['b', '2']])
+    assert parse_insert("INSERT INTO t VALUES ('a', 1),") is None  # 语句未结束
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'lunar.sql'
+        path.write_text(DUMP, encoding='utf-8')
+
+        rows = list(iter_dump_rows(str(path), table='lunar'))
+        print(f"解析行: {rows}")
+        assert rows == [
+            ['2025-01-01', '宜：祭祀, 祈福', '1'],
+            ["it's", "a\nb'c", 'NULL'],
+            ['x)', '双"引', '2'],
+            ['跨行', '分号;\n在字符串内', '3'],
+            ['pad', '', '4'],
+        ]
+        assert len(list(iter_dump_rows(str(path)))) == 6  # 含 INSERT IGNORE 语句
+
+        size = path.stat().st_size
+        for step in (1, 7, 50):
+            split = []
+            for start in range(0, size, step):
+                split.extend(iter_dump_rows(str(path), start, min(start + step, size)))
+            assert split == list(iter_dump_rows(str(path))), step
+
+
+def test_unbalanced_quotes():
+    """测试未闭合的字符串按语句未结束处理且耗时为线性，多余的引号报格式错误而不是跳过"""
+    begin = time.time()
+    assert parse_insert("INSERT INTO t VALUES (1,'abcdefghijklmnopqrstuvwx") is None
+    assert parse_insert("INSERT INTO t VALUES (1,'" + 'a\\b' * 20000) is None
+    assert parse_insert("INSERT INTO t VALUES (1,'abcdefghijklmnopqrstuvwxyz0123;") is None
+    assert parse_insert("INSERT INTO t VALUES (1,'abcdefghijklmnopqrstuvwxyz0123;\nmore text'),(2,'b');") == \
+        ('t', [['1', 'abcdefghijklmnopqrstuvwxyz0123;\nmore text'], ['2', 'b']])
+    assert time.time() - begin < 1
+
+    for statement in ("INSERT INTO t VALUES (1,'a'b',2);", "INSERT INTO t VALUES (1,a'b,2);",
+                      "INSERT INTO t VALUES (1,'a') x;"):
+        try:
+            parse_insert(statement)
+        except ValueError as e:
+            print(f"格式错误: {e}")
+        else:
+            raise AssertionError(statement)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bad.sql'
+        path.write_text("INSERT INTO t VALUES (1,'ok');\nINSERT INTO t VALUES (2,'a'b');\n", encoding='utf-8')
+        try:
+            list(iter_dump_rows(str(path)))
+        except ValueError as e:
+            assert '第 31 字节' in str(e)
+        else:
+            raise AssertionError('多余的引号未报错')
+
+        # 文件结尾处未闭合的语句跳过
+        path.write_text("INSERT INTO t VALUES (1,'ok');\nINSERT INTO t VALUES (2,'abc\n", encoding='utf-8')
+        assert list(iter_dump_rows(str(path))) == [['1', 'ok']]
+
+
+def _lunar_row(day: int) -> str:
+    values = [f"'2025-01-{day:02d}'", "'2024-12-01'"] + ["''"] * 27
+    return '(' + ', '.join(values) + ')'
+
+
+def test_lunar_convert_keeps_json_on_error():
+    """测试转换中途解析出错时保留原有的 wannianli.json 且不留临时文件，成功时才替换"""
+    from convert_tools import LunarConverter
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_path = Path(tmp) / 'lunar.sql'
+        output_json = Path(tmp) / 'wannianli.json'
+        original = '{"data": [{"gregorian_date": "原有"}]}'
+        sql_path.write_text(
+            f"INSERT INTO `lunar` VALUES {_lunar_row(1)},{_lunar_row(2)};\n"
+            "INSERT INTO `lunar` VALUES ('2025-01-03', 'x'y');\n", encoding='utf-8')
+
+        for db_path in (None, str(Path(tmp) / 'convert.db')):
+            output_json.write_text(original, encoding='utf-8')
+            assert not LunarConverter().convert_lunar_sql_to_json(str(sql_path), str(output_json), db_path=db_path)
+            assert output_json.read_text(encoding='utf-8') == original
+            assert not Path(f"{output_json}.tmp").exists()
+
+        sql_path.write_text(f"INSERT INTO `lunar` VALUES {_lunar_row(1)},{_lunar_row(2)};\n", encoding='utf-8')
+        assert LunarConverter().convert_lunar_sql_to_json(str(sql_path), str(output_json))
+        data = json.loads(output_json.read_text(encoding='utf-8'))
+        assert [r['gregorian_date'] for r in data['data']] == ['2025-01-01', '2025-01-02']
+        assert data['total_records'] == 2
+        assert not Path(f"{output_json}.tmp").exists()
+
+
+if __name__ == '__main__':
+    test_sql_dump()
+    test_unbalanced_quotes()
+    test_lunar_convert_keeps_json_on_error()
+    print("✓ 测试通过")
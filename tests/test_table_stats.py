@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+表统计元数据测试 - 验证触发器与加载器维护的行数与实际 COUNT(*) 一致，未跟踪的表只在 deep 模式下计数
+"""
+
+import sys
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.storage import Storage
+from modules.loader import DataLoader
+from modules.table_stats import TableStats
+
+
+def _result(name: str, birth_time: str) -> dict:
+    """构造最小化的计算结果"""
+    wuge = {k: {'num': 1, 'element': '木', 'fortune': '吉'}
+            for k in ['tiange', 'renge', 'dige', 'waige', 'zongge']}
+    wuge.update({'sancai': '木火土', 'score': 80})
+    return {
+        'name': name, 'gender': '男', 'birth_time': birth_time,
+        'longitude': 116.4, 'latitude': 39.9, 'comprehensive_score': 80,
+        'wuge': wuge,
+        'shengxiao': {'shengxiao': '马', 'score': 70},
+        'chenggu': {'weight': 4.2}
+    }
+
+
+def _actual_counts(db_path: str, tables) -> dict:
+    conn = sqlite3.connect(db_path)
+    counts = {t: conn.execute(f'SELECT COUNT(*) FROM {t}').fetchone()[0] for t in tables}
+    conn.close()
+    return counts
+
+
+def test_table_stats():
+    """测试写入、覆盖、删除、清空与资源加载后统计均准确"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'stats.db')
+        storage = Storage(db_path)
+        loader = DataLoader(db_path, tmp)
+
+        # 同名同时间的记录会被 INSERT OR REPLACE 覆盖
+        storage.save_test_results([_result('张三', '1990-01-01 10:00'), _result('李四', '1991-01-01 10:00')])
+        storage.save_test_result(_result('张三', '1990-01-01 10:00'))
+        storage.delete_record(2)
+
+        file_path = Path(tmp) / 'nayin.json'
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'data': [{'ganzhi': '甲子', 'nayin': '海中金', 'wuxing': '金'},
+                                {'ganzhi': '乙丑', 'nayin': '海中金', 'wuxing': '金'}]}, f, ensure_ascii=False)
+        assert loader.load_resource('nayin', str(file_path))['success']
+
+        info = storage.get_all_tables_info()
+        print(f"表统计: {info}")
+        assert info == _actual_counts(db_path, info.keys())
+        assert info['wuxing_nayin'] == 2
+
+        # 未跟踪的表（行指纹等）只在 deep 模式下计数
+        assert 'resource_row_fingerprints' not in info
+        assert TableStats(db_path).get_all()['resource_row_fingerprints']['row_count'] is None
+        deep_info = storage.get_all_tables_info(deep=True)
+        assert deep_info == _actual_counts(db_path, deep_info.keys())
+        assert deep_info['resource_row_fingerprints'] == 2
+
+        # deep 模式重新计数后内容指纹与加载时一致
+        before = TableStats(db_path).get_all()['wuxing_nayin']['content_hash']
+        assert TableStats(db_path).get_all(deep=True)['wuxing_nayin']['content_hash'] == before
+
+        assert storage.clear_all_data()
+        info = storage.get_all_tables_info()
+        assert info == _actual_counts(db_path, info.keys())
+        assert loader.check_resource_integrity()['complete'] is False
+
+
+if __name__ == '__main__':
+    test_table_stats()
+    print("✓ 测试通过")
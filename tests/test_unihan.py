@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unihan 读取测试 - 验证一次扫描提取全部字段，以及缓存命中与源文件变化后失效
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.unihan import UnihanStore
+
+UNIHAN_FILES = {
+    'Unihan_IRGSources.txt': '# 注释\nU+5289\tkIRG_GSource\tGE-3A45\nU+5289\tkTotalStrokes\t15\n'
+                             'U+5289\tkRSUnicode\t18.13\nU+5F20\tkTotalStrokes\t7 11\n',
+    'Unihan_Readings.txt': 'U+5289\tkMandarin\tLiú\nU+5289\tkDefinition\tsurname\nU+5F20\tkMandarin\tzhāng\n',
+    'Unihan_Variants.txt': 'U+5289\tkSimplifiedVariant\tU+5218\nU+5F20\tkTraditionalVariant\tU+5F35\n',
+}
+
+
+def test_unihan_store():
+    """测试只保留所需字段，第二次读取命中缓存，源文件修改后重新解析"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, content in UNIHAN_FILES.items():
+            path = Path(tmp) / name
+            path.write_text(content, encoding='utf-8')
+            paths.append(str(path))
+
+        store = UnihanStore(paths)
+        fields = store.load()
+        print(f"字段: {sorted(fields)}")
+        assert not store.from_cache
+        assert sorted(fields) == ['kIRG_GSource', 'kMandarin', 'kSimplifiedVariant',
+                                  'kTotalStrokes', 'kTraditionalVariant']
+        assert fields['kTotalStrokes'] == {'U+5289': '15', 'U+5F20': '7 11'}
+
+        cached = UnihanStore(paths)
+        assert cached.load() == fields
+        assert cached.from_cache
+
+        Path(paths[1]).write_text('U+5289\tkMandarin\tliú\n', encoding='utf-8')
+        changed = UnihanStore(paths)
+        assert changed.load()['kMandarin'] == {'U+5289': 'liú'}
+        assert not changed.from_cache
+
+
+if __name__ == '__main__':
+    test_unihan_store()
+    print("✓ 测试通过")
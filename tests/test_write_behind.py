@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+后台写入队列测试 - 验证队列满时背压、flush 等待写完、close 可重复调用，以及单条失败不影响同批其他结果
+"""
+
+import sys
+import atexit
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules import write_behind
+from modules.storage import Storage
+from modules.write_behind import WriteBehindQueue
+
+
+def _company(name: str) -> dict:
+    return {
+        'parsed': {'full_name': name, 'industry_type': '科技'},
+        'scores': {'total_score': 80, 'grade': '良好'},
+        'owner': {'name': '王五', 'birth_time': '1980-01-01 10:00', 'longitude': 116.4, 'latitude': 39.9}
+    }
+
+
+class BlockingStorage:
+    """写入前等待放行的存储，用于观察队列积压"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.saved = []
+
+    def save_test_results(self, results):
+        self.release.wait()
+        self.saved.extend(results)
+        return list(range(1, len(results) + 1))
+
+    def save_company_results(self, results):
+        return self.save_test_results(results)
+
+
+class FailingStorage(Storage):
+    """名称含“失败”的结果在写入主记录后抛出异常，应由保存点回滚"""
+
+    def _insert_company_result(self, cursor, result):
+        record_id = super()._insert_company_result(cursor, result)
+        if '失败' in result['parsed']['full_name']:
+            raise ValueError('模拟写入失败')
+        return record_id
+
+
+def test_backpressure_and_flush():
+    """测试积压达到 max_pending 后 submit 阻塞，放行后 flush 返回时已全部写入"""
+    storage = BlockingStorage()
+    persister = WriteBehindQueue(storage, max_pending=3, batch_size=1, flush_interval=0)
+    submitted = []
+
+    def produce():
+        for i in range(10):
+            persister.save_test_result({'name': f'张{i}'})
+            submitted.append(i)
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    # 后台线程取走 1 条后阻塞在写入上，队列中再积压 3 条，第 5 条提交被阻塞
+    producer.join(timeout=0.5)
+    print(f"阻塞前已提交: {len(submitted)}")
+    assert producer.is_alive() and len(submitted) == 4
+
+    storage.release.set()
+    producer.join(timeout=5)
+    assert not producer.is_alive()
+    persister.flush()
+    assert len(storage.saved) == 10 and persister.saved_count == 10
+    assert persister.close() == {'saved': 10, 'failed': 0, 'errors': []}
+
+
+class FakeAtexit:
+    """记录 register / unregister 的回调，代替进程退出时的 atexit"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def register(self, func):
+        self.callbacks.append(func)
+
+    def unregister(self, func):
+        self.callbacks = [f for f in self.callbacks if f != func]
+
+
+def test_close_idempotent():
+    """测试 close 可重复调用（含 atexit 已调用之后），关闭后拒绝提交"""
+    fake_atexit = FakeAtexit()
+    write_behind.atexit = fake_atexit
+    try:
+        persister = WriteBehindQueue(BlockingStorage())
+    finally:
+        write_behind.atexit = atexit
+    persister.storage.release.set()
+    persister.save_company_result(_company('泽腾'))
+
+    # 进程退出时 atexit 调用 close，之后业务代码再次 close
+    assert fake_atexit.callbacks == [persister.close]
+    write_behind.atexit = fake_atexit
+    try:
+        for callback in list(fake_atexit.callbacks):
+            first = callback()
+    finally:
+        write_behind.atexit = atexit
+    assert fake_atexit.callbacks == []
+    assert persister.close() == first == {'saved': 1, 'failed': 0, 'errors': []}
+    assert not persister._thread.is_alive()
+    try:
+        persister.save_company_result(_company('华兴'))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError('关闭后仍可提交')
+
+
+def test_failure_isolation():
+    """测试同一事务中单条写入失败只回滚该条（保存点），失败明细条数有上限"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = FailingStorage(str(Path(tmp) / 'history.db'))
+        original = write_behind.MAX_ERRORS
+        write_behind.MAX_ERRORS = 3
+        try:
+            persister = WriteBehindQueue(storage, batch_size=50)
+            names = [f'失败{i}' if i % 3 == 0 else f'公司{i}' for i in range(30)]
+            ids = {}
+            for name in names:
+                persister.save_company_result(_company(name), callback=lambda rid, n=name: ids.__setitem__(n, rid))
+            stats = persister.close()
+        finally:
+            write_behind.MAX_ERRORS = original
+        print(f"写入统计: {stats}")
+
+        assert stats['saved'] == 20 and stats['failed'] == 10
+        assert stats['errors'] == ['company: 失败0', 'company: 失败3', 'company: 失败6']
+        assert all((ids[name] is None) == name.startswith('失败') for name in names)
+
+        conn = sqlite3.connect(storage.db_path)
+        saved = {row[0] for row in conn.execute('SELECT full_name FROM company_test_records')}
+        conn.close()
+        assert saved == {name for name in names if not name.startswith('失败')}
+
+
+if __name__ == '__main__':
+    test_backpressure_and_flush()
+    test_close_idempotent()
+    test_failure_isolation()
+    print("✓ 测试通过")